@@ -1,422 +1,443 @@
-
-""" 
+"""
 Bitso Tetris - Developed by @julian_colombo
 
 Version: 1.0.2
 Description:
 Classic Tetris clone built with Pygane, featuring Bitso branding,
 local leaderboard, game states, scoring, levels, and pause functionality.
+
+This module is the pygame front-end. Game rules live in engine.py.
+Run it as a script; importing it has no side effects. pygame and the
+modules that draw with it are only imported by main(), so tools that
+import this module do not pay for them.
 """
 
 
+import argparse
+import atexit
+import os
 import sys
-import random
-import pygame
-
-
-# === Constants ===
-# Constant for high score file
-RECORD_FILE = "record.txt"
-
-# Inicializar pygame
-pygame.init()
-
-# Prepare space for logo
-try:
-    logo_bitso = pygame.image.load("bitso_logo.png")
-    logo_bitso = pygame.transform.scale(logo_bitso, (60, 60))
-except FileNotFoundError:
-    logo_bitso = None
-
-CONFIG = {
-    "WINDOW_WIDTH": 560,
-    "WINDOW_HEIGHT": 680,
-    "CELL_SIZE": 30,
-    "COLUMNS": 10,
-    "ROWS": 20,
-    "FPS": 60,
-    "INITIAL_FALL_DELAY": 500,
-    "FAST_DROP_SPEED": 50,
-    "LATERAL_SPEED": 150,
-}
+import time
+import sqlite3
+
+from config import CONFIG
+from engine import GameState
+from leaderboard import Leaderboard
+from timing import FixedStep
+from animation import Timeline, scaled_duration
+from replay import Recorder, replay_path
+from placements import game_placements
+from snapshots import (
+    AUTOSAVE_FILE, SnapshotRing, load_snapshot, remove_autosave,
+    save_snapshot
+)
+
 
 PANEL_X = 330  # Panel X position for info display
+ENTRY_DROP = 0.9  # Cells the new piece slides down while entering
+
+# Fonts the menu needs for its first frame, then every other one,
+# as get_font() arguments
+MENU_FONTS = [("Verdana", 28, True), ("Verdana", 22)]
+OTHER_FONTS = [
+    ("Verdana", 30, True),
+    ("Verdana", 12, False, True),
+    ("Verdana", 20, True),
+    ("Verdana", 20),
+    ("Verdana", 24),
+    ("Verdana", 32, True),
+    ("Verdana", 40, True),
+    ("Arial", 20),
+    ("Arial", 22),
+]
 
-# === Utility Functions ===
-def load_high_score():
-    """Reads the high score from the RECORD_FILE."""
+# === Global Variables ===
+# Set by init() and warm_up(); None until main() runs
+pygame = None
+window = None
+clock = None
+logo_bitso = None
+scores = None
+online = None  # LeaderboardClient when CONFIG["LEADERBOARD_URL"] is set
+broadcaster = None  # Broadcaster when CONFIG["SPECTATE_RELAY"] is set
+advisor = None  # Advisor, started when hints or autoplay are first used
+high_score = 0
+scheduler = None
+game = None
+recorder = None
+renderer = None
+hud = None
+profiler = None
+profiler_overlay = None
+timeline = None
+undo_ring = None  # Snapshot at the start of each recent piece
+pending_save = None  # Newest snapshot not yet written to the autosave
+last_save_time = 0.0
+startup_times = []  # (stage, ms since main() started)
+
+
+# === Startup ===
+def startup_mark(stage, started):
+    """Records how long startup has taken when a stage finishes."""
+    startup_times.append((stage, (time.perf_counter() - started) * 1000))
+
+
+def init(started):
+    """Initializes pygame and everything the menu's first frame needs.
+
+    Only the display, font and timer subsystems are started;
+    pygame.init() would also open audio and joystick devices the game
+    never uses.
+    """
+    global pygame, Hud, get_font, render_text, Renderer
+    global FrameProfiler, ProfilerOverlay
+    global window, clock, logo_bitso, scheduler, game, recorder
+    global renderer, hud, profiler, profiler_overlay, timeline, undo_ring
+    import pygame
+    from hud import Hud, get_font, render_text
+    from render import Renderer, visible_rows
+    from profiler import FrameProfiler, ProfilerOverlay
+    startup_mark("import", started)
+
+    pygame.display.init()
+    pygame.font.init()
+    window = pygame.display.set_mode((
+        CONFIG["WINDOW_WIDTH"],
+        CONFIG["WINDOW_HEIGHT"]
+    ))
+    pygame.display.set_caption("Tetris")
+    clock = pygame.time.Clock()
+    # The first tick starts SDL's timer; get_ticks() is 0 until then
+    clock.tick()
+    startup_mark("display", started)
+
+    # Prepare space for logo
     try:
-        with open(RECORD_FILE, "r") as file:
-            return int(file.read())
+        logo_bitso = pygame.image.load("bitso_logo.png").convert_alpha()
+        logo_bitso = pygame.transform.scale(logo_bitso, (60, 60))
     except FileNotFoundError:
-        return 0
+        logo_bitso = None
+    for font in MENU_FONTS:
+        get_font(*font)
+    startup_mark("menu assets", started)
+
+    # Logic runs on fixed ticks; the game clock is the tick clock
+    scheduler = FixedStep(CONFIG["TICK_RATE"])
+    game = GameState(clock=scheduler.time)
+    # Every game is recorded so it can be replayed with replay.py
+    recorder = Recorder(game, lambda: scheduler.ticks)
+    renderer = Renderer(
+        window, draw_background, visible_rows(CONFIG["WINDOW_HEIGHT"])
+    )
+    hud = Hud(renderer, PANEL_X)
+    # Frame profiler: F3 shows the overlay, F4 saves a CSV
+    profiler = FrameProfiler()
+    renderer.profiler = profiler
+    profiler_overlay = ProfilerOverlay(profiler, (PANEL_X, 440, 220, 190))
+    timeline = Timeline()
+    undo_ring = SnapshotRing(CONFIG["UNDO_STEPS"])
+    # Quitting writes out the last placement the throttle held back
+    atexit.register(autosave, True)
+    startup_mark("game", started)
+
+
+def warm_up(started):
+    """Loads what the menu's first frame did not need.
+
+    Runs right after that frame is shown, while the player reads the
+    menu, so the first playing frame does not stall on font lookups.
+    """
+    global scores, online, broadcaster, high_score
+    from render import get_atlas
+    for font in OTHER_FONTS:
+        get_font(*font)
+    get_atlas(CONFIG["CELL_SIZE"])
+    try:
+        scores = Leaderboard()
+        high_score = scores.high_score()
+    except sqlite3.Error as e:
+        # A locked or corrupt database must not stop the game
+        print(f"Leaderboard unavailable, scores will not be saved: {e}",
+              file=sys.stderr)
+        scores = Leaderboard(":memory:", legacy=False)
+        high_score = 0
+    if CONFIG["LEADERBOARD_URL"]:
+        from online_leaderboard import LeaderboardClient
+        online = LeaderboardClient(CONFIG["LEADERBOARD_URL"])
+        # Sends what it can on exit; the rest waits in the queue file
+        atexit.register(online.close)
+    if CONFIG["SPECTATE_RELAY"]:
+        from spectate import Broadcaster
+        broadcaster = Broadcaster(
+            CONFIG["SPECTATE_RELAY"], CONFIG["SPECTATE_CHANNEL"]
+        )
+        atexit.register(broadcaster.close)
+    startup_mark("warm-up", started)
 
-# === Global Variables ===
-current_piece = None
-current_color = None
-current_rotation = 0
-piece_x = 0
-piece_y = 0
-score = 0
-level = 1
-last_left_move_time = 0
-last_right_move_time = 0
-next_piece, next_color = None, None  # Next piece and color
-total_lines = 0  # Total lines cleared to increase level
-game_state = "playing"
-is_paused = False
-high_score = load_high_score()
-start_time = pygame.time.get_ticks()
-
-# === Pieces and Colors ===
-PIECES = [
-    # I
-    [
-        [[1, 1, 1, 1]],
-        [[1], [1], [1], [1]]
-    ],
-    # O
-    [
-        [[1, 1],
-         [1, 1]]
-    ],
-    # T
-    [
-        [[0, 1, 0],
-         [1, 1, 1],
-         [0, 0, 0]],
-        [[0, 1, 0],
-         [0, 1, 1],
-         [0, 1, 0]],
-        [[0, 0, 0],
-         [1, 1, 1],
-         [0, 1, 0]],
-        [[0, 1, 0],
-         [1, 1, 0],
-         [0, 1, 0]]
-    ],
-    # S
-    [
-        [[0, 1, 1],
-         [1, 1, 0]],
-        [[1, 0],
-         [1, 1],
-         [0, 1]]
-    ],
-    # Z
-    [
-        [[1, 1, 0],
-         [0, 1, 1]],
-        [[0, 1],
-         [1, 1],
-         [1, 0]]
-    ],
-    # J
-    [
-        [[1, 0, 0],
-         [1, 1, 1]],
-        [[0, 1, 1],
-         [0, 1, 0],
-         [0, 1, 0]],
-        [[1, 1, 1],
-         [0, 0, 1]],
-        [[0, 1, 0],
-         [0, 1, 0],
-         [1, 1, 0]]
-    ],
-    # L
-    [
-        [[0, 0, 1],
-         [1, 1, 1]],
-        [[0, 1, 0],
-         [0, 1, 0],
-         [0, 1, 1]],
-        [[1, 1, 1],
-         [1, 0, 0]],
-        [[1, 1, 0],
-         [0, 1, 0],
-         [0, 1, 0]]
+
+def report_startup(always=False):
+    """Prints the startup stages if asked to, or if over budget."""
+    first_frame = dict(startup_times).get("first frame", 0)
+    over = first_frame > CONFIG["STARTUP_BUDGET_MS"]
+    if not (always or over):
+        return
+    if over:
+        print(
+            f"Startup took {first_frame:.0f} ms, over the "
+            f"{CONFIG['STARTUP_BUDGET_MS']} ms budget",
+            file=sys.stderr
+        )
+    for stage, ms in startup_times:
+        print(f"  {stage:<12}{ms:8.1f} ms", file=sys.stderr)
+
+
+def use_giant_board(rows, columns):
+    """Switches to a stress-test board, shrinking cells to fit its width.
+
+    Boards taller than the window scroll with the falling piece.
+    """
+    CONFIG["ROWS"] = rows
+    CONFIG["COLUMNS"] = columns
+    CONFIG["CELL_SIZE"] = max(
+        4, min(CONFIG["CELL_SIZE"], PANEL_X // (columns + 1))
+    )
+
+
+# === Info Panel ===
+def draw_background(surface):
+    """Draws the parts of the playing screen that never change."""
+    surface.fill((15, 15, 15))  # Bitso-style dark background
+    # Title
+    title = render_text(get_font("Verdana", 30, bold=True), "Bitso Tetris")
+    text_width = title.get_width()
+    board_width = CONFIG["COLUMNS"] * CONFIG["CELL_SIZE"]
+    surface.blit(
+        title,
+        ((board_width - text_width) // 2, 5)
+    )
+    author = render_text(
+        get_font("Verdana", 12, italic=True),
+        "@julian_colombo",
+        (150, 150, 150)
+    )
+    surface.blit(
+        author,
+        (
+            CONFIG["WINDOW_WIDTH"] - author.get_width() - 10,
+            CONFIG["WINDOW_HEIGHT"] - 20
+        )
+    )
+    hud.draw_labels(surface)
+    if logo_bitso:
+        surface.blit(
+            logo_bitso,
+            (CONFIG["WINDOW_WIDTH"] - 70, 10)
+        )
+
+
+def hud_values():
+    """Returns the text shown next to each HUD label."""
+    seconds_played = game.elapsed_seconds()
+    minutes = seconds_played // 60
+    seconds = seconds_played % 60
+    return [
+        str(game.score),
+        str(game.level),
+        str(high_score),
+        f"{minutes:02}:{seconds:02}",
+        str(game.total_lines),
     ]
-]
 
 
-COLORS = [
-    (34, 221, 145),  # Bitso green main
-    (20, 180, 120),  # Darker green
-    (70, 240, 180),  # Aqua green
-    (50, 200, 130),  # Medium green
-    (60, 160, 120),  # Moss green
-    (90, 255, 190),  # Light green
-    (0, 100, 80)     # Deep dark green
-]
+def draw_hud():
+    """Redraws the HUD values and next piece that changed."""
+    hud.draw_values(window, hud_values())
+    hud.draw_next(window, game.next_piece)
 
-# === Pygame Window and Board ===
-window = pygame.display.set_mode((
-    CONFIG["WINDOW_WIDTH"],
-    CONFIG["WINDOW_HEIGHT"]
-))
-pygame.display.set_caption("Tetris")
-clock = pygame.time.Clock()
-
-# Create the board as a 2D list of black cells
-board = [
-    [(0, 0, 0) for _ in range(CONFIG["COLUMNS"])]
-    for _ in range(CONFIG["ROWS"])
-]
 
-# === Drawing Functions ===
-def draw_board():
-    """Draws the Tetris board and cell grid."""
-    for row in range(CONFIG["ROWS"]):
-        for col in range(CONFIG["COLUMNS"]):
-            color = board[row][col]
-            pygame.draw.rect(
-                window,
-                color,
-                (
-                    col * CONFIG["CELL_SIZE"],
-                    row * CONFIG["CELL_SIZE"] + 60,
-                    CONFIG["CELL_SIZE"],
-                    CONFIG["CELL_SIZE"]
-                )
-            )
-            # Draw cell border
-            pygame.draw.rect(
-                window,
-                (80, 80, 80),
-                (
-                    col * CONFIG["CELL_SIZE"],
-                    row * CONFIG["CELL_SIZE"] + 60,
-                    CONFIG["CELL_SIZE"],
-                    CONFIG["CELL_SIZE"]
-                ),
-                1
-            )
+# === Frame Profiler ===
+def toggle_profiler_overlay():
+    """Shows or hides the overlay, repainting the panel under it."""
+    profiler_overlay.toggle()
+    renderer.invalidate()
+
+
+def dump_profile():
+    """Saves the buffered frame timings to a timestamped CSV file."""
+    try:
+        profiler.dump_csv(time.strftime("profile-%Y%m%d-%H%M%S.csv"))
+    except OSError:
+        pass
 
-def draw_piece(piece, rotation, piece_x, piece_y, color, pixel_offset=0):
-    """Draws the current piece at its board position."""
-    shape = piece[rotation]
-    for i, row in enumerate(shape):
-        for j, cell in enumerate(row):
-            if cell == 1:
-                x = (piece_x + j) * CONFIG["CELL_SIZE"]
-                y = (piece_y + i) * CONFIG["CELL_SIZE"] + 60 + pixel_offset
-                pygame.draw.rect(
-                    window,
-                    color,
-                    (
-                        x, y,
-                        CONFIG["CELL_SIZE"],
-                        CONFIG["CELL_SIZE"]
-                    )
-                )
-                pygame.draw.rect(
-                    window,
-                    (80, 80, 80),
-                    (
-                        x, y,
-                        CONFIG["CELL_SIZE"],
-                        CONFIG["CELL_SIZE"]
-                    ),
-                    1
-                )
 
-def draw_ghost_piece():
-    """Draws a shadow showing where the current piece will land."""
-    ghost_y = piece_y
-    while valid_position(current_piece, current_rotation, piece_x, ghost_y + 1, board):
-        ghost_y += 1
-    if ghost_y == piece_y:
+# === Animations ===
+def effect_duration(name):
+    """Returns an effect's duration, shortened at higher levels."""
+    return scaled_duration(
+        CONFIG[name], game.level, CONFIG["ANIMATIONS_OFF_LEVEL"]
+    )
+
+
+def start_piece_entry():
+    """Slides the newly spawned piece into place."""
+    timeline.start(
+        "entry", pygame.time.get_ticks(), effect_duration("ENTRY_ANIMATION_MS")
+    )
+
+
+def handle_step_result(result):
+    """Starts the front-end effects for a locked piece."""
+    if not result.locked:
         return
-    shape = current_piece[current_rotation]
-    for i, row in enumerate(shape):
-        for j, cell in enumerate(row):
-            if cell == 1:
-                x = (piece_x + j) * CONFIG["CELL_SIZE"]
-                y = (ghost_y + i) * CONFIG["CELL_SIZE"] + 60
-                pygame.draw.rect(
-                    window, (50, 50, 50),
-                    (x, y, CONFIG["CELL_SIZE"], CONFIG["CELL_SIZE"])
-                )
-                pygame.draw.rect(
-                    window, (100, 100, 100),
-                    (x, y, CONFIG["CELL_SIZE"], CONFIG["CELL_SIZE"]), 1
-                )
+    if result.cleared_rows:
+        timeline.start(
+            "clear",
+            pygame.time.get_ticks(),
+            effect_duration("CLEAR_FLASH_MS"),
+            result.cleared_rows
+        )
+    if not game.game_over:
+        start_piece_entry()
 
-# === Animate Piece Entry ===
-def animate_piece_entry(piece, rotation, x, y, color):
-    for offset in reversed(range(10)):
-        draw_board()
-        draw_piece(piece, rotation, x, y, color, pixel_offset=-offset * 3)
-        pygame.display.flip()
-        pygame.time.delay(15)
-
-# === Game Logic Functions ===
-def new_piece():
-    """Returns a random piece and its color."""
-    index = random.randint(0, len(PIECES) - 1)
-    return PIECES[index], COLORS[index]
-
-def add_piece_to_board(piece, rotation, piece_x, piece_y, board, color):
-    """Locks the current piece into the board."""
-    shape = piece[rotation]
-    for i, row in enumerate(shape):
-        for j, value in enumerate(row):
-            if value == 1:
-                board_row = piece_y + i
-                board_col = piece_x + j
-                # Place piece if inside the board
-                if (
-                    0 <= board_row < CONFIG["ROWS"] and
-                    0 <= board_col < CONFIG["COLUMNS"]
-                ):
-                    board[board_row][board_col] = color
-
-def reset_game_state():
-    """Resets all game state variables for a new game."""
-    global board, score, level, fall_delay, total_lines
-    global next_piece, next_color, game_state, start_time
-    fall_delay = CONFIG["INITIAL_FALL_DELAY"]
-    board = [[(0, 0, 0) for _ in range(CONFIG["COLUMNS"])]
-             for _ in range(CONFIG["ROWS"])]
-    score = 0
-    level = 1
-    total_lines = 0
-    next_piece, next_color = new_piece()
-    game_state = "playing"
-    start_time = pygame.time.get_ticks()
-    global last_fall_time
-    last_fall_time = pygame.time.get_ticks()
-
-def clear_complete_rows(board):
-    """Removes all full rows and returns new board, count, and indices."""
-    removed_rows = []
-    new_rows = []
-    for i, row in enumerate(board):
-        if row.count((0, 0, 0)) == 0:
-            removed_rows.append(i)
-        else:
-            new_rows.append(row)
-    for _ in removed_rows:
-        new_rows.insert(0, [(0, 0, 0)] * CONFIG["COLUMNS"])
-    return new_rows, len(removed_rows), removed_rows
-
-def calculate_score(rows_cleared):
-    """Returns score based on the number of rows cleared."""
-    if rows_cleared == 1:
-        return 100
-    elif rows_cleared == 2:
-        return 300
-    elif rows_cleared == 3:
-        return 500
-    elif rows_cleared == 4:
-        return 800
-    return 0
-
-# === Piece and State Control ===
-def reset_piece():
-    """Sets the next piece as the current piece and spawns a new next piece."""
-    global current_piece, current_color, next_piece, next_color
-    global current_rotation, piece_x, piece_y
-    current_piece, current_color = next_piece, next_color
-    next_piece, next_color = new_piece()
-    current_rotation = 0
-    piece_x = (CONFIG["COLUMNS"] - 4) // 2
-    piece_y = 0
-
-    # Animate entry of the new piece
-    animate_piece_entry(
-        current_piece, current_rotation, piece_x, piece_y, current_color
+
+def draw_playfield(hint=None):
+    """Draws the board with the running entry and line-clear effects."""
+    now = pygame.time.get_ticks()
+    entry = timeline.progress("entry", now)
+    clear = timeline.get("clear", now)
+    renderer.draw_playfield(
+        game,
+        pixel_offset=0 if entry is None else -int(
+            ENTRY_DROP * CONFIG["CELL_SIZE"] * (1 - entry)
+        ),
+        flash_rows=() if clear is None else clear.data,
+        hint=hint
     )
 
-    global last_fall_time
-    last_fall_time = pygame.time.get_ticks()
-
-
-# === Collision and Validation ===
-def valid_position(piece, rotation, piece_x, piece_y, board):
-    """Returns True if the piece fits at the given position on the board."""
-    shape = piece[rotation]
-    for i, row in enumerate(shape):
-        for j, cell in enumerate(row):
-            if cell == 1:
-                board_row = piece_y + i
-                board_col = piece_x + j
-                if (
-                    board_row < 0 or
-                    board_row >= CONFIG["ROWS"] or
-                    board_col < 0 or
-                    board_col >= CONFIG["COLUMNS"]
-                ):
-                    return False
-                if board[board_row][board_col] != (0, 0, 0):
-                    return False
+
+# === Hints and Autoplay ===
+def start_advisor():
+    """Starts the move search worker the first time it is needed."""
+    global advisor
+    if advisor is None:
+        from advisor import Advisor
+        advisor = Advisor()
+        atexit.register(advisor.close)
+
+
+def autoplay_step(target):
+    """Makes the next move toward a suggested placement."""
+    for placement in game_placements(game):
+        if placement[:3] == target[:3]:
+            if placement.path:
+                return game.step(placement.path[0])
+            break
+    # Arrived, or the target is out of reach from here
+    return game.step("hard_drop")
+
+
+# === Undo and Autosave ===
+def start_game(choice):
+    """Starts a new game, or resumes the autosaved one for "Continue".
+
+    Returns True if a saved game was resumed.
+    """
+    game.reset()
+    # Undo snapshots of the last game point into its finished recording
+    undo_ring.clear()
+    if choice != "Continue":
+        return False
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return False
+    rows, _, tops = snapshot.board
+    if (len(rows), len(tops)) != (game.board.height, game.board.width):
+        return False
+    game.restore(snapshot)
+    # Carry the played time over to this run's clock
+    now = scheduler.time()
+    game.start_time = now - (snapshot.last_fall_time - snapshot.start_time)
+    game.last_fall_time = now
     return True
 
-def is_game_over(piece, rotation, piece_x, piece_y, board):
-    """Returns True if the current piece placement triggers game over."""
-    return not valid_position(piece, rotation, piece_x, piece_y, board)
 
+def track_placement():
+    """Snapshots each new piece for undo and autosaves the game."""
+    global pending_save
+    latest = undo_ring.latest()
+    if latest is not None and latest[1].seed != game.seed:
+        undo_ring.clear()
+        latest = None
+    if latest is None or latest[1].pieces_placed != game.pieces_placed:
+        snapshot = game.snapshot()
+        undo_ring.push(scheduler.ticks, snapshot)
+        pending_save = snapshot
+    autosave()
+
+
+def autosave(force=False):
+    """Writes the newest snapshot, at most every AUTOSAVE_SECONDS.
+
+    The write runs in the frame loop, so pieces placed in between are
+    only kept in memory; pausing and quitting pass force=True.
+    """
+    global pending_save, last_save_time
+    if pending_save is None or game.game_over:
+        return
+    now = time.monotonic()
+    if not force and now - last_save_time < CONFIG["AUTOSAVE_SECONDS"]:
+        return
+    try:
+        save_snapshot(pending_save)
+    except OSError:
+        pass
+    pending_save = None
+    last_save_time = now
+
+
+def undo_placement():
+    """Takes back the last placed piece, keeping the game clock."""
+    if len(undo_ring) > 1:
+        undo_ring.pop()
+    latest = undo_ring.latest()
+    if latest is None:
+        return
+    start_time = game.start_time
+    game.restore(latest[1])
+    game.start_time = start_time
+    game.last_fall_time = scheduler.time()
+    start_piece_entry()
 
-# === Piece Loc/Clear/Score Functions ===
-def lock_piece_to_board():
-    add_piece_to_board(
-        current_piece,
-        current_rotation,
-        piece_x,
-        piece_y,
-        board,
-        current_color
-    )
-    
-def clear_and_animate_rows():
-    """Clears filled rows and plays clear animation."""
-    global board
-    board, cleared, highlighted_rows = clear_complete_rows(board)
-    if cleared > 0:
-        for i in highlighted_rows:
-            for col in range(CONFIG["COLUMNS"]):
-                pygame.draw.rect(
-                    window,
-                    (255, 255, 255),
-                    (
-                        col * CONFIG["CELL_SIZE"],
-                        i * CONFIG["CELL_SIZE"] + 60,
-                        CONFIG["CELL_SIZE"],
-                        CONFIG["CELL_SIZE"]
-                    )
-                )
-        pygame.display.flip()
-        pygame.time.delay(150)
-    return cleared
-    
-def update_score_and_level(cleared):
-    """Updates score, level, and fall speed after line clears."""
-    global score, total_lines, level, fall_delay
-    score += calculate_score(cleared)
-    total_lines += cleared
-    if total_lines >= level * 10:
-        level += 1
-        fall_delay = max(250, fall_delay - 50)
-
-# === Game Loop Variables ===
-fall_delay = CONFIG["INITIAL_FALL_DELAY"]  # ms
 
 # === Leaderboard Display ===
 def show_leaderboard():
-    """Displays the leaderboard screen."""
-    try:
-        with open("leaderboard.txt", "r") as f:
-            scores = [line.strip().split(",") for line in f.readlines()]
-            scores = sorted(scores, key=lambda x: int(x[1]), reverse=True)[:10]
-    except FileNotFoundError:
-        scores = []
-
-    font = pygame.font.SysFont("Verdana", 24)
-    font_title = pygame.font.SysFont("Verdana", 32, bold=True)
+    """Displays the leaderboard screen, ten entries per page.
+
+    With an online leaderboard configured, TAB switches between the
+    local and the shared scores.
+    """
+    page = 0
+    show_online = False
+    font = get_font("Verdana", 24)
+    font_title = get_font("Verdana", 32, bold=True)
+    shown = None  # (page, show_online) the entries were fetched for
+    entries = None
+    heading = "Leaderboard"
+    pages = 1
     while True:
+        # Query only when the view changes, or while a page is loading
+        if (page, show_online) != shown or entries is None:
+            shown = (page, show_online)
+            if show_online:
+                # Served from the client's cache; never waits on the network
+                entries, total = online.top(10, page * 10)
+                heading = "Online Leaderboard"
+            else:
+                entries, total = scores.top(10, page * 10), scores.count()
+                heading = "Leaderboard"
+            pages = max(1, -(-total // 10))
         window.fill((15, 15, 15))
-        title = font_title.render("Leaderboard", True, (255, 255, 255))
+        title = render_text(font_title, heading, (255, 255, 255))
         window.blit(
             title,
             (
@@ -424,19 +445,37 @@ def show_leaderboard():
                 50
             )
         )
-        for i, (name, score_val) in enumerate(scores):
-            text = font.render(
-                f"{i+1}. {name}: {score_val}",
-                True,
+        if entries is None:
+            status = "Offline" if online.online is False else "Loading..."
+            text = render_text(font, status, (180, 180, 180))
+            window.blit(text, (100, 100))
+        for i, (name, score_val) in enumerate(entries or ()):
+            text = render_text(
+                font,
+                f"{page * 10 + i + 1}. {name}: {score_val}",
                 (255, 255, 255)
             )
             window.blit(text, (100, 100 + i * 30))
-        text_exit = font.render(
+        text_exit = render_text(
+            font,
             "Press ESC to return",
-            True,
             (180, 180, 180)
         )
         window.blit(text_exit, (100, 450))
+        if pages > 1:
+            text_page = render_text(
+                font,
+                f"Page {page + 1}/{pages}  (LEFT/RIGHT)",
+                (180, 180, 180)
+            )
+            window.blit(text_page, (100, 490))
+        if online is not None:
+            text_tab = render_text(
+                font,
+                "TAB: local scores" if show_online else "TAB: online scores",
+                (180, 180, 180)
+            )
+            window.blit(text_tab, (100, 530))
         if logo_bitso:
             window.blit(logo_bitso, (CONFIG["WINDOW_WIDTH"] - 70, 10))
         pygame.display.flip()
@@ -447,18 +486,32 @@ def show_leaderboard():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     return
+                elif event.key == pygame.K_LEFT:
+                    page = max(0, page - 1)
+                elif event.key == pygame.K_RIGHT:
+                    page = min(pages - 1, page + 1)
+                elif event.key == pygame.K_TAB and online is not None:
+                    show_online = not show_online
+                    page = 0
+        clock.tick(CONFIG["FPS"])
+
 
 # === Menu Display ===
-def show_menu():
-    """Displays the main menu and returns the selected option."""
-    font_menu = pygame.font.SysFont("Verdana", 28, bold=True)
-    font_options = pygame.font.SysFont("Verdana", 22)
+def show_menu(on_first_frame=None):
+    """Displays the main menu and returns the selected option.
+
+    ``on_first_frame`` is called once, after the first frame is shown.
+    """
+    font_menu = get_font("Verdana", 28, bold=True)
+    font_options = get_font("Verdana", 22)
     selection = 0
     options = ["New Game", "Leaderboard"]
+    if os.path.exists(AUTOSAVE_FILE):
+        options.insert(0, "Continue")
 
     while True:
         window.fill((15, 15, 15))
-        title = font_menu.render("Bitso Tetris", True, (255, 255, 255))
+        title = render_text(font_menu, "Bitso Tetris", (255, 255, 255))
         window.blit(
             title,
             (
@@ -468,17 +521,17 @@ def show_menu():
         )
         for i, text in enumerate(options):
             color = (34, 221, 145) if i == selection else (255, 255, 255)
-            option_render = font_options.render(text, True, color)
-            window.blit(
-                option_render,
-                (
-                    CONFIG["WINDOW_WIDTH"] // 2 - option_render.get_width() // 2,
-                    200 + i * 40
-                )
+            option_render = render_text(font_options, text, color)
+            option_x = (
+                CONFIG["WINDOW_WIDTH"] // 2 - option_render.get_width() // 2
             )
+            window.blit(option_render, (option_x, 200 + i * 40))
         if logo_bitso:
             window.blit(logo_bitso, (CONFIG["WINDOW_WIDTH"] - 70, 10))
         pygame.display.flip()
+        if on_first_frame is not None:
+            on_first_frame()
+            on_first_frame = None
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -490,368 +543,328 @@ def show_menu():
                     selection = (selection + 1) % len(options)
                 elif event.key == pygame.K_RETURN:
                     return options[selection]
+        clock.tick(CONFIG["FPS"])
+
 
 # === Main Game Loop ===
-# Show initial menu before starting the game
-choice = show_menu()
-while choice == "Leaderboard":
-    show_leaderboard()
-    choice = show_menu()
-
-next_piece, next_color = new_piece()
-reset_piece()
-last_fall_time = pygame.time.get_ticks()
-
-while True:
-    for event in pygame.event.get():
-        # Handle pause toggle
-        if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
-            is_paused = not is_paused
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_UP:
-                new_rotation = (current_rotation + 1) % len(current_piece)
-                if valid_position(
-                    current_piece, new_rotation, piece_x, piece_y, board
-                ):
-                    current_rotation = new_rotation
-            elif event.key == pygame.K_DOWN:
-                if valid_position(
-                    current_piece, current_rotation, piece_x, piece_y + 1, board
-                ):
-                    piece_y += 1
-            elif event.key == pygame.K_SPACE:
-                dropped = 0
-                while valid_position(
-                    current_piece, current_rotation, piece_x, piece_y + 1, board
-                ):
-                    piece_y += 1
-                    dropped += 1
-                score += dropped * 2
-                lock_piece_to_board()
-                reset_piece()
-                last_fall_time = pygame.time.get_ticks()
-                if is_game_over(
-                    current_piece, 
-                    current_rotation, 
-                    piece_x, 
-                    piece_y, 
-                    board
-                ):
-                    game_state = "gameover"
-                cleared = clear_and_animate_rows()
-                update_score_and_level(cleared)
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-    # Pause logic
-    if is_paused:
-        paused = True
-        while paused:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_p:
-                        is_paused = False
-                        paused = False
-                    elif event.key == pygame.K_m:
-                        choice = show_menu()
-                        if choice == "Leaderboard":
-                            show_leaderboard()
-                            choice = show_menu()
-                        reset_game_state()
-                        is_paused = False
-                        paused = False
+def run(on_first_frame=None):
+    """Shows the menu, then plays games until the window is closed."""
+    global high_score
+    last_left_move_time = 0
+    last_right_move_time = 0
+    last_auto_move_time = 0
+    is_paused = False
+    show_hint = False
+    autoplay = False
+    assisted = False  # Autoplay or undo was used this game
+    hint = None
+
+    # Show initial menu before starting the game
+    choice = show_menu(on_first_frame)
+    while choice == "Leaderboard":
+        show_leaderboard()
+        choice = show_menu()
+
+    resumed = start_game(choice)
+    start_piece_entry()
+    scheduler.resync(pygame.time.get_ticks())
 
-            font_pause = pygame.font.SysFont("Verdana", 40, bold=True)
-            text_pause = font_pause.render("PAUSED", True, (255, 255, 255))
-            window.fill((15, 15, 15))
-            window.blit(
-                text_pause,
-                (
-                    CONFIG["WINDOW_WIDTH"] // 2 - text_pause.get_width() // 2,
-                    CONFIG["WINDOW_HEIGHT"] // 2 - text_pause.get_height() // 2
+    while True:
+        profiler.begin()
+        for event in pygame.event.get():
+            # Handle pause toggle
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                is_paused = not is_paused
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                toggle_profiler_overlay()
+                continue
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                dump_profile()
+                continue
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                start_advisor()
+                show_hint = not show_hint
+                continue
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_a:
+                start_advisor()
+                autoplay = not autoplay
+                assisted = assisted or autoplay
+                continue
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_u:
+                undo_placement()
+                assisted = True
+                continue
+            if event.type == pygame.KEYDOWN:
+                # Any move ends the entry slide so the piece is where it plays
+                timeline.skip("entry")
+                if event.key == pygame.K_UP:
+                    game.step("rotate")
+                elif event.key == pygame.K_DOWN:
+                    game.step("down")
+                elif event.key == pygame.K_SPACE:
+                    handle_step_result(game.step("hard_drop"))
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+        profiler.lap("events")
+
+        # Pause logic
+        if is_paused:
+            autosave(force=True)
+            paused = True
+            while paused:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        pygame.quit()
+                        sys.exit()
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_p:
+                            is_paused = False
+                            paused = False
+                        elif event.key == pygame.K_m:
+                            choice = show_menu()
+                            if choice == "Leaderboard":
+                                show_leaderboard()
+                                choice = show_menu()
+                            resumed = start_game(choice)
+                            assisted = autoplay
+                            is_paused = False
+                            paused = False
+
+                font_pause = get_font("Verdana", 40, bold=True)
+                text_pause = render_text(font_pause, "PAUSED", (255, 255, 255))
+                window.fill((15, 15, 15))
+                window.blit(
+                    text_pause,
+                    (
+                        (CONFIG["WINDOW_WIDTH"] - text_pause.get_width())
+                        // 2,
+                        (CONFIG["WINDOW_HEIGHT"] - text_pause.get_height())
+                        // 2
+                    )
                 )
+                pygame.display.flip()
+                clock.tick(CONFIG["FPS"])
+            renderer.invalidate()
+            scheduler.resync(pygame.time.get_ticks())
+            continue
+
+        # Continuous input handling, once per fixed logic tick
+        keys = pygame.key.get_pressed()
+        profiler.lap("input")
+        for now in scheduler.run(pygame.time.get_ticks()):
+            # Fast drop (down key) replaces the auto fall timer while held
+            handle_step_result(
+                game.update(fast_drop=keys[pygame.K_DOWN], now=now)
             )
-            pygame.display.flip()
-            clock.tick(CONFIG["FPS"])
-        continue
+            profiler.lap("logic")
 
-    # Continuous input handling
-    now = pygame.time.get_ticks()
-    keys = pygame.key.get_pressed()
-    # Only allow automatic fall if not holding down key for fast drop
-    if not keys[pygame.K_DOWN] and now - last_fall_time > fall_delay:
-        if valid_position(
-            current_piece, current_rotation, piece_x, piece_y + 1, board
-        ):
-            piece_y += 1
-        else:
-            lock_piece_to_board()
-            reset_piece()
-            if is_game_over(
-                    current_piece, 
-                    current_rotation, 
-                    piece_x, 
-                    piece_y, 
-                    board
-                ):
-                game_state = "gameover"
-            cleared = clear_and_animate_rows()
-            update_score_and_level(cleared)
-        last_fall_time = now
-
-    # Fast drop (down key): does not interfere with auto fall timer
-    if keys[pygame.K_DOWN] and now - last_fall_time > CONFIG["FAST_DROP_SPEED"]:
-        if valid_position(
-            current_piece, current_rotation, piece_x, piece_y + 1, board
-        ):
-            piece_y += 1
-            last_fall_time = now
-        else:
-            lock_piece_to_board()
-            reset_piece()
-            last_fall_time = now
-            if is_game_over(
-                current_piece, current_rotation, piece_x, piece_y, board
+            if (
+                keys[pygame.K_LEFT]
+                and now - last_left_move_time > CONFIG["LATERAL_SPEED"]
             ):
-                game_state = "gameover"
-            cleared = clear_and_animate_rows()
-            update_score_and_level(cleared)
-
-    if (
-        keys[pygame.K_LEFT]
-        and now - last_left_move_time > CONFIG["LATERAL_SPEED"]
-    ):
-        if valid_position(
-            current_piece, current_rotation, piece_x - 1, piece_y, board
-        ):
-            piece_x -= 1
-            last_left_move_time = now
-    if (
-        keys[pygame.K_RIGHT]
-        and now - last_right_move_time > CONFIG["LATERAL_SPEED"]
-    ):
-        if valid_position(
-            current_piece, current_rotation, piece_x + 1, piece_y, board
-        ):
-            piece_x += 1
-            last_right_move_time = now
-
-    if game_state == "gameover":
-        # Prompt for the player's name after game over
-        name = ""
-        entering_name = True
-        font_info = pygame.font.SysFont("Arial", 20)
-        font_name = pygame.font.SysFont("Arial", 22)
-        while entering_name:
+                old_x = game.piece_x
+                game.step("left")
+                if game.piece_x != old_x:
+                    last_left_move_time = now
+            if (
+                keys[pygame.K_RIGHT]
+                and now - last_right_move_time > CONFIG["LATERAL_SPEED"]
+            ):
+                old_x = game.piece_x
+                game.step("right")
+                if game.piece_x != old_x:
+                    last_right_move_time = now
+            if (
+                autoplay
+                and now - last_auto_move_time > CONFIG["AUTOPLAY_SPEED"]
+            ):
+                advisor.request(game)
+                target = advisor.best()
+                if target is not None:
+                    handle_step_result(autoplay_step(target))
+                    last_auto_move_time = now
+            profiler.lap("input")
+        if show_hint or autoplay:
+            # Never waits: the search runs in the advisor's process
+            advisor.request(game)
+            hint = advisor.best() if show_hint else None
+        else:
+            hint = None
+        track_placement()
+        if broadcaster is not None:
+            # Only sends when the board or piece changed this frame
+            broadcaster.publish(game)
+        profiler.lap("sync")
+
+        if game.game_over:
+            # Prompt for the player's name after game over
+            name = ""
+            entering_name = True
+            font_info = get_font("Arial", 20)
+            font_name = get_font("Arial", 22)
+            while entering_name:
+                window.fill((0, 0, 0))
+                prompt = render_text(
+                    font_info, "Enter your name:", (255, 255, 255)
+                )
+                entry = render_text(font_name, name + "_", (255, 255, 255))
+                window.blit(
+                    prompt,
+                    (
+                        CONFIG["WINDOW_WIDTH"] // 2 - 100,
+                        CONFIG["WINDOW_HEIGHT"] // 2 - 40
+                    )
+                )
+                window.blit(
+                    entry,
+                    (
+                        CONFIG["WINDOW_WIDTH"] // 2 - 100,
+                        CONFIG["WINDOW_HEIGHT"] // 2
+                    )
+                )
+                pygame.display.flip()
+                for event_name in pygame.event.get():
+                    if event_name.type == pygame.QUIT:
+                        pygame.quit()
+                        sys.exit()
+                    elif event_name.type == pygame.KEYDOWN:
+                        if event_name.key == pygame.K_RETURN and name.strip():
+                            entering_name = False
+                        elif event_name.key == pygame.K_BACKSPACE:
+                            name = name[:-1]
+                        elif (
+                            event_name.unicode.isprintable()
+                            and len(name) < 12
+                        ):
+                            name += event_name.unicode
+                clock.tick(CONFIG["FPS"])
+            remove_autosave()
+            # Autoplayed or undone games stay off the leaderboards
+            if game.score > 0 and not assisted:
+                try:
+                    scores.add(name, game.score)
+                except sqlite3.Error:
+                    pass
+                else:
+                    # The HUD's best only counts scores on the leaderboard
+                    high_score = max(high_score, game.score)
+                if online is not None:
+                    online.submit(name, game.score)
+            try:
+                # A resumed game's recording starts mid-game; skip it
+                if not resumed:
+                    recorder.save(replay_path(game.score))
+            except OSError:
+                pass
+            # Show GAME OVER message and options
+            font_gameover = get_font("Verdana", 30, bold=True)
+            text_gameover = render_text(
+                font_gameover, "GAME OVER", (255, 0, 0)
+            )
+            font_info = get_font("Verdana", 20)
+            text_r = render_text(
+                font_info, "Press R to restart", (255, 255, 255)
+            )
+            text_esc = render_text(
+                font_info, "Press ESC to quit", (255, 255, 255)
+            )
+            text_m = render_text(
+                font_info, "Press M for menu", (255, 255, 255)
+            )
             window.fill((0, 0, 0))
-            prompt = font_info.render("Enter your name:", True, (255, 255, 255))
-            entry = font_name.render(name + "_", True, (255, 255, 255))
             window.blit(
-                prompt,
+                text_gameover,
                 (
-                    CONFIG["WINDOW_WIDTH"] // 2 - 100,
+                    (CONFIG["WINDOW_WIDTH"] - text_gameover.get_width())
+                    // 2,
                     CONFIG["WINDOW_HEIGHT"] // 2 - 40
                 )
             )
             window.blit(
-                entry,
+                text_r,
                 (
-                    CONFIG["WINDOW_WIDTH"] // 2 - 100,
-                    CONFIG["WINDOW_HEIGHT"] // 2
+                    CONFIG["WINDOW_WIDTH"] // 2 - text_r.get_width() // 2,
+                    CONFIG["WINDOW_HEIGHT"] // 2 + 10
                 )
             )
-            pygame.display.flip()
-            for event_name in pygame.event.get():
-                if event_name.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event_name.type == pygame.KEYDOWN:
-                    if event_name.key == pygame.K_RETURN and name.strip():
-                        entering_name = False
-                    elif event_name.key == pygame.K_BACKSPACE:
-                        name = name[:-1]
-                    elif event_name.unicode.isprintable() and len(name) < 12:
-                        name += event_name.unicode
-        if score > 0:
-            try:
-                with open("leaderboard.txt", "a") as f:
-                    f.write(f"{name},{score}\n")
-                with open("leaderboard.txt", "r") as f:
-                    all_scores = [line.strip().split(",") for line in f if line.strip()]
-                all_scores = sorted(
-                    [s for s in all_scores if len(s) == 2 and s[1].isdigit()],
-                    key=lambda x: int(x[1]),
-                    reverse=True
-                )[:10]
-                with open("leaderboard.txt", "w") as f:
-                    f.writelines(f"{s[0]},{s[1]}\n" for s in all_scores)
-            except (IOError, OSError):
-                pass
-        if score > high_score:
-            with open(RECORD_FILE, "w") as file:
-                file.write(str(score))
-            high_score = score
-        # Show GAME OVER message and options
-        font_gameover = pygame.font.SysFont("Verdana", 30, bold=True)
-        text_gameover = font_gameover.render("GAME OVER", True, (255, 0, 0))
-        font_info = pygame.font.SysFont("Verdana", 20)
-        text_r = font_info.render(
-            "Press R to restart", True, (255, 255, 255)
-        )
-        text_esc = font_info.render(
-            "Press ESC to quit", True, (255, 255, 255)
-        )
-        text_m = font_info.render(
-            "Press M for menu", True, (255, 255, 255)
-        )
-        window.fill((0, 0, 0))
-        window.blit(
-            text_gameover,
-            (
-                CONFIG["WINDOW_WIDTH"] // 2 - text_gameover.get_width() // 2,
-                CONFIG["WINDOW_HEIGHT"] // 2 - 40
-            )
-        )
-        window.blit(
-            text_r,
-            (
-                CONFIG["WINDOW_WIDTH"] // 2 - text_r.get_width() // 2,
-                CONFIG["WINDOW_HEIGHT"] // 2 + 10
-            )
-        )
-        window.blit(
-            text_esc,
-            (
-                CONFIG["WINDOW_WIDTH"] // 2 - text_esc.get_width() // 2,
-                CONFIG["WINDOW_HEIGHT"] // 2 + 40
+            window.blit(
+                text_esc,
+                (
+                    CONFIG["WINDOW_WIDTH"] // 2 - text_esc.get_width() // 2,
+                    CONFIG["WINDOW_HEIGHT"] // 2 + 40
+                )
             )
-        )
-        window.blit(
-            text_m,
-            (
-                CONFIG["WINDOW_WIDTH"] // 2 - text_m.get_width() // 2,
-                CONFIG["WINDOW_HEIGHT"] // 2 + 70
+            window.blit(
+                text_m,
+                (
+                    CONFIG["WINDOW_WIDTH"] // 2 - text_m.get_width() // 2,
+                    CONFIG["WINDOW_HEIGHT"] // 2 + 70
+                )
             )
-        )
-        pygame.display.flip()
-        waiting_for_option = True
-        while waiting_for_option:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
+            pygame.display.flip()
+            waiting_for_option = True
+            while waiting_for_option:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
                         pygame.quit()
                         sys.exit()
-                    elif event.key == pygame.K_r:
-                        reset_game_state()
-                        waiting_for_option = False
-                    elif event.key == pygame.K_m:
-                        choice = show_menu()
-                        if choice == "Leaderboard":
-                            show_leaderboard()
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE:
+                            pygame.quit()
+                            sys.exit()
+                        elif event.key == pygame.K_r:
+                            resumed = start_game("New Game")
+                            waiting_for_option = False
+                        elif event.key == pygame.K_m:
                             choice = show_menu()
-                        reset_game_state()
-                        waiting_for_option = False
-        continue
-
-    window.fill((15, 15, 15))  # Bitso-style dark background
-    # Title
-    font_title = pygame.font.SysFont("Verdana", 30, bold=True)
-    title = font_title.render("Bitso Tetris", True, (255, 255, 255))
-    text_width = title.get_width()
-    board_width = CONFIG["COLUMNS"] * CONFIG["CELL_SIZE"]
-    window.blit(
-        title,
-        ((board_width - text_width) // 2, 5)
-    )
-    font_author = pygame.font.SysFont("Verdana", 12, italic=True)
-    author = font_author.render("@julian_colombo", True, (150, 150, 150))
-    window.blit(
-        author,
-        (
-            CONFIG["WINDOW_WIDTH"] - author.get_width() - 10,
-            CONFIG["WINDOW_HEIGHT"] - 20
-        )
-    )
-    draw_board()
-    draw_ghost_piece()
-    draw_piece(current_piece, current_rotation, piece_x, piece_y, current_color)
-    # Display score and level
-    font = pygame.font.SysFont("Verdana", 20)
-    font_bold = pygame.font.SysFont("Verdana", 20, bold=True)
-    current_time = pygame.time.get_ticks()
-    seconds_played = (current_time - start_time) // 1000
-    minutes = seconds_played // 60
-    seconds = seconds_played % 60
-    text_score = font_bold.render("Score:", True, (255, 255, 255))
-    value_score = font.render(str(score), True, (255, 255, 255))
-    text_level = font_bold.render("Level:", True, (255, 255, 255))
-    value_level = font.render(str(level), True, (255, 255, 255))
-    text_high_score = font_bold.render("High Score:", True, (255, 255, 255))
-    value_high_score = font.render(str(high_score), True, (255, 255, 255))
-    text_time = font_bold.render("Time:", True, (255, 255, 255))
-    value_time = font.render(
-        f"{minutes:02}:{seconds:02}",
-        True,
-        (255, 255, 255)
+                            if choice == "Leaderboard":
+                                show_leaderboard()
+                                choice = show_menu()
+                            resumed = start_game(choice)
+                            waiting_for_option = False
+                clock.tick(CONFIG["FPS"])
+            assisted = autoplay
+            renderer.invalidate()
+            scheduler.resync(pygame.time.get_ticks())
+            continue
+
+        draw_playfield(hint)
+        draw_hud()
+        profiler.lap("hud")
+        profiler_overlay.draw(window, renderer)
+        profiler.lap("overlay")
+        renderer.present()
+        profiler.lap("present")
+        # Sleeps until the next frame is due, capping the frame rate
+        clock.tick(CONFIG["FPS"])
+        profiler.lap("wait")
+        profiler.end()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bitso Tetris")
+    parser.add_argument(
+        "--startup-report", action="store_true",
+        help="print how long each startup stage took"
     )
-    x_info = PANEL_X
-    y_info = 120
-    line_spacing = 30
-    window.blit(text_score, (x_info, y_info))
-    window.blit(value_score, (x_info + 140, y_info))
-    y_info += line_spacing
-    window.blit(text_level, (x_info, y_info))
-    window.blit(value_level, (x_info + 140, y_info))
-    y_info += line_spacing
-    window.blit(text_high_score, (x_info, y_info))
-    window.blit(value_high_score, (x_info + 140, y_info))
-    y_info += line_spacing
-    window.blit(text_time, (x_info, y_info))
-    window.blit(value_time, (x_info + 140, y_info))
-
-    # Display total lines cleared
-    text_lines = font_bold.render("Lines:", True, (255, 255, 255))
-    value_lines = font.render(str(total_lines), True, (255, 255, 255))
-    y_info += line_spacing
-    window.blit(text_lines, (x_info, y_info))
-    window.blit(value_lines, (x_info + 140, y_info))
-    
-    # Display next piece
-    font_next = pygame.font.SysFont("Verdana", 20, bold=True)
-    text_next = font_next.render(
-        "Next:",
-        True,
-        (255, 255, 255)
+    parser.add_argument(
+        "--giant", action="store_true",
+        help="play on a GIANT_ROWS x GIANT_COLUMNS board (see config.py)"
     )
-    window.blit(text_next, (x_info, y_info + line_spacing))
-    next_shape = next_piece[0]
-    for i, row in enumerate(next_shape):
-        for j, cell in enumerate(row):
-            if cell == 1:
-                x = x_info + j * CONFIG["CELL_SIZE"]
-                y = y_info + line_spacing + 30 + i * CONFIG["CELL_SIZE"]
-                pygame.draw.rect(
-                    window,
-                    next_color,
-                    (x, y, CONFIG["CELL_SIZE"], CONFIG["CELL_SIZE"])
-                )
-                pygame.draw.rect(
-                    window,
-                    (80, 80, 80),
-                    (x, y, CONFIG["CELL_SIZE"], CONFIG["CELL_SIZE"]),
-                    1
-                )
-    if logo_bitso:
-        window.blit(
-            logo_bitso,
-            (CONFIG["WINDOW_WIDTH"] - 70, 10)
-        )
-    pygame.display.flip()
-    clock.tick(CONFIG["FPS"])
\ No newline at end of file
+    args = parser.parse_args(argv)
+    if args.giant:
+        use_giant_board(CONFIG["GIANT_ROWS"], CONFIG["GIANT_COLUMNS"])
+    started = time.perf_counter()
+    init(started)
+
+    def on_first_frame():
+        startup_mark("first frame", started)
+        warm_up(started)
+        report_startup(args.startup_report)
+
+    run(on_first_frame)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Bitso Tetris - anytime move advisor for hints and autoplay.
+
+Searches with iterative deepening. Depth 1 places the current piece,
+depth 2 adds ``next_piece``, and each further depth averages over all
+seven pieces that could come after. Leaves are scored with the bot's
+weighted board features. Every completed depth reports its best move,
+so an answer is ready within a millisecond or two and improves while
+there is time left.
+
+Boards are Zobrist-hashed over their occupied cells; locking a piece
+without clearing rows updates the key with a few XORs. Searched
+(board, piece, depth) values go into a bounded LRU transposition cache,
+so positions reached by different move orders are searched once.
+
+The search runs in a worker process so it never competes with the
+pygame loop for the interpreter lock. The game posts positions with
+``request()`` and polls ``best()`` once a frame; neither call waits.
+"""
+
+import multiprocessing
+import random
+from collections import OrderedDict
+
+from bot import WEIGHTS, board_value, locked_rows
+from pieces import compile_pieces, PIECES
+from placements import Placement, row_placements
+
+
+CACHE_SIZE = 65536
+MAX_DEPTH = 3
+LOSS = -1e9  # Value of a position where the piece cannot spawn
+
+
+class SearchStopped(Exception):
+    """Raised inside a search when a newer position is waiting."""
+
+
+# === Zobrist Hashing ===
+class Zobrist:
+    """Random 64-bit keys per cell; a board's key XORs its filled cells.
+
+    Row keys are built on first use and kept per row, so hashing a board
+    is one dictionary lookup per non-empty row.
+    """
+
+    def __init__(self, height, width, seed=0x7E7215):
+        rng = random.Random(seed)
+        self.cells = [
+            [rng.getrandbits(64) for _ in range(width)]
+            for _ in range(height)
+        ]
+        self.rows = [{0: 0} for _ in range(height)]
+
+    def row_key(self, row, mask):
+        """Returns the XOR of the keys of the cells set in a row mask."""
+        known = self.rows[row]
+        key = known.get(mask)
+        if key is None:
+            key = 0
+            cells = self.cells[row]
+            bits = mask
+            while bits:
+                bit = bits & -bits
+                key ^= cells[bit.bit_length() - 1]
+                bits ^= bit
+            known[mask] = key
+        return key
+
+    def board_key(self, rows):
+        key = 0
+        for row, mask in enumerate(rows):
+            if mask:
+                key ^= self.row_key(row, mask)
+        return key
+
+    def piece_key(self, masks, y):
+        """Returns the key change for adding piece row masks from row y."""
+        key = 0
+        for i, mask in enumerate(masks):
+            key ^= self.row_key(y + i, mask)
+        return key
+
+
+# === Search ===
+class Searcher:
+    """Iterative-deepening search with a transposition cache."""
+
+    def __init__(self, height, width, weights=WEIGHTS,
+                 cache_size=CACHE_SIZE, should_stop=None):
+        self.width = width
+        self.full_mask = (1 << width) - 1
+        self.weights = weights
+        self.zobrist = Zobrist(height, width)
+        self.geometry = compile_pieces(width)
+        self.cache = OrderedDict()  # (key, piece, depth) -> value
+        self.cache_size = cache_size
+        self.should_stop = should_stop
+        self.hits = 0
+        self.misses = 0
+
+    def lock(self, rows, key, piece, placement):
+        """Returns (rows, cleared lines, key) after locking a placement."""
+        geometry = self.geometry[piece][placement.rotation]
+        masks = geometry.masks[placement.x]
+        y = placement.y + geometry.top
+        child, lines = locked_rows(list(rows), self.full_mask, masks, y)
+        child = tuple(child)
+        if lines:
+            return child, lines, self.zobrist.board_key(child)
+        return child, lines, key ^ self.zobrist.piece_key(masks, y)
+
+    def value(self, rows, key, piece, depth):
+        """Returns the best value of placing ``piece`` and searching on."""
+        cache_key = (key, piece, depth)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.cache.move_to_end(cache_key)
+            self.hits += 1
+            return cached
+        if self.should_stop is not None and self.should_stop():
+            raise SearchStopped
+        self.misses += 1
+        best = LOSS
+        for placement in row_placements(rows, self.width, piece):
+            best = max(best, self.child_value(
+                rows, key, piece, placement, depth
+            ))
+        self.cache[cache_key] = best
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return best
+
+    def child_value(self, rows, key, piece, placement, depth, after=None):
+        """Returns the value of one placement searched ``depth`` deep.
+
+        ``after`` is the piece known to come next, if any; deeper pieces
+        are unknown and averaged over.
+        """
+        child, lines, child_key = self.lock(rows, key, piece, placement)
+        value = self.weights["lines"] * lines
+        if depth == 1:
+            return value + board_value(child, self.width, self.weights)
+        if after is not None:
+            return value + self.value(child, child_key, after, depth - 1)
+        return value + sum(
+            self.value(child, child_key, other, depth - 1)
+            for other in range(len(PIECES))
+        ) / len(PIECES)
+
+    def search(self, rows, piece, rotation, x, y, next_piece,
+               max_depth=MAX_DEPTH):
+        """Yields (depth, Placement, value) as each depth completes.
+
+        Each depth tries moves in the order the previous depth ranked
+        them. Raises SearchStopped if ``should_stop`` turns true.
+        """
+        rows = tuple(rows)
+        key = self.zobrist.board_key(rows)
+        moves = list(row_placements(rows, self.width, piece, rotation, x, y))
+        if not moves:
+            return
+        for depth in range(1, max_depth + 1):
+            values = {
+                move: self.child_value(
+                    rows, key, piece, move, depth, next_piece
+                )
+                for move in moves
+            }
+            moves.sort(key=values.get, reverse=True)
+            yield depth, moves[0], values[moves[0]]
+
+
+# === Worker Process ===
+def worker(conn, weights, max_depth, cache_size):
+    """Searches the newest posted position and sends each result.
+
+    Messages in are (job, rows, width, piece, rotation, x, y, next
+    piece), or None to exit. Messages out are (job, depth, rotation, x,
+    y, value).
+    """
+    searchers = {}
+    message = conn.recv()
+    while message is not None:
+        job, rows, width, piece, rotation, x, y, next_piece = message
+        size = (len(rows), width)
+        if size not in searchers:
+            searchers[size] = Searcher(
+                *size, weights, cache_size, should_stop=conn.poll
+            )
+        try:
+            for depth, move, value in searchers[size].search(
+                rows, piece, rotation, x, y, next_piece, max_depth
+            ):
+                conn.send((job, depth, move.rotation, move.x, move.y, value))
+        except SearchStopped:
+            pass
+        message = conn.recv()
+
+
+class Advisor:
+    """Front-end handle on a search worker process."""
+
+    def __init__(self, weights=WEIGHTS, max_depth=MAX_DEPTH,
+                 cache_size=CACHE_SIZE):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=worker, args=(child, weights, max_depth, cache_size),
+            daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.job = 0
+        self.position = None
+        self.move = None
+        self.depth = 0
+
+    def request(self, game):
+        """Starts a search of the game's position if it is a new one."""
+        board = game.board
+        position = (
+            game.pieces_placed, game.current_piece, game.next_piece,
+            tuple(board.rows)
+        )
+        if position == self.position or game.game_over:
+            return
+        self.position = position
+        self.job += 1
+        self.move = None
+        self.depth = 0
+        self.conn.send((
+            self.job, position[3], board.width, game.current_piece,
+            game.current_rotation, game.piece_x, game.piece_y,
+            game.next_piece
+        ))
+
+    def best(self):
+        """Returns the best Placement found so far, or None (no path)."""
+        while self.conn.poll():
+            job, depth, rotation, x, y, _ = self.conn.recv()
+            if job == self.job:
+                self.move = Placement(rotation, x, y, ())
+                self.depth = depth
+        return self.move
+
+    def close(self, timeout=1.0):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
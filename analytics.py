@@ -0,0 +1,277 @@
+"""
+Bitso Tetris - replay archive analytics.
+
+Streams a replay archive through a generator pipeline: find_replays()
+walks the folders lazily, a process pool re-simulates each file from a
+read-only memory map, and Totals folds the small per-game records into
+aggregate metrics as they arrive. Only a bounded number of files is in
+flight at once, so memory stays flat however large the archive is.
+
+Usage:
+    python analytics.py replays/
+    python analytics.py archive/ --workers 8 --games games.jsonl
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from bot import board_features
+from config import CONFIG
+from engine import calculate_score, GameState
+from replay import END, iter_records, KEYFRAME, read_header
+
+
+HOLE_SECONDS = 10  # Hole counts are sampled this often in game time
+CLEAR_NAMES = ("single", "double", "triple", "tetris")
+
+
+# === Per-Game Metrics ===
+def find_replays(paths):
+    """Yields every .rpl file under the given files and folders."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".rpl"):
+                    yield os.path.join(root, name)
+
+
+def game_metrics(data, hole_seconds=HOLE_SECONDS):
+    """Re-simulates one replay and returns its metrics as a dict."""
+    tick_rate, rows, columns, seed, _, pos = read_header(data)
+    config = dict(CONFIG, ROWS=rows, COLUMNS=columns)
+    tick = 0
+    game = GameState(
+        config, clock=lambda: tick * 1000 // tick_rate, seed=seed
+    )
+    sample_ticks = hole_seconds * tick_rate
+    next_sample = 0
+    inputs = 0
+    clears = [0] * len(CLEAR_NAMES)
+    level_seconds = []  # Game time at which levels 2, 3 ... were reached
+    holes = []  # Holes at the first lock of each sample interval
+    final = None
+    for tick, code, payload in iter_records(data, pos, rows, columns):
+        if code == KEYFRAME:
+            continue
+        if code == END:
+            final = payload
+            break
+        if payload != "gravity":
+            inputs += 1
+        level = game.level
+        result = game.step(payload)
+        if not result.locked:
+            continue
+        cleared = len(result.cleared_rows)
+        if cleared:
+            clears[min(cleared, len(clears)) - 1] += 1
+        if game.level > level:
+            level_seconds.append(round(tick / tick_rate, 2))
+        if tick >= next_sample:
+            count = board_features(game.board.rows, columns)[1]
+            while tick >= next_sample:
+                holes.append(count)
+                next_sample += sample_ticks
+    seconds = tick / tick_rate
+    pieces = game.pieces_placed
+    return {
+        "seed": seed,
+        "score": game.score,
+        "lines": game.total_lines,
+        "level": game.level,
+        "pieces": pieces,
+        "seconds": round(seconds, 2),
+        "pieces_per_second": pieces / seconds if seconds else 0.0,
+        "inputs_per_piece": inputs / pieces if pieces else 0.0,
+        "clears": clears,
+        "level_seconds": level_seconds,
+        "holes": holes,
+        "verified": final == (game.score, game.total_lines, game.game_over),
+    }
+
+
+def analyze(path, hole_seconds=HOLE_SECONDS):
+    """Returns the metrics of one replay file, or an error record."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            record = game_metrics(data, hole_seconds)
+    except (OSError, ValueError, IndexError, KeyError) as e:
+        # Empty files fail to map; truncated ones run off the end
+        return {"file": path, "error": str(e) or type(e).__name__}
+    record["file"] = path
+    return record
+
+
+# === Parallel Pipeline ===
+def analyze_all(paths, workers=None, window=None,
+                hole_seconds=HOLE_SECONDS):
+    """Yields analyze() records in completion order.
+
+    At most ``window`` files are queued on the pool at a time, so the
+    path generator is consumed only as fast as results come back.
+    """
+    workers = workers or os.cpu_count()
+    window = window or workers * 4
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        for path in paths:
+            pending.add(pool.submit(analyze, path, hole_seconds))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+class Running:
+    """Running count, mean and standard deviation (Welford)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def stdev(self):
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+class Totals:
+    """Aggregate metrics over any number of per-game records."""
+
+    def __init__(self):
+        self.games = 0
+        self.errors = 0
+        self.unverified = 0
+        self.pieces = 0
+        self.seconds = 0.0
+        self.stats = {
+            stat: Running() for stat in (
+                "score", "lines", "pieces_per_second", "inputs_per_piece"
+            )
+        }
+        self.clears = [0] * len(CLEAR_NAMES)
+        self.level_seconds = []  # Running per level, from level 2
+        self.holes = []  # Running per sample interval
+
+    def add(self, record):
+        if "error" in record:
+            self.errors += 1
+            return
+        self.games += 1
+        self.unverified += not record["verified"]
+        self.pieces += record["pieces"]
+        self.seconds += record["seconds"]
+        for stat, running in self.stats.items():
+            running.add(record[stat])
+        for i, count in enumerate(record["clears"]):
+            self.clears[i] += count
+        for series, values in (
+            (self.level_seconds, record["level_seconds"]),
+            (self.holes, record["holes"]),
+        ):
+            while len(series) < len(values):
+                series.append(Running())
+            for running, value in zip(series, values):
+                running.add(value)
+
+    def report(self, hole_seconds=HOLE_SECONDS):
+        """Returns the summary as printable lines."""
+        lines = [
+            f"{self.games} games, {self.pieces} pieces, "
+            f"{self.seconds / 3600:.1f} hours played"
+        ]
+        if self.errors or self.unverified:
+            lines.append(
+                f"  {self.errors} unreadable, "
+                f"{self.unverified} did not match their recorded result"
+            )
+        for stat, running in self.stats.items():
+            lines.append(
+                f"  {stat:<19}{running.mean:10.2f} "
+                f"(sd {running.stdev:.2f})"
+            )
+        total = sum(self.clears) or 1
+        lines.append("Line clears:")
+        for rows, (name, count) in enumerate(
+            zip(CLEAR_NAMES, self.clears), 1
+        ):
+            lines.append(
+                f"  {name:<8}{count:8} {count / total:6.1%} "
+                f"{count * calculate_score(rows):10} points"
+            )
+        lines.append("Time to level (s):")
+        for level, running in enumerate(self.level_seconds, 2):
+            lines.append(
+                f"  {level:<4}{running.mean:8.1f} "
+                f"({running.count} games)"
+            )
+        lines.append("Holes over time:")
+        for i, running in enumerate(self.holes):
+            lines.append(
+                f"  {i * hole_seconds:>5}s{running.mean:7.2f} "
+                f"({running.count} games)"
+            )
+        return lines
+
+
+# === Command Line ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "paths", nargs="*", default=["replays"],
+        help="replay files or folders (default: replays)"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--games", help="also write one JSON line per game to this file"
+    )
+    parser.add_argument(
+        "--hole-seconds", type=int, default=HOLE_SECONDS,
+        help="game time between hole samples"
+    )
+    args = parser.parse_args(argv)
+    totals = Totals()
+    out = open(args.games, "w") if args.games else None
+    try:
+        for record in analyze_all(
+            find_replays(args.paths), args.workers,
+            hole_seconds=args.hole_seconds
+        ):
+            totals.add(record)
+            if out is not None:
+                out.write(json.dumps(record) + "\n")
+            if "error" in record:
+                print(f"{record['file']}: {record['error']}")
+    except KeyboardInterrupt:
+        print("Interrupted; summary so far:")
+    finally:
+        if out is not None:
+            out.close()
+    print("\n".join(totals.report(args.hole_seconds)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,63 @@
+"""
+Bitso Tetris - non-blocking animation timeline.
+
+Effects are time-based overlays. Instead of blocking the loop with
+pygame.time.delay() while an effect plays, the front-end starts it on a
+Timeline and asks each frame how far along it is.
+"""
+
+
+class Effect:
+    """A named effect running from ``start`` for ``duration`` ms."""
+
+    __slots__ = ("start", "duration", "data")
+
+    def __init__(self, start, duration, data=None):
+        self.start = start
+        self.duration = duration
+        self.data = data
+
+    def progress(self, now):
+        """Returns how far along the effect is, from 0.0 to 1.0."""
+        return min(1.0, max(0.0, (now - self.start) / self.duration))
+
+
+class Timeline:
+    """Running effects keyed by name; starting one replaces the old one."""
+
+    def __init__(self):
+        self.effects = {}
+
+    def start(self, name, now, duration, data=None):
+        """Starts an effect, or skips it if its duration is not positive."""
+        if duration <= 0:
+            self.effects.pop(name, None)
+            return
+        self.effects[name] = Effect(now, duration, data)
+
+    def get(self, name, now):
+        """Returns the running effect with this name, or None."""
+        effect = self.effects.get(name)
+        if effect is not None and now - effect.start >= effect.duration:
+            del self.effects[name]
+            return None
+        return effect
+
+    def progress(self, name, now):
+        """Returns the progress of a running effect, or None."""
+        effect = self.get(name, now)
+        return None if effect is None else effect.progress(now)
+
+    def skip(self, name=None):
+        """Ends one effect right away, or all of them if no name is given."""
+        if name is None:
+            self.effects.clear()
+        else:
+            self.effects.pop(name, None)
+
+
+def scaled_duration(duration, level, last_level):
+    """Shortens an effect linearly with level, down to 0 at last_level."""
+    if level >= last_level:
+        return 0
+    return duration * (last_level - level) // (last_level - 1)
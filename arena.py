@@ -0,0 +1,531 @@
+"""
+Bitso Tetris - arena server for many headless games in one process.
+
+Every session is a GameState on the arena's shared FixedStep clock, so
+gravity, fast drop and lateral repeat follow the same rules and timers
+as Tetris.py. One event loop advances all of them, one logic tick at a
+time, and a tick only visits the sessions that have work:
+
+- sessions with queued inputs (at most MAX_INPUTS_PER_TICK each),
+- sessions whose gravity falls due on this tick. Each session sits in
+  a tick wheel under the tick its piece next falls, so every session
+  due on the same tick is handled in one batch,
+- sessions holding left or right, for the lateral repeat.
+
+Sessions with no input for ARENA_IDLE_SECONDS, or that have been over
+for GAME_OVER_SECONDS, are evicted on the same wheel principle.
+
+Wire format (TCP): the client sends ``JOIN [seed]`` and gets ``OK <id>
+<seed>`` (or ``FULL``). Then each line is an action: ``left``,
+``right``, ``rotate``, ``down``, ``hard_drop``, or ``+left``/``-left``,
+``+right``/``-right``, ``+down``/``-down`` to hold or release a key.
+The server answers with spectate.py frames, at most one per tick and
+only when the game changed; a client that is not reading skips frames.
+
+Usage:
+    python arena.py serve --port 8767 --stats 5
+    python arena.py load --sessions 10000 --seconds 30
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+import tracemalloc
+
+from config import CONFIG
+from engine import GameState
+from spectate import encode_frame
+from timing import FixedStep
+
+
+MAX_INPUTS_PER_TICK = 4
+MAX_QUEUED_INPUTS = 32
+GAME_OVER_SECONDS = 5
+HIGH_WATER = 8 * 1024  # Bytes a client may have unread before skipping
+ACTIONS = ("left", "right", "rotate", "down", "hard_drop")
+# Bits of Session.held for the keys a client can hold down
+HOLDS = {"left": 1, "right": 2, "down": 4}
+LATERAL = HOLDS["left"] | HOLDS["right"]
+
+
+def wall_ms():
+    return int(time.perf_counter() * 1000)
+
+
+# === Sessions ===
+class Session:
+    """One game in the arena, with its inputs and wheel positions.
+
+    ``client`` has ``send(frame)``, returning False if the frame had to
+    be skipped, and ``close()``; it is None for a headless session.
+    """
+
+    __slots__ = (
+        "id", "game", "client", "inputs", "held", "last_left",
+        "last_right", "fall_tick", "expire_tick", "last_input_tick",
+        "closed",
+    )
+
+    def __init__(self, session_id, game, client, tick):
+        self.id = session_id
+        self.game = game
+        self.client = client
+        self.inputs = []
+        self.held = 0  # HOLDS bits of the keys held down
+        self.last_left = 0
+        self.last_right = 0
+        self.fall_tick = None
+        self.expire_tick = None
+        self.last_input_tick = tick
+        self.closed = False
+
+    @property
+    def fast_drop(self):
+        return self.held & HOLDS["down"] != 0
+
+
+class TickStats:
+    """Counters for the ticks since the last report."""
+
+    FIELDS = (
+        "ticks", "inputs", "dropped_inputs", "gravity", "locks",
+        "frames", "skipped_frames", "evicted", "overruns",
+    )
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.busy_ms = 0.0
+        self.max_ms = 0.0
+
+    def line(self, sessions, seconds):
+        """Returns a one-line report of the counters over ``seconds``."""
+        ticks = self.ticks or 1
+        return (
+            f"{sessions} sessions, {self.ticks / seconds:.0f} ticks/s, "
+            f"tick {self.busy_ms / ticks:.2f} ms avg "
+            f"{self.max_ms:.2f} ms max, {self.overruns} overruns; per tick: "
+            f"{self.inputs / ticks:.0f} inputs, "
+            f"{self.gravity / ticks:.0f} falls, {self.locks / ticks:.1f} "
+            f"locks, {self.frames / ticks:.0f} frames "
+            f"({self.skipped_frames} skipped, "
+            f"{self.dropped_inputs} inputs dropped), "
+            f"{self.evicted} evicted"
+        )
+
+
+# === Arena ===
+class Arena:
+    """Runs every session on one shared tick."""
+
+    def __init__(self, max_sessions=None, idle_seconds=None,
+                 tick_rate=None):
+        tick_rate = tick_rate or CONFIG["TICK_RATE"]
+        self.scheduler = FixedStep(tick_rate)
+        self.max_sessions = max_sessions or CONFIG["ARENA_MAX_SESSIONS"]
+        if idle_seconds is None:
+            idle_seconds = CONFIG["ARENA_IDLE_SECONDS"]
+        self.idle_ticks = int(idle_seconds * tick_rate)
+        self.over_ticks = GAME_OVER_SECONDS * tick_rate
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.pending = set()  # Sessions with queued inputs
+        self.holding = set()  # Sessions holding left or right
+        self.dirty = set()  # Sessions with a frame to send
+        self.falls = {}  # tick -> sessions whose gravity is due then
+        self.expiries = {}  # tick -> sessions to check for eviction
+        self.stats = TickStats()
+        self.on_evict = None  # Called with each evicted Session
+        self.server = None
+
+    @property
+    def tick(self):
+        return self.scheduler.ticks
+
+    def open(self, seed=None, client=None):
+        """Starts a new session, or returns None if the arena is full."""
+        if len(self.sessions) >= self.max_sessions:
+            return None
+        game = GameState(clock=self.scheduler.time, seed=seed)
+        session = Session(next(self.ids), game, client, self.tick)
+        self.sessions[session.id] = session
+        self.schedule_fall(session)
+        self.schedule_expiry(session, self.tick + self.idle_ticks)
+        self.dirty.add(session)
+        return session
+
+    def close(self, session):
+        """Removes a session; its wheel entries are skipped when due."""
+        if session.closed:
+            return
+        session.closed = True
+        del self.sessions[session.id]
+        self.pending.discard(session)
+        self.holding.discard(session)
+        self.dirty.discard(session)
+
+    def evict(self, session):
+        """Closes a session and hangs up on its client."""
+        self.close(session)
+        self.stats.evicted += 1
+        if session.client is not None:
+            session.client.close()
+        if self.on_evict is not None:
+            self.on_evict(session)
+
+    def push(self, session, message):
+        """Queues one input line from a client; unknown ones are ignored."""
+        if session.closed:
+            return
+        session.last_input_tick = self.tick
+        if message in ACTIONS:
+            if len(session.inputs) >= MAX_QUEUED_INPUTS:
+                self.stats.dropped_inputs += 1
+                return
+            session.inputs.append(message)
+            self.pending.add(session)
+            return
+        bit = HOLDS.get(message[1:])
+        if bit is None or message[:1] not in ("+", "-"):
+            return
+        if message[0] == "+":
+            session.held |= bit
+        else:
+            session.held &= ~bit
+        if session.held & LATERAL:
+            self.holding.add(session)
+        else:
+            self.holding.discard(session)
+        if bit == HOLDS["down"]:
+            # Fast drop changes the fall delay, and so the due tick
+            self.schedule_fall(session)
+
+    # --- Wheels ---
+    def schedule_expiry(self, session, tick):
+        """Files the session for an eviction check at ``tick``."""
+        session.expire_tick = tick
+        self.expiries.setdefault(tick, []).append(session)
+
+    def schedule_fall(self, session):
+        """Files the session under the tick its piece next falls."""
+        game = session.game
+        if game.game_over:
+            session.fall_tick = None
+            return
+        if session.fast_drop:
+            delay = CONFIG["FAST_DROP_SPEED"]
+        else:
+            delay = game.fall_delay
+        # GameState.update() falls once strictly more than delay has passed
+        due = math.ceil((game.last_fall_time + delay + 1)
+                        / self.scheduler.step_ms)
+        tick = max(due, self.tick + 1)
+        if tick != session.fall_tick:
+            session.fall_tick = tick
+            self.falls.setdefault(tick, []).append(session)
+
+    def stepped(self, session, result):
+        """Books the outcome of a step and reschedules what it changed."""
+        self.dirty.add(session)
+        if session.held & LATERAL:
+            self.holding.add(session)  # Its held move may be free now
+        if result.locked:
+            self.stats.locks += 1
+            self.schedule_fall(session)
+            if session.game.game_over:
+                self.schedule_expiry(session, self.tick + self.over_ticks)
+
+    # --- Tick ---
+    def run_tick(self, now):
+        """Advances every session with work on the current tick."""
+        started = time.perf_counter()
+        stats = self.stats
+        tick = self.tick
+
+        for session in list(self.pending):
+            game = session.game
+            inputs = session.inputs
+            count = min(len(inputs), MAX_INPUTS_PER_TICK)
+            for action in inputs[:count]:
+                self.stepped(session, game.step(action))
+            del inputs[:count]
+            stats.inputs += count
+            if not inputs:
+                self.pending.discard(session)
+
+        for session in self.falls.pop(tick, ()):
+            if session.closed or session.fall_tick != tick:
+                continue  # Rescheduled since it was filed here
+            session.fall_tick = None
+            game = session.game
+            # A piece spawned earlier this tick has already reset its timer
+            spawned = game.last_fall_time == now
+            result = game.update(fast_drop=session.fast_drop, now=now)
+            if not spawned and game.last_fall_time == now:
+                stats.gravity += 1
+                self.stepped(session, result)
+            if session.fall_tick is None:
+                self.schedule_fall(session)
+
+        for session in list(self.holding):
+            self.repeat_lateral(session, now)
+
+        for session in self.expiries.pop(tick, ()):
+            if session.closed or session.expire_tick != tick:
+                continue
+            idle = tick - session.last_input_tick
+            if session.game.game_over or idle >= self.idle_ticks:
+                self.evict(session)
+            else:
+                self.schedule_expiry(
+                    session, session.last_input_tick + self.idle_ticks
+                )
+
+        self.send_frames()
+        elapsed = (time.perf_counter() - started) * 1000
+        stats.ticks += 1
+        stats.busy_ms += elapsed
+        stats.max_ms = max(stats.max_ms, elapsed)
+        if elapsed > self.scheduler.step_ms:
+            stats.overruns += 1
+
+    def repeat_lateral(self, session, now):
+        """Moves a held left/right piece at LATERAL_SPEED, as Tetris.py.
+
+        A session whose held moves are all blocked leaves the holding
+        set: retrying cannot succeed until its piece moves, and
+        stepped() puts it back when that happens.
+        """
+        game = session.game
+        speed = CONFIG["LATERAL_SPEED"]
+        held = session.held
+        blocked = True
+        if held & HOLDS["left"]:
+            if now - session.last_left > speed:
+                old_x = game.piece_x
+                game.step("left")
+                if game.piece_x != old_x:
+                    session.last_left = now
+                    self.dirty.add(session)
+                    blocked = False
+            else:
+                blocked = False
+        if held & HOLDS["right"]:
+            if now - session.last_right > speed:
+                old_x = game.piece_x
+                game.step("right")
+                if game.piece_x != old_x:
+                    session.last_right = now
+                    self.dirty.add(session)
+                    blocked = False
+            else:
+                blocked = False
+        if blocked:
+            self.holding.discard(session)
+
+    def send_frames(self):
+        """Sends one frame to each changed session that can take it."""
+        stats = self.stats
+        sent = set()
+        for session in self.dirty:
+            if session.client is None:
+                sent.add(session)
+            elif session.client.send(encode_frame(session.game)):
+                stats.frames += 1
+                sent.add(session)
+            else:
+                stats.skipped_frames += 1  # Stays dirty for a later tick
+        self.dirty -= sent
+
+    async def run(self):
+        """Runs ticks in real time until cancelled."""
+        scheduler = self.scheduler
+        scheduler.resync(wall_ms())
+        while True:
+            for now in scheduler.run(wall_ms()):
+                self.run_tick(now)
+            wait = scheduler.step_ms - scheduler.accumulator
+            await asyncio.sleep(max(wait, 0) / 1000)
+
+    def report(self, seconds):
+        """Returns the stats line for the last ``seconds`` and resets."""
+        line = self.stats.line(len(self.sessions), seconds)
+        self.stats = TickStats()
+        return line
+
+    # --- Network ---
+    async def start(self, host="127.0.0.1", port=0):
+        """Starts listening and returns the bound port (0 picks one)."""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        session = None
+        try:
+            line = await reader.readline()
+            command, _, seed = line.decode().strip().partition(" ")
+            if command != "JOIN":
+                return
+            session = self.open(int(seed) if seed else None, Client(writer))
+            if session is None:
+                writer.write(b"FULL\n")
+                return
+            writer.write(f"OK {session.id} {session.game.seed}\n".encode())
+            while not session.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.push(session, line.decode().strip())
+        except (ConnectionError, UnicodeDecodeError, ValueError):
+            pass
+        finally:
+            if session is not None:
+                self.close(session)
+            writer.close()
+
+
+class Client:
+    """A TCP client's end of a session; lagging clients skip frames."""
+
+    def __init__(self, writer, high_water=HIGH_WATER):
+        self.writer = writer
+        self.high_water = high_water
+
+    def send(self, frame):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return True  # Nothing more will be read; drop it
+        if transport.get_write_buffer_size() > self.high_water:
+            return False
+        transport.write(frame)
+        return True
+
+    def close(self):
+        # Also ends the handler's pending readline()
+        self.writer.close()
+
+
+class Sink:
+    """A stand-in client for load tests that counts encoded bytes."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def send(self, frame):
+        self.bytes += len(frame)
+        return True
+
+    def close(self):
+        pass
+
+
+# === Command Line ===
+async def serve(host, port, stats_interval):
+    arena = Arena()
+    port = await arena.start(host, port)
+    print(f"Arena on {host}:{port}, up to {arena.max_sessions} sessions")
+    ticker = asyncio.ensure_future(arena.run())
+    try:
+        while True:
+            await asyncio.sleep(stats_interval or 3600)
+            if stats_interval:
+                print(arena.report(stats_interval))
+    finally:
+        ticker.cancel()
+        await arena.stop()
+
+
+async def load(sessions, seconds, rate, stats_interval, seed):
+    """Fills an arena with random players and reports its tick stats."""
+    arena = Arena(max_sessions=sessions, idle_seconds=seconds + 1)
+    rng = random.Random(seed)
+    sink = Sink()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(sessions):
+        arena.open(rng.getrandbits(32), sink)
+    per_session = (tracemalloc.get_traced_memory()[0] - before) / sessions
+    tracemalloc.stop()
+    print(f"{sessions} sessions, {per_session / 1024:.1f} KiB each")
+    # Keep the arena full: a topped-out player is replaced by a new one
+    arena.on_evict = lambda _: arena.open(rng.getrandbits(32), sink)
+
+    ticker = asyncio.ensure_future(arena.run())
+    # Taps, plus holds of left, right or down released a moment later
+    moves = ACTIONS + ("+left", "+right", "+down")
+    releases = []  # (time, session, message), a heap
+    per_tick = sessions * rate * arena.scheduler.step_ms / 1000
+    started = time.perf_counter()
+    next_report = started + stats_interval
+    try:
+        while time.perf_counter() - started < seconds:
+            now = time.perf_counter()
+            while releases and releases[0][0] <= now:
+                _, _, session, message = heapq.heappop(releases)
+                arena.push(session, message)
+            players = list(arena.sessions.values())
+            count = min(len(players), int(per_tick) + (
+                rng.random() < per_tick % 1
+            ))
+            for session in rng.sample(players, count):
+                move = rng.choice(moves)
+                arena.push(session, move)
+                if move[0] == "+":
+                    heapq.heappush(releases, (
+                        now + rng.uniform(0.1, 0.6), session.id, session,
+                        "-" + move[1:]
+                    ))
+            await asyncio.sleep(arena.scheduler.step_ms / 1000)
+            if time.perf_counter() >= next_report:
+                print(arena.report(stats_interval))
+                next_report += stats_interval
+    finally:
+        ticker.cancel()
+        await asyncio.gather(ticker, return_exceptions=True)
+    print(f"{sink.bytes / seconds / 1e6:.1f} MB/s of frames encoded")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run an arena server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8767)
+    serve_parser.add_argument(
+        "--stats", type=float, default=0,
+        help="print tick stats every this many seconds"
+    )
+    load_parser = commands.add_parser(
+        "load", help="measure an arena full of random players"
+    )
+    load_parser.add_argument("--sessions", type=int, default=10000)
+    load_parser.add_argument("--seconds", type=float, default=30)
+    load_parser.add_argument(
+        "--rate", type=float, default=2.0,
+        help="inputs per player per second"
+    )
+    load_parser.add_argument("--stats", type=float, default=5)
+    load_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args.host, args.port, args.stats))
+        else:
+            asyncio.run(load(
+                args.sessions, args.seconds, args.rate, args.stats, args.seed
+            ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,229 @@
+"""
+Bitso Tetris - vectorized batch environment (requires NumPy).
+
+Steps N games in lockstep for training and evaluating placement
+heuristics. Boards are one (N, ROWS, COLUMNS) boolean array and the
+rules of engine.py (collision, locking, line clears, scoring and
+levels) are applied to the whole batch with array operations.
+
+An action is a placement ``(rotation, x)``: the current piece is turned
+and moved along the top row, then hard-dropped, exactly as if
+GameState's piece were set to that rotation and column and sent
+"hard_drop". Each env draws its pieces from its own seeded
+random.Random, with the same draws as pieces.new_piece, so env ``i``
+sees the same piece sequence as
+``GameState(rng=random.Random(seeds[i]))``.
+
+Those per-env draws, and seeding their generators when an env is
+reset, are the one part that is not vectorized. With
+``fast_stream=True`` pieces come from a counter-based hash of
+(seed, piece number) computed for the whole batch at once. Each env is
+still reproducible from its seed, but no longer matches GameState.
+"""
+
+import random
+
+import numpy as np
+
+from config import CONFIG
+from engine import calculate_score
+from pieces import PIECES, compile_pieces
+
+
+MAX_ROTATIONS = max(len(rotations) for rotations in PIECES)
+
+# Points for 0-4 cleared rows, from engine.calculate_score
+LINE_SCORES = np.array([calculate_score(n) for n in range(5)], np.int64)
+
+PIECE_BITS = len(PIECES).bit_length()
+
+
+def draw_piece(rng):
+    """Returns the same index as new_piece(rng), with less call overhead.
+
+    random.randint(0, n - 1) is rejection sampling over getrandbits of
+    n.bit_length() bits, so repeating that here yields the same stream.
+    """
+    index = rng.getrandbits(PIECE_BITS)
+    while index >= len(PIECES):
+        index = rng.getrandbits(PIECE_BITS)
+    return index
+
+
+def splitmix64(values):
+    """Hashes a uint64 array element-wise (SplitMix64 finalizer)."""
+    z = values + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def compile_tables(columns):
+    """Returns cell and column-range arrays indexed [piece, rotation]."""
+    geometry = compile_pieces(columns)
+    shape = (len(PIECES), MAX_ROTATIONS)
+    cell_rows = np.zeros(shape + (4,), np.int64)
+    cell_cols = np.zeros(shape + (4,), np.int64)
+    min_x = np.zeros(shape, np.int64)
+    max_x = np.zeros(shape, np.int64)
+    rotation_counts = np.array([len(r) for r in geometry], np.int64)
+    for piece, rotations in enumerate(geometry):
+        for rotation in range(MAX_ROTATIONS):
+            compiled = rotations[rotation % len(rotations)]
+            cell_rows[piece, rotation] = [i for i, _ in compiled.cells]
+            cell_cols[piece, rotation] = [j for _, j in compiled.cells]
+            min_x[piece, rotation] = -compiled.left
+            max_x[piece, rotation] = columns - compiled.width
+    return cell_rows, cell_cols, min_x, max_x, rotation_counts
+
+
+class BatchEnv:
+    """N independent games advanced together by placement actions."""
+
+    def __init__(
+        self, n, seeds=None, rows=None, columns=None, fast_stream=False
+    ):
+        self.n = n
+        self.fast_stream = fast_stream
+        self.rows = CONFIG["ROWS"] if rows is None else rows
+        self.columns = CONFIG["COLUMNS"] if columns is None else columns
+        self.spawn_x = (self.columns - 4) // 2
+        (
+            self.cell_rows,
+            self.cell_cols,
+            self.min_x,
+            self.max_x,
+            self.rotation_counts,
+        ) = compile_tables(self.columns)
+        self.seeds = list(range(n)) if seeds is None else list(seeds)
+        self.stream_keys = splitmix64(np.array(self.seeds, np.uint64))
+        self.drawn = np.zeros(n, np.uint64)  # Pieces drawn per env
+        self.boards = np.zeros((n, self.rows, self.columns), bool)
+        # Topmost filled row per column, kept up to date on every lock
+        self.tops = np.full((n, self.columns), self.rows, np.int64)
+        self.current = np.zeros(n, np.int64)
+        self.next = np.zeros(n, np.int64)
+        self.score = np.zeros(n, np.int64)
+        self.lines = np.zeros(n, np.int64)
+        self.level = np.ones(n, np.int64)
+        self.pieces_placed = np.zeros(n, np.int64)
+        self.done = np.zeros(n, bool)
+        self.rngs = [None] * n
+        self.reset()
+
+    def reset(self, indices=None):
+        """Starts new games for the given envs (all by default)."""
+        if indices is None:
+            indices = np.arange(self.n)
+        else:
+            # One entry per env: draw() gives repeated envs the same key
+            indices = np.unique(np.asarray(indices, np.int64))
+        self.boards[indices] = False
+        self.tops[indices] = self.rows
+        self.score[indices] = 0
+        self.lines[indices] = 0
+        self.level[indices] = 1
+        self.pieces_placed[indices] = 0
+        self.done[indices] = False
+        if self.fast_stream:
+            self.drawn[indices] = 0
+            self.current[indices] = self.draw(indices)
+            self.next[indices] = self.draw(indices)
+            return
+        # Only seeding the per-env generators is left to a Python loop
+        pieces = []
+        for i in indices.tolist():
+            rng = random.Random(self.seeds[i])
+            self.rngs[i] = rng
+            pieces.append((draw_piece(rng), draw_piece(rng)))
+        self.current[indices], self.next[indices] = np.array(
+            pieces, np.int64
+        ).reshape(-1, 2).T
+
+    def draw(self, indices):
+        """Returns the next piece of each listed env's stream."""
+        if not self.fast_stream:
+            rngs = self.rngs
+            return [draw_piece(rngs[i]) for i in indices.tolist()]
+        keys = self.stream_keys[indices] ^ self.drawn[indices]
+        np.add.at(self.drawn, indices, np.uint64(1))
+        return splitmix64(keys) % np.uint64(len(PIECES))
+
+    def column_tops(self, boards):
+        """Returns the topmost filled row of every column of each board."""
+        filled = boards.any(axis=1)
+        return np.where(filled, boards.argmax(axis=1), self.rows)
+
+    def step(self, actions):
+        """Drops every live env's piece at its (rotation, x) action.
+
+        Returns the per-env score gained and rows cleared this step.
+        Finished envs are left untouched until reset().
+        """
+        actions = np.asarray(actions, np.int64)
+        gained = np.zeros(self.n, np.int64)
+        cleared = np.zeros(self.n, np.int64)
+        live = np.nonzero(~self.done)[0]
+        if live.size == 0:
+            return gained, cleared
+        piece = self.current[live]
+        rotation = actions[live, 0] % self.rotation_counts[piece]
+        x = np.clip(
+            actions[live, 1],
+            self.min_x[piece, rotation],
+            self.max_x[piece, rotation]
+        )
+        rows = self.cell_rows[piece, rotation]
+        cols = self.cell_cols[piece, rotation] + x[:, None]
+
+        # valid_position: land on the stack under the piece's columns
+        tops = self.tops[live[:, None], cols]
+        y = (tops - rows - 1).min(axis=1)
+        topped_out = y < 0
+        self.done[live[topped_out]] = True
+        keep = ~topped_out
+        live, piece, rows, cols, y = (
+            live[keep], piece[keep], rows[keep], cols[keep], y[keep]
+        )
+        if live.size == 0:
+            return gained, cleared
+
+        # add_piece_to_board
+        rows = rows + y[:, None]
+        self.boards[live[:, None], rows, cols] = True
+        np.minimum.at(self.tops, (live[:, None], cols), rows)
+
+        # clear_complete_rows: only rows the piece touched can be full.
+        # Cells are in row order, so repeated rows are adjacent.
+        touched = self.boards[live[:, None], rows].all(axis=2)
+        touched[:, 1:] &= rows[:, 1:] != rows[:, :-1]
+        count = touched.sum(axis=1)
+        hit = np.nonzero(count)[0]
+        if hit.size:
+            # Full rows sort to the top, then get emptied
+            boards = self.boards[live[hit]]
+            full = boards.all(axis=2)
+            order = np.argsort(~full, axis=1, kind="stable")
+            boards = np.take_along_axis(boards, order[:, :, None], 1)
+            boards[np.arange(self.rows)[None, :] < count[hit][:, None]] = False
+            self.boards[live[hit]] = boards
+            self.tops[live[hit]] = self.column_tops(boards)
+
+        # calculate_score and update_score_and_level, plus hard drop bonus
+        points = LINE_SCORES[count] + 2 * y
+        gained[live] = points
+        cleared[live] = count
+        self.score[live] += points
+        self.lines[live] += count
+        self.level[live] += self.lines[live] >= self.level[live] * 10
+        self.pieces_placed[live] += 1
+
+        # Spawn the next piece and draw a new one from each env's stream
+        nxt = self.next[live]
+        self.current[live] = nxt
+        self.next[live] = self.draw(live)
+        spawn_rows = self.cell_rows[nxt, 0]
+        spawn_cols = self.cell_cols[nxt, 0] + self.spawn_x
+        blocked = self.boards[live[:, None], spawn_rows, spawn_cols]
+        self.done[live[blocked.any(axis=1)]] = True
+        return gained, cleared
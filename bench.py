@@ -0,0 +1,279 @@
+"""
+Bitso Tetris - benchmark suite.
+
+Times the engine hot paths, the renderer and whole frames under SDL's
+dummy video driver, so it runs headless and gives comparable numbers on
+any machine. Results are saved as JSON, and a saved run can be compared
+against a new one to flag regressions.
+
+Usage:
+    python bench.py --output before.json
+    python bench.py --output after.json --compare before.json
+    python bench.py --only draw_ --threshold 0.05
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+
+import pygame
+
+from config import CONFIG
+from engine import (
+    GameState, add_piece_to_board, clear_complete_rows, create_board,
+    valid_position
+)
+from hud import Hud
+from pieces import PIECES
+from render import Renderer, draw_board, draw_ghost_piece
+
+
+# name -> setup function returning (callable, ops per call), or with a
+# third item, a callable whose time is part of the first one's but not
+# of what is being measured; its time is subtracted
+BENCHMARKS = {}
+RESULTS_FILE = "bench.json"
+SYNTHETIC_PIECES = 10000
+
+
+def benchmark(name):
+    """Registers a setup function under a benchmark name."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def measure(fn, repeat):
+    """Returns the best seconds per call over ``repeat`` timed batches."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+# === Fixtures ===
+def stacked_board(seed=0, filled_rows=8, full_rows=0):
+    """Returns a board with ragged rows at the bottom and some full ones."""
+    rng = random.Random(seed)
+    board = create_board()
+    for row in range(board.height - filled_rows, board.height):
+        for col in range(board.width):
+            if rng.random() < 0.7:
+                board.fill(row, col, rng.randint(1, len(PIECES)))
+    for row in range(board.height - full_rows, board.height):
+        for col in range(board.width):
+            board.fill(row, col, 1)
+    return board
+
+
+def playing_game(seed=0):
+    """Returns a seeded game a few pieces in, with a stack to draw."""
+    game = GameState(seed=seed, clock=lambda: 0)
+    rng = random.Random(seed)
+    for _ in range(12):
+        game.step(rng.choice(["left", "right", "rotate"]))
+        game.step("hard_drop")
+        if game.game_over:
+            game.reset(seed)
+    return game
+
+
+def window():
+    return pygame.display.set_mode(
+        (CONFIG["WINDOW_WIDTH"], CONFIG["WINDOW_HEIGHT"])
+    )
+
+
+# === Engine ===
+@benchmark("valid_position")
+def bench_valid_position():
+    board = stacked_board()
+    spots = [
+        (piece, rotation, x, y)
+        for piece in range(len(PIECES))
+        for rotation in range(len(PIECES[piece]))
+        for x in range(-1, board.width - 1)
+        for y in (0, 8, 14)
+    ]
+
+    def run():
+        for spot in spots:
+            valid_position(*spot, board)
+    return run, len(spots)
+
+
+@benchmark("board_copy")
+def bench_board_copy():
+    board = stacked_board()
+    return board.copy, 1
+
+
+def bench_clear(full_rows):
+    board = stacked_board(full_rows=full_rows)
+    # Clearing changes the board, so each call works on a fresh copy
+    return lambda: clear_complete_rows(board.copy()), 1, board.copy
+
+
+for _full_rows in range(5):
+    benchmark(f"clear_complete_rows_{_full_rows}")(
+        lambda full_rows=_full_rows: bench_clear(full_rows)
+    )
+
+
+@benchmark("add_piece_to_board")
+def bench_add_piece():
+    board = create_board()
+    return lambda: add_piece_to_board(6, 1, 3, 10, board, 7), 1
+
+
+# === Renderer ===
+@benchmark("draw_board")
+def bench_draw_board():
+    surface = window()
+    board = stacked_board(filled_rows=14)
+    return lambda: draw_board(surface, board), 1
+
+
+@benchmark("draw_ghost_piece")
+def bench_draw_ghost():
+    surface = window()
+    game = playing_game()
+    return lambda: draw_ghost_piece(surface, game), 1
+
+
+def bench_frame(full_redraw):
+    """One playing-state frame: a move, the playfield, HUD and present."""
+    surface = window()
+    renderer = Renderer(surface, lambda s: s.fill((15, 15, 15)))
+    hud = Hud(renderer, 330)
+    game = playing_game()
+    moves = ["left", "right", "down", "rotate"]
+    frame = [0]
+
+    def run():
+        frame[0] += 1
+        game.step(moves[frame[0] % len(moves)])
+        if game.game_over:
+            game.reset(0)
+        if full_redraw:
+            renderer.invalidate()
+        renderer.draw_playfield(game)
+        hud.draw_values(surface, [
+            str(game.score), str(game.level), "0", "00:00",
+            str(game.total_lines),
+        ])
+        hud.draw_next(surface, game.next_piece)
+        renderer.present()
+    return run, 1
+
+
+benchmark("frame_incremental")(lambda: bench_frame(False))
+benchmark("frame_full_redraw")(lambda: bench_frame(True))
+
+
+# === Macro ===
+@benchmark("synthetic_game_10000_pieces")
+def bench_synthetic_game():
+    """Plays random moves and hard drops until 10,000 pieces are placed."""
+    def run():
+        rng = random.Random(0)
+        game = GameState(seed=0, clock=lambda: 0)
+        placed = 0
+        while placed < SYNTHETIC_PIECES:
+            for _ in range(rng.randint(0, 4)):
+                game.step(rng.choice(["left", "right", "rotate", "down"]))
+            game.step("hard_drop")
+            placed += 1
+            if game.game_over:
+                game.reset(placed)
+    return run, SYNTHETIC_PIECES
+
+
+# === Running and Comparing ===
+def run_benchmarks(only=None, repeat=5):
+    pygame.init()
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if only and only not in name:
+            continue
+        fn, ops, *overhead = setup()
+        seconds = measure(fn, repeat)
+        if overhead:
+            seconds -= measure(overhead[0], repeat)
+        results[name] = {"seconds": seconds, "ops": ops}
+        print(
+            f"{name:<32}{seconds / ops * 1e6:12.3f} us/op"
+            f"{ops / seconds:14,.0f} ops/s"
+        )
+    pygame.quit()
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ["SDL_VIDEODRIVER"],
+        },
+        "results": results,
+    }
+
+
+def compare(old, new, threshold):
+    """Prints per-benchmark changes and returns the regressed names."""
+    regressions = []
+    print(f"\n{'benchmark (us/op)':<32}{'before':>12}{'after':>12}"
+          f"{'change':>9}")
+    for name, result in new["results"].items():
+        before = old["results"].get(name)
+        if before is None:
+            continue
+        # Per op, so a changed op count does not read as a regression
+        old_time = before["seconds"] / before["ops"]
+        new_time = result["seconds"] / result["ops"]
+        change = new_time / old_time - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<32}{old_time * 1e6:12.3f}{new_time * 1e6:12.3f}"
+            f"{change:+9.1%}{flag}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--compare", help="earlier results JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="slowdown that counts as a regression (default 0.10)"
+    )
+    parser.add_argument("--only", help="run benchmarks containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    report = run_benchmarks(args.only, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            old = json.load(f)
+        regressions = compare(old, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over "
+                  f"{args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Bitso Tetris - bitboard representation of the playfield.
+
+Occupancy is stored as one integer bitmask per row (bit ``c`` set means
+column ``c`` is filled), so collision checks are a few AND operations
+and a full row is simply ``row == full_mask``. Colors live in a separate
+uint8 plane that is only read when drawing: 0 is an empty cell and
+``n`` is ``COLORS[n - 1]``.
+
+The board also keeps ``tops``, the topmost filled row of every column
+(``height`` when the column is empty). It is updated incrementally on
+fills and line clears and gives drop distances without a search.
+"""
+
+from bisect import bisect_right
+
+
+class Board:
+    """Row bitmasks plus a color-index plane."""
+
+    __slots__ = ("height", "width", "full_mask", "rows", "colors", "tops")
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.full_mask = (1 << width) - 1
+        self.rows = [0] * height
+        self.colors = bytearray(height * width)
+        self.tops = [height] * width
+
+    def copy(self):
+        """Returns an independent copy of the board."""
+        other = Board.__new__(Board)
+        other.height = self.height
+        other.width = self.width
+        other.full_mask = self.full_mask
+        other.rows = self.rows[:]
+        other.colors = self.colors[:]
+        other.tops = self.tops[:]
+        return other
+
+    def freeze(self):
+        """Returns the board as an immutable (rows, colors, tops) tuple."""
+        return tuple(self.rows), bytes(self.colors), tuple(self.tops)
+
+    @classmethod
+    def thaw(cls, frozen):
+        """Returns a new Board from a freeze() tuple."""
+        rows, colors, tops = frozen
+        board = cls.__new__(cls)
+        board.height = len(rows)
+        board.width = len(tops)
+        board.full_mask = (1 << board.width) - 1
+        board.rows = list(rows)
+        board.colors = bytearray(colors)
+        board.tops = list(tops)
+        return board
+
+    def is_filled(self, row, col):
+        """Returns True if the cell is occupied."""
+        return self.rows[row] >> col & 1 == 1
+
+    def color_index(self, row, col):
+        """Returns the color index of a cell, 0 if empty."""
+        return self.colors[row * self.width + col]
+
+    def fits(self, masks, y):
+        """Returns True if the row masks placed from row y are free.
+
+        ``masks`` must already be shifted to a legal column, as in the
+        PieceGeometry tables, so only the vertical bounds are checked.
+        """
+        if y < 0 or y + len(masks) > self.height:
+            return False
+        rows = self.rows
+        for i, mask in enumerate(masks):
+            if rows[y + i] & mask:
+                return False
+        return True
+
+    def fill(self, row, col, color_index):
+        """Marks a cell as occupied with the given color index."""
+        self.rows[row] |= 1 << col
+        self.colors[row * self.width + col] = color_index
+        if row < self.tops[col]:
+            self.tops[col] = row
+
+    def column_heights(self):
+        """Returns the height of the stack in every column."""
+        return [self.height - top for top in self.tops]
+
+    def clear_full_rows(self, candidates=None):
+        """Removes full rows, shifting the rows above them down.
+
+        Only the ``candidates`` rows (ascending indices, such as the rows
+        a piece just locked into) are checked if given, so a clear costs
+        the same on a tall board as on a short one. Returns the indices
+        of the removed rows, top to bottom.
+        """
+        full = self.full_mask
+        rows = self.rows
+        if candidates is None:
+            removed = [i for i, mask in enumerate(rows) if mask == full]
+        else:
+            removed = [
+                i for i in candidates
+                if 0 <= i < self.height and rows[i] == full
+            ]
+        if not removed:
+            return removed
+        width = self.width
+        colors = self.colors
+        # Bottom-up, so the indices still to delete do not move
+        for i in reversed(removed):
+            del rows[i]
+            del colors[i * width:(i + 1) * width]
+        rows[:0] = [0] * len(removed)
+        colors[:0] = bytes(width * len(removed))
+        self.update_tops(removed)
+        return removed
+
+    def add_garbage(self, count, hole, color_index):
+        """Pushes the stack up and fills ``count`` bottom rows but one hole.
+
+        Returns True if filled cells were pushed off the top.
+        """
+        width = self.width
+        height = self.height
+        overflow = any(self.rows[:count])
+        self.rows = self.rows[count:] + [self.full_mask & ~(1 << hole)] * count
+        line = bytearray([color_index]) * width
+        line[hole] = 0
+        self.colors = self.colors[count * width:] + line * count
+        rows = self.rows
+        tops = self.tops
+        for col, top in enumerate(tops):
+            if top == height:
+                if col != hole:
+                    tops[col] = height - count
+            elif top >= count:
+                tops[col] = top - count
+            else:
+                # The top cell was pushed off the board: look further down
+                bit = 1 << col
+                row = 0
+                while row < height and not rows[row] & bit:
+                    row += 1
+                tops[col] = row
+        return overflow
+
+    def update_tops(self, removed):
+        """Moves the column tops down after the given rows were removed."""
+        rows = self.rows
+        height = self.height
+        tops = self.tops
+        for col, top in enumerate(tops):
+            if top == height:
+                continue
+            # Every removed row below the top shifts it down by one
+            below = len(removed) - bisect_right(removed, top)
+            if rows[top + below] >> col & 1:
+                tops[col] = top + below
+                continue
+            # The top cell itself was cleared: look further down
+            bit = 1 << col
+            row = top + 1
+            while row < height and not rows[row] & bit:
+                row += 1
+            tops[col] = row
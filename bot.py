@@ -0,0 +1,112 @@
+"""
+Bitso Tetris - heuristic autoplay.
+
+Every reachable placement of the current piece is scored with a
+weighted sum of board features (aggregate height, completed lines,
+holes and bumpiness) and the best one is played. The weights are the
+values tournament.py is used to tune.
+"""
+
+from pieces import compile_pieces
+from placements import game_placements
+
+
+# Feature weights; a placement is worth the weighted sum of its features
+WEIGHTS = {
+    "height": -0.51,
+    "lines": 0.76,
+    "holes": -0.36,
+    "bumpiness": -0.18,
+}
+
+
+def locked_rows(rows, full_mask, masks, y):
+    """Returns the row masks after locking and clearing, and the count."""
+    rows = rows[:]
+    for i, mask in enumerate(masks):
+        rows[y + i] |= mask
+    kept = [mask for mask in rows if mask != full_mask]
+    cleared = len(rows) - len(kept)
+    return [0] * cleared + kept, cleared
+
+
+def board_features(rows, width):
+    """Returns the aggregate height, holes and bumpiness of row masks."""
+    height = len(rows)
+    heights = [0] * width
+    covered = 0
+    holes = 0
+    for i, row in enumerate(rows):
+        # Bits seen for the first time are the tops of their columns
+        new = row & ~covered
+        while new:
+            bit = new & -new
+            heights[bit.bit_length() - 1] = height - i
+            new ^= bit
+        covered |= row
+        holes += bin(covered & ~row).count("1")
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return sum(heights), holes, bumpiness
+
+
+def board_value(rows, width, weights=WEIGHTS):
+    """Returns the weighted height, holes and bumpiness of row masks."""
+    height, holes, bumpiness = board_features(rows, width)
+    return (
+        weights["height"] * height
+        + weights["holes"] * holes
+        + weights["bumpiness"] * bumpiness
+    )
+
+
+def evaluate(board, piece, placement, weights=WEIGHTS):
+    """Returns the heuristic value of locking the piece at a placement."""
+    geometry = compile_pieces(board.width)[piece][placement.rotation]
+    rows, lines = locked_rows(
+        board.rows,
+        board.full_mask,
+        geometry.masks[placement.x],
+        placement.y + geometry.top
+    )
+    return weights["lines"] * lines + board_value(rows, board.width, weights)
+
+
+def best_placement(game, weights=WEIGHTS):
+    """Returns the best reachable Placement for the current piece."""
+    best = None
+    best_value = None
+    for placement in game_placements(game):
+        value = evaluate(game.board, game.current_piece, placement, weights)
+        if best is None or value > best_value:
+            best = placement
+            best_value = value
+    return best
+
+
+def play_placement(game, placement):
+    """Plays the moves to a placement, then hard drops the piece there.
+
+    Every move goes through game.step(), as a player's would, so
+    recordings replay and the hard drop is scored.
+    """
+    path = placement.path
+    end = len(path)
+    # The soft drops that end a path are the ones the hard drop makes
+    while end and path[end - 1] == "down":
+        end -= 1
+    for action in path[:end]:
+        game.step(action)
+    return game.step("hard_drop")
+
+
+def play_game(game, weights=WEIGHTS, max_pieces=None):
+    """Autoplays until game over or max_pieces, then returns the game."""
+    while not game.game_over:
+        if max_pieces is not None and game.pieces_placed >= max_pieces:
+            break
+        placement = best_placement(game, weights)
+        if placement is None:
+            game.step("hard_drop")
+        else:
+            play_placement(game, placement)
+    return game
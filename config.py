@@ -0,0 +1,32 @@
+"""
+Bitso Tetris - shared configuration.
+
+Values used by both the headless engine and the pygame front-end.
+"""
+
+CONFIG = {
+    "WINDOW_WIDTH": 560,
+    "WINDOW_HEIGHT": 680,
+    "CELL_SIZE": 30,
+    "COLUMNS": 10,
+    "ROWS": 20,
+    "GIANT_ROWS": 1000,  # Board used by Tetris.py --giant
+    "GIANT_COLUMNS": 64,
+    "FPS": 60,
+    "TICK_RATE": 60,  # Fixed logic ticks per second
+    "INITIAL_FALL_DELAY": 500,
+    "FAST_DROP_SPEED": 50,
+    "LATERAL_SPEED": 150,
+    "ENTRY_ANIMATION_MS": 150,
+    "CLEAR_FLASH_MS": 150,
+    "ANIMATIONS_OFF_LEVEL": 10,  # Effects shrink to nothing by this level
+    "AUTOPLAY_SPEED": 60,  # ms between autoplay moves
+    "UNDO_STEPS": 30,  # Placements U can take back
+    "AUTOSAVE_SECONDS": 5,  # At most one autosave write this often
+    "STARTUP_BUDGET_MS": 400,  # Launch to first menu frame
+    "LEADERBOARD_URL": None,  # e.g. "http://localhost:8765" to share scores
+    "SPECTATE_RELAY": None,  # e.g. "localhost:8766" to broadcast games
+    "SPECTATE_CHANNEL": "main",
+    "ARENA_MAX_SESSIONS": 10000,  # Games one arena.py process hosts
+    "ARENA_IDLE_SECONDS": 60,  # Sessions without input are evicted
+}
@@ -0,0 +1,372 @@
+"""
+Bitso Tetris - headless game engine.
+
+Holds the game rules and the GameState object. Nothing in here touches
+pygame, so the engine can be driven by the window front-end, by bots or
+by simulations running at full CPU speed.
+"""
+
+import random
+import time
+from collections import namedtuple
+from operator import attrgetter
+
+from board import Board
+from config import CONFIG
+from pieces import COLORS, compile_pieces, new_piece
+
+
+EMPTY = (0, 0, 0)
+GARBAGE_COLOR = (90, 90, 90)
+# RGB colors indexed by the board's color plane (0 is an empty cell)
+PALETTE = [EMPTY] + COLORS + [GARBAGE_COLOR]
+GARBAGE = len(PALETTE) - 1  # Color index of garbage cells
+
+# Garbage rows sent to a versus opponent for clearing 0-4 rows
+GARBAGE_FOR_LINES = (0, 0, 1, 2, 4)
+
+# Actions accepted by GameState.step()
+ACTIONS = ("left", "right", "rotate", "down", "hard_drop", "gravity")
+
+StepResult = namedtuple("StepResult", ["locked", "cleared_rows"])
+NO_LOCK = StepResult(False, ())
+
+# GameState attributes copied into a Snapshot as they are
+SNAPSHOT_FIELDS = (
+    "seed", "score", "level", "total_lines", "fall_delay", "pieces_placed",
+    "current_piece", "next_piece", "current_rotation", "piece_x", "piece_y",
+    "game_over", "start_time", "last_fall_time",
+)
+# ``board`` is a Board.freeze() tuple, ``rng_state`` the RNG's getstate()
+# (None if it has none) and ``recording`` a Recorder.mark() or None
+Snapshot = namedtuple(
+    "Snapshot", SNAPSHOT_FIELDS + ("board", "rng_state", "recording")
+)
+_snapshot_fields = attrgetter(*SNAPSHOT_FIELDS)
+
+
+# === Board Functions ===
+def create_board(rows=None, columns=None):
+    """Returns an empty bitboard."""
+    rows = CONFIG["ROWS"] if rows is None else rows
+    columns = CONFIG["COLUMNS"] if columns is None else columns
+    return Board(rows, columns)
+
+
+def valid_position(piece, rotation, piece_x, piece_y, board):
+    """Returns True if the piece index fits at the given board position."""
+    geometry = compile_pieces(board.width)[piece][rotation]
+    masks = geometry.masks.get(piece_x)
+    if masks is None:
+        return False
+    return board.fits(masks, piece_y + geometry.top)
+
+
+def is_game_over(piece, rotation, piece_x, piece_y, board):
+    """Returns True if the current piece placement triggers game over."""
+    return not valid_position(piece, rotation, piece_x, piece_y, board)
+
+
+def add_piece_to_board(piece, rotation, piece_x, piece_y, board, color):
+    """Locks the piece index into the board using the given color index."""
+    geometry = compile_pieces(board.width)[piece][rotation]
+    for i, j in geometry.cells:
+        board_row = piece_y + i
+        board_col = piece_x + j
+        # Place piece if inside the board
+        if 0 <= board_row < board.height and 0 <= board_col < board.width:
+            board.fill(board_row, board_col, color)
+
+
+def landing_distance(geometry, piece_x, piece_y, board):
+    """Returns how many rows a piece can fall before it lands.
+
+    Uses the board's column tops against the piece's bottom profile, and
+    only walks down row by row when the piece is tucked under an
+    overhang.
+    """
+    tops = board.tops
+    distance = board.height
+    for j, bottom in geometry.bottom:
+        gap = tops[piece_x + j] - piece_y - bottom - 1
+        if gap < distance:
+            distance = gap
+    if distance >= 0:
+        return distance
+    masks = geometry.masks[piece_x]
+    y = piece_y + geometry.top
+    distance = 0
+    while board.fits(masks, y + distance + 1):
+        distance += 1
+    return distance
+
+
+def clear_complete_rows(board, rows=None):
+    """Removes full rows and returns the board, count, and indices.
+
+    ``rows`` limits the check to those row indices, in ascending order.
+    """
+    removed_rows = board.clear_full_rows(rows)
+    return board, len(removed_rows), removed_rows
+
+
+def calculate_score(rows_cleared):
+    """Returns score based on the number of rows cleared."""
+    if rows_cleared == 1:
+        return 100
+    elif rows_cleared == 2:
+        return 300
+    elif rows_cleared == 3:
+        return 500
+    elif rows_cleared == 4:
+        return 800
+    return 0
+
+
+def new_seed():
+    """Returns a random seed for a new game's piece generator."""
+    return random.getrandbits(32)
+
+
+def default_clock():
+    """Returns a monotonic time in milliseconds."""
+    return int(time.monotonic() * 1000)
+
+
+# === Game State ===
+class GameState:
+    """A single game of Tetris: board, pieces, score and timers.
+
+    The clock is a callable returning milliseconds and the RNG is any
+    object with a ``randint`` method, so both can be swapped for
+    deterministic ones in simulations. Without an RNG every game gets
+    its own ``random.Random(seed)``, so the piece sequence can be
+    reproduced from ``seed``.
+
+    A ``recorder`` (see replay.py) is told about every step() call and
+    every reset.
+    """
+
+    def __init__(self, config=None, rng=None, clock=None, seed=None):
+        self.config = CONFIG if config is None else config
+        self.custom_rng = rng
+        self.clock = default_clock if clock is None else clock
+        self.geometry = compile_pieces(self.config["COLUMNS"])
+        self.recorder = None
+        self.rng_state_key = None  # (rng, pieces_placed) of rng_state
+        self.rng_state = None
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Resets all game state variables for a new game.
+
+        Picks a fresh seed unless one is given or a custom RNG is set.
+        """
+        if self.custom_rng is None:
+            self.seed = new_seed() if seed is None else seed
+            self.rng = random.Random(self.seed)
+        else:
+            self.seed = None
+            self.rng = self.custom_rng
+        self.board = create_board(self.config["ROWS"], self.config["COLUMNS"])
+        self.score = 0
+        self.level = 1
+        self.total_lines = 0
+        self.fall_delay = self.config["INITIAL_FALL_DELAY"]
+        self.pieces_placed = 0
+        self.game_over = False
+        self.start_time = self.clock()
+        self.rng_state_key = None
+        self.next_piece = new_piece(self.rng)
+        self.spawn_piece()
+        if self.recorder is not None:
+            self.recorder.start()
+
+    def spawn_piece(self):
+        """Sets the next piece as the current piece and draws a new one."""
+        self.current_piece = self.next_piece
+        self.next_piece = new_piece(self.rng)
+        self.current_rotation = 0
+        self.piece_x = (self.config["COLUMNS"] - 4) // 2
+        self.piece_y = 0
+        self.last_fall_time = self.clock()
+        if is_game_over(
+            self.current_piece,
+            self.current_rotation,
+            self.piece_x,
+            self.piece_y,
+            self.board
+        ):
+            self.game_over = True
+
+    # --- Snapshots ---
+    def snapshot(self):
+        """Returns an immutable Snapshot of the game for restore().
+
+        Takes a few microseconds. The board is frozen into tuples and
+        bytes, and the RNG state is read again only once a piece has
+        been drawn since the last snapshot.
+        """
+        key = (self.rng, self.pieces_placed)
+        if key != self.rng_state_key:
+            getstate = getattr(self.rng, "getstate", None)
+            self.rng_state = getstate() if getstate else None
+            self.rng_state_key = key
+        recorder = self.recorder
+        return Snapshot(
+            *_snapshot_fields(self),
+            self.board.freeze(),
+            self.rng_state,
+            recorder.mark() if recorder is not None else None
+        )
+
+    def restore(self, snapshot):
+        """Puts the game back into the state of a snapshot.
+
+        The snapshot must come from a game with the same board size. If
+        it carries a mark of the current recording, the recorder is
+        rewound to it, so the replay reads as if the undone steps never
+        happened. Marks from an earlier recording are ignored.
+        """
+        recorder = self.recorder
+        mark = snapshot.recording
+        if recorder is not None and mark is not None and recorder.owns(mark):
+            recorder.rewind(mark)
+        for field, value in zip(SNAPSHOT_FIELDS, snapshot):
+            setattr(self, field, value)
+        self.board = Board.thaw(snapshot.board)
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+            self.rng_state = snapshot.rng_state
+            self.rng_state_key = (self.rng, self.pieces_placed)
+
+    # --- Convenience accessors for the front-end ---
+    @property
+    def current_color(self):
+        return COLORS[self.current_piece]
+
+    @property
+    def next_color(self):
+        return COLORS[self.next_piece]
+
+    def fits(self, rotation, piece_x, piece_y):
+        """Returns True if the current piece fits at the given spot."""
+        geometry = self.geometry[self.current_piece][rotation]
+        masks = geometry.masks.get(piece_x)
+        if masks is None:
+            return False
+        return self.board.fits(masks, piece_y + geometry.top)
+
+    def drop_distance(self):
+        """Returns how many rows the current piece can still fall."""
+        return landing_distance(
+            self.geometry[self.current_piece][self.current_rotation],
+            self.piece_x,
+            self.piece_y,
+            self.board
+        )
+
+    # --- Rules ---
+    def lock_piece(self):
+        """Locks the piece, clears rows, scores and spawns the next one."""
+        add_piece_to_board(
+            self.current_piece,
+            self.current_rotation,
+            self.piece_x,
+            self.piece_y,
+            self.board,
+            self.current_piece + 1
+        )
+        self.pieces_placed += 1
+        # Only the rows the piece landed in can have become full
+        geometry = self.geometry[self.current_piece][self.current_rotation]
+        self.board, cleared, cleared_rows = clear_complete_rows(
+            self.board,
+            range(self.piece_y + geometry.top, self.piece_y + geometry.height)
+        )
+        self.update_score_and_level(cleared)
+        self.spawn_piece()
+        return StepResult(True, tuple(cleared_rows))
+
+    def add_garbage(self, count, hole):
+        """Raises garbage rows under the stack, with a gap at ``hole``.
+
+        The falling piece moves up if the stack now overlaps it. The game
+        is over if that is impossible or blocks were pushed off the top.
+        """
+        if self.game_over or count <= 0:
+            return
+        count = min(count, self.board.height)
+        if self.board.add_garbage(count, hole, GARBAGE):
+            self.game_over = True
+            return
+        rotation = self.current_rotation
+        for _ in range(count):
+            if self.fits(rotation, self.piece_x, self.piece_y):
+                break
+            self.piece_y -= 1
+        if not self.fits(rotation, self.piece_x, self.piece_y):
+            self.game_over = True
+
+    def update_score_and_level(self, cleared):
+        """Updates score, level, and fall speed after line clears."""
+        self.score += calculate_score(cleared)
+        self.total_lines += cleared
+        if self.total_lines >= self.level * 10:
+            self.level += 1
+            self.fall_delay = max(250, self.fall_delay - 50)
+
+    def step(self, action):
+        """Applies one action from ACTIONS and returns a StepResult."""
+        if self.game_over:
+            return NO_LOCK
+        if self.recorder is not None:
+            self.recorder.record(action)
+        rotation, x, y = self.current_rotation, self.piece_x, self.piece_y
+        if action == "left":
+            if self.fits(rotation, x - 1, y):
+                self.piece_x -= 1
+        elif action == "right":
+            if self.fits(rotation, x + 1, y):
+                self.piece_x += 1
+        elif action == "rotate":
+            rotations = len(self.geometry[self.current_piece])
+            new_rotation = (rotation + 1) % rotations
+            if self.fits(new_rotation, x, y):
+                self.current_rotation = new_rotation
+        elif action == "down":
+            if self.fits(rotation, x, y + 1):
+                self.piece_y += 1
+        elif action == "hard_drop":
+            dropped = self.drop_distance()
+            self.piece_y += dropped
+            self.score += dropped * 2
+            return self.lock_piece()
+        elif action == "gravity":
+            if self.fits(rotation, x, y + 1):
+                self.piece_y += 1
+            else:
+                return self.lock_piece()
+        else:
+            raise ValueError(f"Unknown action: {action!r}")
+        return NO_LOCK
+
+    def update(self, fast_drop=False, now=None):
+        """Applies gravity or fast drop if their delay has elapsed."""
+        if self.game_over:
+            return NO_LOCK
+        now = self.clock() if now is None else now
+        if fast_drop:
+            delay = self.config["FAST_DROP_SPEED"]
+        else:
+            delay = self.fall_delay
+        if now - self.last_fall_time <= delay:
+            return NO_LOCK
+        result = self.step("gravity")
+        self.last_fall_time = now
+        return result
+
+    def elapsed_seconds(self, now=None):
+        """Returns whole seconds played since the game started."""
+        now = self.clock() if now is None else now
+        return (now - self.start_time) // 1000
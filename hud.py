@@ -0,0 +1,85 @@
+"""
+Bitso Tetris - cached fonts, text and the info panel.
+
+pygame.font.SysFont scans the system font list on every call, so fonts
+are loaded once and rendered text surfaces are cached by
+(font, text, color). The Hud only re-renders a value when it changes.
+"""
+
+from functools import lru_cache
+
+import pygame
+
+from config import CONFIG
+from pieces import GEOMETRY
+from render import draw_cell
+
+
+BACKGROUND_COLOR = (15, 15, 15)
+TEXT_COLOR = (255, 255, 255)
+
+
+@lru_cache(maxsize=None)
+def get_font(name, size, bold=False, italic=False):
+    """Returns a system font, loading it only the first time."""
+    return pygame.font.SysFont(name, size, bold=bold, italic=italic)
+
+
+@lru_cache(maxsize=256)
+def render_text(font, text, color=TEXT_COLOR):
+    """Returns the antialiased surface for a text, cached per font."""
+    return font.render(text, True, color)
+
+
+class Hud:
+    """Info panel: static labels plus values redrawn only on change."""
+
+    LABELS = ["Score:", "Level:", "High Score:", "Time:", "Lines:"]
+
+    def __init__(self, renderer, x, y=120, line_spacing=30):
+        self.renderer = renderer
+        self.x = x
+        self.y = y
+        self.line_spacing = line_spacing
+        self.value_x = x + 140
+        self.next_y = y + (len(self.LABELS) + 1) * line_spacing
+
+    def draw_labels(self, surface):
+        """Draws the labels, which only change when the screen is reset."""
+        font_bold = get_font("Verdana", 20, bold=True)
+        for i, label in enumerate(self.LABELS + ["Next:"]):
+            surface.blit(
+                render_text(font_bold, label),
+                (self.x, self.y + i * self.line_spacing)
+            )
+
+    def draw_values(self, surface, values):
+        """Redraws the label values that differ from the last frame."""
+        font = get_font("Verdana", 20)
+        for i, value in enumerate(values):
+            if not self.renderer.changed(self.LABELS[i], value):
+                continue
+            rect = pygame.Rect(
+                self.value_x,
+                self.y + i * self.line_spacing,
+                CONFIG["WINDOW_WIDTH"] - self.value_x,
+                self.line_spacing
+            )
+            surface.fill(BACKGROUND_COLOR, rect)
+            surface.blit(render_text(font, value), rect)
+            self.renderer.mark(rect)
+
+    def draw_next(self, surface, piece):
+        """Redraws the next-piece preview when the piece changes."""
+        if not self.renderer.changed("Next:", piece):
+            return
+        size = CONFIG["CELL_SIZE"]
+        rect = pygame.Rect(self.x, self.next_y, 4 * size, 4 * size)
+        surface.fill(BACKGROUND_COLOR, rect)
+        for i, j in GEOMETRY[piece][0].cells:
+            draw_cell(
+                surface,
+                (self.x + j * size, self.next_y + i * size),
+                piece + 1
+            )
+        self.renderer.mark(rect)
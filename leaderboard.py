@@ -0,0 +1,146 @@
+"""
+Bitso Tetris - leaderboard storage.
+
+Scores live in a single SQLite database (stdlib sqlite3). Each write is
+one transaction, so a crash never leaves a half-written file. The score
+index serves the top-N pages, rank lookups and the high score, which
+used to be kept separately in record.txt.
+"""
+
+import os
+import sqlite3
+import time
+
+
+DB_FILE = "leaderboard.db"
+LEGACY_LEADERBOARD_FILE = "leaderboard.txt"
+LEGACY_RECORD_FILE = "record.txt"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def parse_legacy_line(line):
+    """Returns (name, score) from a leaderboard.txt line, or None."""
+    name, sep, score = line.strip().rpartition(",")
+    if not sep or not name or not score.isdigit():
+        return None
+    return name, int(score)
+
+
+class Leaderboard:
+    """Persistent high-score table backed by SQLite."""
+
+    def __init__(self, path=DB_FILE, legacy_dir=None, legacy=True):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        if not legacy:
+            return
+        if legacy_dir is None:
+            legacy_dir = os.path.dirname(os.path.abspath(path))
+        self.import_legacy(legacy_dir)
+
+    def close(self):
+        self.conn.close()
+
+    # --- Writes ---
+    def add(self, name, score):
+        """Records a score and returns its 1-based rank."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO scores (name, score, created) VALUES (?, ?, ?)",
+                (name, score, time.time())
+            )
+        return self.rank(score)
+
+    def import_legacy(self, directory):
+        """Imports leaderboard.txt and record.txt once, skipping bad lines."""
+        if self.get_meta("legacy_imported"):
+            return
+        entries = []
+        try:
+            path = os.path.join(directory, LEGACY_LEADERBOARD_FILE)
+            with open(path, "r") as f:
+                for line in f:
+                    entry = parse_legacy_line(line)
+                    if entry:
+                        entries.append(entry)
+        except OSError:
+            pass
+        record = 0
+        try:
+            path = os.path.join(directory, LEGACY_RECORD_FILE)
+            with open(path, "r") as f:
+                record = int(f.read())
+        except (OSError, ValueError):
+            pass
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO scores (name, score, created) VALUES (?, ?, ?)",
+                [(name, score, now) for name, score in entries]
+            )
+            self.set_meta("legacy_record", record)
+            self.set_meta("legacy_imported", 1)
+
+    # --- Reads ---
+    def top(self, limit=10, offset=0):
+        """Returns one page of (name, score) pairs, best first."""
+        return self.conn.execute(
+            "SELECT name, score FROM scores "
+            "ORDER BY score DESC, id LIMIT ? OFFSET ?",
+            (limit, offset)
+        ).fetchall()
+
+    def rank(self, score):
+        """Returns the rank a score would have (1 is the best).
+
+        Counts the better scores on the score index. That is a range
+        scan, so the cost grows with the rank rather than O(log n):
+        cheap near the top of the table, slower far down it.
+        """
+        (better,) = self.conn.execute(
+            "SELECT COUNT(*) FROM scores WHERE score > ?", (score,)
+        ).fetchone()
+        return better + 1
+
+    def count(self):
+        """Returns the number of recorded scores."""
+        (total,) = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        return total
+
+    def high_score(self):
+        """Returns the best score, including the imported record.txt."""
+        (best,) = self.conn.execute(
+            "SELECT MAX(score) FROM scores"
+        ).fetchone()
+        return max(best or 0, int(self.get_meta("legacy_record") or 0))
+
+    # --- Metadata ---
+    def get_meta(self, key):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def set_meta(self, key, value):
+        """Stores a metadata value; call inside a transaction."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, str(value))
+        )
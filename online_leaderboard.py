@@ -0,0 +1,424 @@
+"""
+Bitso Tetris - shared online leaderboard.
+
+A small HTTP/JSON service built on asyncio streams (no dependencies),
+plus the client the game uses to talk to it.
+
+    GET  /scores?limit=10&offset=0  -> {"scores": [[name, score]...],
+                                        "count": n}
+    POST /scores  {"scores": [{"id", "name", "score"}...]}
+                                    -> {"ranks": [...]}
+
+The server stores scores in a leaderboard.Leaderboard. The client runs
+its own event loop on a background thread so the game never waits on
+the network. Scores are queued, sent in batches over kept-alive
+connections, and saved to a local file until the server confirms them,
+so scores made offline are sent on a later run. Top-N reads are served
+from a cache and refreshed in the background once their TTL expires.
+
+Run a server with:
+    python online_leaderboard.py --port 8765 --db online.db
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from leaderboard import Leaderboard
+
+
+QUEUE_FILE = "score_queue.json"
+MAX_BATCH = 50
+MAX_BODY = 64 * 1024
+MAX_HEADERS = 100
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+# === HTTP/1.1 Framing ===
+class BodyTooLarge(ValueError):
+    """Raised when a message declares a body over MAX_BODY."""
+
+
+async def read_message(reader):
+    """Reads a start line, headers and body; returns None at EOF."""
+    start = await reader.readline()
+    if not start:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise ValueError("Too many headers")
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY:
+        raise BodyTooLarge("Body too large")
+    body = await reader.readexactly(length) if length else b""
+    return start.decode("latin-1").split(None, 2), headers, body
+
+
+def encode_message(start, payload, extra_headers=()):
+    """Returns a JSON HTTP message with the given start line."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    lines = [start, "Content-Type: application/json",
+             f"Content-Length: {len(body)}", *extra_headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+# === Server ===
+def parse_entry(entry):
+    """Returns (id, name, score) of one submitted score."""
+    score = int(entry["score"])
+    if not -2 ** 63 <= score < 2 ** 63:
+        raise ValueError("Score out of range")  # SQLite INTEGER limits
+    return str(entry["id"]), str(entry["name"])[:12], score
+
+
+class LeaderboardServer:
+    """Serves a Leaderboard over HTTP with kept-alive connections.
+
+    Retried submissions are recognized by their client-made ids (the
+    last few thousand are remembered), so a batch whose reply was lost
+    is not counted twice.
+    """
+
+    def __init__(self, board, seen_ids=4096):
+        self.board = board
+        self.seen = OrderedDict()  # Submission id -> rank
+        self.seen_limit = seen_ids
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Starts listening and returns the bound port (0 picks one)."""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    message = await read_message(reader)
+                    if message is None:
+                        break
+                    (method, target, *_), headers, body = message
+                except ValueError as e:
+                    # The stream cannot be trusted after a bad frame
+                    status = 413 if isinstance(e, BodyTooLarge) else 400
+                    writer.write(encode_message(
+                        f"HTTP/1.1 {status} {REASONS[status]}", None,
+                        ["Connection: close"]
+                    ))
+                    break
+                status, payload = self.route(method, target, body)
+                writer.write(encode_message(
+                    f"HTTP/1.1 {status} {REASONS[status]}", payload
+                ))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method, target, body):
+        """Returns (status, JSON payload) for one request."""
+        url = urlsplit(target)
+        if url.path != "/scores":
+            return 404, {"error": "not found"}
+        try:
+            if method == "GET":
+                query = parse_qs(url.query)
+                limit = int(query.get("limit", ["10"])[0])
+                limit = max(1, min(limit, 100))
+                offset = max(0, int(query.get("offset", ["0"])[0]))
+                rows = self.board.top(limit, offset)
+                return 200, {"scores": rows, "count": self.board.count()}
+            if method == "POST":
+                entries = json.loads(body)["scores"][:MAX_BATCH]
+                # Check the whole batch first so a bad entry stores none
+                entries = [parse_entry(entry) for entry in entries]
+                return 200, {"ranks": [self.add(*e) for e in entries]}
+        except (ValueError, KeyError, TypeError, OverflowError):
+            return 400, {"error": "bad request"}
+        except sqlite3.Error:
+            return 500, {"error": "storage error"}
+        return 404, {"error": "not found"}
+
+    def add(self, key, name, score):
+        if key in self.seen:
+            return self.seen[key]
+        rank = self.board.add(name, score)
+        self.seen[key] = rank
+        if len(self.seen) > self.seen_limit:
+            self.seen.popitem(last=False)
+        return rank
+
+
+# === Client ===
+class ConnectionPool:
+    """Reuses kept-alive connections to one host."""
+
+    def __init__(self, host, port, size=2, timeout=3.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.idle = []
+
+    async def request(self, method, path, payload=None):
+        """Sends one request and returns (status, decoded JSON body)."""
+        # A pooled connection may have been closed by the server, so a
+        # failure on one is retried once on a fresh connection
+        for attempt in range(2):
+            reused = bool(self.idle)
+            if reused:
+                reader, writer = self.idle.pop()
+            else:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port),
+                    self.timeout
+                )
+            try:
+                writer.write(encode_message(
+                    f"{method} {path} HTTP/1.1", payload,
+                    [f"Host: {self.host}:{self.port}"]
+                ))
+                await writer.drain()
+                message = await asyncio.wait_for(
+                    read_message(reader), self.timeout
+                )
+                if message is None:
+                    raise ConnectionError("Connection closed")
+            except (OSError, ConnectionError, asyncio.TimeoutError,
+                    asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            (_, status, *_), _, body = message
+            if len(self.idle) < self.size:
+                self.idle.append((reader, writer))
+            else:
+                writer.close()
+            return int(status), json.loads(body) if body else None
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+
+class LeaderboardClient:
+    """Non-blocking client for the game: queued writes, cached reads.
+
+    Every public method returns right away. The network work, and every
+    change to the pending queue and its file, happens on the client's
+    own event loop thread.
+    """
+
+    def __init__(self, url, queue_path=QUEUE_FILE, ttl=30.0,
+                 flush_interval=1.0, batch_size=20, timeout=3.0):
+        parts = urlsplit(url)
+        self.pool = ConnectionPool(
+            parts.hostname, parts.port or 80, timeout=timeout
+        )
+        self.queue_path = queue_path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.pending = self.load_queue()
+        self.cache = {}  # (limit, offset) -> (fetched at, rows, count)
+        self.refreshing = set()
+        self.online = None  # Unknown until the first request
+        self.loop = asyncio.new_event_loop()
+        self.wake = None
+        self.flusher_task = None
+        ready = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run_loop, args=(ready,), daemon=True
+        )
+        self.thread.start()
+        ready.wait()
+
+    # --- Game-facing API ---
+    def submit(self, name, score):
+        """Queues a score for upload."""
+        entry = {"id": uuid.uuid4().hex, "name": name, "score": score}
+        self.loop.call_soon_threadsafe(self.enqueue, entry)
+
+    def top(self, limit=10, offset=0):
+        """Returns cached (rows, count), refreshing it when stale.
+
+        Returns (None, 0) until the first fetch for this page arrives.
+        """
+        key = (limit, offset)
+        cached = self.cache.get(key)
+        if cached is None or time.monotonic() - cached[0] > self.ttl:
+            if key not in self.refreshing:
+                self.refreshing.add(key)
+                asyncio.run_coroutine_threadsafe(
+                    self.refresh(limit, offset), self.loop
+                )
+        if cached is None:
+            return None, 0
+        return cached[1], cached[2]
+
+    def close(self, timeout=1.0):
+        """Tries a last flush, then stops the client thread."""
+        future = asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop)
+        try:
+            future.result(timeout)
+        except Exception:
+            pass  # The queue file keeps whatever was not sent
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+    # --- Event loop side ---
+    def run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.wake = asyncio.Event()
+        self.flusher_task = self.loop.create_task(self.flusher())
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    def enqueue(self, entry):
+        """Adds a score to the queue, saves it and wakes the flusher."""
+        self.pending.append(entry)
+        self.save_queue()
+        self.wake.set()
+
+    async def shutdown(self):
+        self.flusher_task.cancel()
+        await asyncio.gather(self.flusher_task, return_exceptions=True)
+        try:
+            await self.flush()
+        finally:
+            self.pool.close()
+
+    async def flusher(self):
+        """Sends queued scores in batches, backing off while offline."""
+        delay = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            if await self.flush():
+                delay = self.flush_interval
+            else:
+                delay = min(delay * 2, 60.0)
+
+    async def flush(self):
+        """Sends every queued score; returns False if the server is down."""
+        while True:
+            batch = self.pending[:self.batch_size]
+            if not batch:
+                return True
+            try:
+                status, _ = await self.pool.request(
+                    "POST", "/scores", {"scores": batch}
+                )
+            except (OSError, ConnectionError, asyncio.TimeoutError,
+                    asyncio.IncompleteReadError, ValueError):
+                self.online = False
+                return False
+            self.online = True
+            if status not in (200, 400):
+                return False
+            # A 400 means the batch will never be accepted; drop it
+            # rather than retrying it forever
+            sent = {entry["id"] for entry in batch}
+            self.pending = [e for e in self.pending if e["id"] not in sent]
+            self.save_queue()
+
+    async def refresh(self, limit, offset):
+        try:
+            status, payload = await self.pool.request(
+                "GET", f"/scores?limit={limit}&offset={offset}"
+            )
+            if status == 200:
+                rows = [tuple(row) for row in payload["scores"]]
+                self.cache[(limit, offset)] = (
+                    time.monotonic(), rows, payload["count"]
+                )
+                self.online = True
+        except (OSError, ConnectionError, asyncio.TimeoutError,
+                asyncio.IncompleteReadError, ValueError):
+            self.online = False
+        finally:
+            self.refreshing.discard((limit, offset))
+
+    # --- Offline queue ---
+    def load_queue(self):
+        """Returns the saved scores, dropping entries that are malformed."""
+        try:
+            with open(self.queue_path, "r") as f:
+                entries = list(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return []
+        pending = []
+        for entry in entries:
+            # One bad entry would otherwise fail flush() or its batch
+            try:
+                key, name, score = parse_entry(entry)
+            except (ValueError, KeyError, TypeError, OverflowError):
+                continue
+            pending.append({"id": key, "name": name, "score": score})
+        return pending
+
+    def save_queue(self):
+        """Writes the pending scores, or removes the file when empty."""
+        try:
+            if not self.pending:
+                if os.path.exists(self.queue_path):
+                    os.remove(self.queue_path)
+                return
+            temp = self.queue_path + ".tmp"
+            with open(temp, "w") as f:
+                json.dump(self.pending, f)
+            os.replace(temp, self.queue_path)
+        except OSError:
+            pass
+
+
+# === Command Line ===
+async def serve(host, port, db):
+    server = LeaderboardServer(Leaderboard(db, legacy=False))
+    port = await server.start(host, port)
+    print(f"Leaderboard server on http://{host}:{port}/scores")
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the shared Bitso Tetris leaderboard server."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default="online.db")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.db))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
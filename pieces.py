@@ -0,0 +1,160 @@
+"""
+Bitso Tetris - piece shapes and colors.
+
+Each piece is a list of rotations, each rotation a 0/1 matrix.
+Pieces are referred to by their index into PIECES, which is also
+the index of their color in COLORS.
+
+The matrices are compiled once at load time into PieceGeometry tables,
+so the hot paths only touch the four occupied cells or a few row masks.
+"""
+
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+from config import CONFIG
+
+
+# === Pieces and Colors ===
+PIECES = [
+    # I
+    [
+        [[1, 1, 1, 1]],
+        [[1], [1], [1], [1]]
+    ],
+    # O
+    [
+        [[1, 1],
+         [1, 1]]
+    ],
+    # T
+    [
+        [[0, 1, 0],
+         [1, 1, 1],
+         [0, 0, 0]],
+        [[0, 1, 0],
+         [0, 1, 1],
+         [0, 1, 0]],
+        [[0, 0, 0],
+         [1, 1, 1],
+         [0, 1, 0]],
+        [[0, 1, 0],
+         [1, 1, 0],
+         [0, 1, 0]]
+    ],
+    # S
+    [
+        [[0, 1, 1],
+         [1, 1, 0]],
+        [[1, 0],
+         [1, 1],
+         [0, 1]]
+    ],
+    # Z
+    [
+        [[1, 1, 0],
+         [0, 1, 1]],
+        [[0, 1],
+         [1, 1],
+         [1, 0]]
+    ],
+    # J
+    [
+        [[1, 0, 0],
+         [1, 1, 1]],
+        [[0, 1, 1],
+         [0, 1, 0],
+         [0, 1, 0]],
+        [[1, 1, 1],
+         [0, 0, 1]],
+        [[0, 1, 0],
+         [0, 1, 0],
+         [1, 1, 0]]
+    ],
+    # L
+    [
+        [[0, 0, 1],
+         [1, 1, 1]],
+        [[0, 1, 0],
+         [0, 1, 0],
+         [0, 1, 1]],
+        [[1, 1, 1],
+         [1, 0, 0]],
+        [[1, 1, 0],
+         [0, 1, 0],
+         [0, 1, 0]]
+    ]
+]
+
+
+COLORS = [
+    (34, 221, 145),  # Bitso green main
+    (20, 180, 120),  # Darker green
+    (70, 240, 180),  # Aqua green
+    (50, 200, 130),  # Medium green
+    (60, 160, 120),  # Moss green
+    (90, 255, 190),  # Light green
+    (0, 100, 80)     # Deep dark green
+]
+
+
+def new_piece(rng=random):
+    """Returns a random piece index drawn from the given generator."""
+    return rng.randint(0, len(PIECES) - 1)
+
+
+# === Compiled Geometry ===
+# cells:  (row, col) offsets of the occupied cells from the matrix origin
+# top:    first occupied row of the matrix
+# left:   first occupied column of the matrix
+# width:  columns spanned from the origin to the rightmost occupied cell
+# height: rows spanned from the origin to the lowest occupied cell
+# masks:  {x: row masks shifted to column x}, one entry per legal x,
+#         covering rows ``top`` to ``height - 1``
+# bottom: (col, row) of the lowest occupied cell in each column
+PieceGeometry = namedtuple(
+    "PieceGeometry",
+    ["cells", "top", "left", "width", "height", "masks", "bottom"]
+)
+
+
+def compile_rotation(shape, columns):
+    """Compiles one rotation matrix for a board of the given width."""
+    cells = tuple(
+        (i, j)
+        for i, row in enumerate(shape)
+        for j, cell in enumerate(row)
+        if cell == 1
+    )
+    top = min(i for i, _ in cells)
+    left = min(j for _, j in cells)
+    height = max(i for i, _ in cells) + 1
+    width = max(j for _, j in cells) + 1
+    base = [0] * (height - top)
+    for i, j in cells:
+        base[i - top] |= 1 << j
+    masks = {}
+    for x in range(-left, columns - width + 1):
+        if x >= 0:
+            masks[x] = tuple(mask << x for mask in base)
+        else:
+            masks[x] = tuple(mask >> -x for mask in base)
+    lowest = {}
+    for i, j in cells:
+        lowest[j] = max(i, lowest.get(j, i))
+    bottom = tuple(sorted(lowest.items()))
+    return PieceGeometry(cells, top, left, width, height, masks, bottom)
+
+
+@lru_cache(maxsize=None)
+def compile_pieces(columns):
+    """Returns GEOMETRY-style tables for a board of the given width."""
+    return tuple(
+        tuple(compile_rotation(shape, columns) for shape in rotations)
+        for rotations in PIECES
+    )
+
+
+# GEOMETRY[piece][rotation] for the configured board width
+GEOMETRY = compile_pieces(CONFIG["COLUMNS"])
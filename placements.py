@@ -0,0 +1,106 @@
+"""
+Bitso Tetris - reachable placement search.
+
+Breadth-first search over the moves a player can actually make (left,
+right, rotate and soft drop, the same rules GameState.step applies), so
+the results include soft-drop tucks and spins under overhangs. Each
+placement carries the shortest input path that reaches it.
+"""
+
+from collections import namedtuple, deque
+from functools import lru_cache
+
+from pieces import compile_pieces
+
+
+# Moves explored by the search, named like GameState.step() actions
+MOVES = ("left", "right", "rotate", "down")
+
+Placement = namedtuple("Placement", ["rotation", "x", "y", "path"])
+
+
+def reachable_placements(board, piece, rotation=0, x=None, y=0):
+    """Returns every resting placement the piece can reach.
+
+    The search starts from the given rotation and position (the spawn
+    position by default). Each Placement's ``path`` is a tuple of MOVES;
+    playing it and then locking the piece ("gravity" or "hard_drop")
+    puts the piece at (rotation, x, y).
+    """
+    if x is None:
+        x = (board.width - 4) // 2
+    return _search(
+        tuple(board.rows), board.height, board.width, piece, rotation, x, y
+    )
+
+
+def row_placements(rows, width, piece, rotation=0, x=None, y=0):
+    """Same as reachable_placements, for a tuple of row masks."""
+    if x is None:
+        x = (width - 4) // 2
+    return _search(rows, len(rows), width, piece, rotation, x, y)
+
+
+@lru_cache(maxsize=1024)
+def _search(rows, height, width, piece, rotation, x, y):
+    """Memoized BFS keyed on the board rows and the start state."""
+    rotations = compile_pieces(width)[piece]
+    count = len(rotations)
+
+    def fits(state):
+        r, sx, sy = state
+        geometry = rotations[r]
+        masks = geometry.masks.get(sx)
+        if masks is None:
+            return False
+        top = sy + geometry.top
+        if top < 0 or top + len(masks) > height:
+            return False
+        for i, mask in enumerate(masks):
+            if rows[top + i] & mask:
+                return False
+        return True
+
+    start = (rotation, x, y)
+    if not fits(start):
+        return ()
+    parents = {start: None}
+    queue = deque([start])
+    resting = []
+    while queue:
+        state = queue.popleft()
+        r, sx, sy = state
+        below = (r, sx, sy + 1)
+        neighbours = (
+            ("left", (r, sx - 1, sy)),
+            ("right", (r, sx + 1, sy)),
+            ("rotate", ((r + 1) % count, sx, sy)),
+            ("down", below),
+        )
+        if not fits(below):
+            resting.append(state)
+        for move, nxt in neighbours:
+            if nxt not in parents and fits(nxt):
+                parents[nxt] = (state, move)
+                queue.append(nxt)
+    placements = []
+    for state in resting:
+        path = []
+        step = parents[state]
+        while step is not None:
+            state_before, move = step
+            path.append(move)
+            step = parents[state_before]
+        placements.append(Placement(*state, tuple(reversed(path))))
+    return tuple(placements)
+
+
+def game_placements(game):
+    """Returns the placements reachable from the game's current piece."""
+    return reachable_placements(
+        game.board,
+        game.current_piece,
+        game.current_rotation,
+        game.piece_x,
+        game.piece_y
+    )
@@ -0,0 +1,155 @@
+"""
+Bitso Tetris - frame profiler and debug overlay.
+
+The main loop calls ``lap(phase)`` after each of its phases, and every
+frame's per-phase times go into a ring buffer holding the last few
+seconds. The overlay (F3 in game) shows rolling p50/p95/p99 frame times,
+the average cost of each phase and a sparkline. The buffer can be
+written to CSV (F4) to track down frame spikes.
+"""
+
+import csv
+import time
+from collections import deque
+
+import pygame
+
+from hud import get_font
+
+
+# Main loop phases in the order they run; "sync" is the advisor, the
+# autosave and the spectator broadcast, "wait" is clock.tick()
+PHASES = (
+    "events", "input", "logic", "sync", "board", "ghost", "piece", "hud",
+    "overlay", "present", "wait",
+)
+PHASE_INDEX = {phase: i for i, phase in enumerate(PHASES)}
+
+
+def percentile(sorted_values, pct):
+    """Returns the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1,
+                      round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a ring buffer of ``size`` frames."""
+
+    def __init__(self, size=600, clock=time.perf_counter):
+        self.clock = clock
+        self.frames = deque(maxlen=size)  # (total, *phase seconds)
+        self.current = None
+        self.start = self.last = 0.0
+
+    def begin(self):
+        """Starts timing a frame, dropping an unfinished one."""
+        self.start = self.last = self.clock()
+        self.current = [0.0] * len(PHASES)
+
+    def lap(self, phase):
+        """Adds the time since the previous lap to ``phase``."""
+        if self.current is None:
+            return
+        now = self.clock()
+        self.current[PHASE_INDEX[phase]] += now - self.last
+        self.last = now
+
+    def end(self):
+        """Stores the frame that begin() started."""
+        if self.current is None:
+            return
+        self.frames.append((self.last - self.start, *self.current))
+        self.current = None
+
+    def percentiles(self, pcts=(50, 95, 99)):
+        """Returns frame-time percentiles in milliseconds."""
+        totals = sorted(frame[0] for frame in self.frames)
+        return [percentile(totals, pct) * 1000 for pct in pcts]
+
+    def phase_means(self, frames=60):
+        """Returns each phase's mean milliseconds over the last frames."""
+        recent = list(self.frames)[-frames:]
+        if not recent:
+            return [0.0] * len(PHASES)
+        return [
+            sum(frame[i + 1] for frame in recent) / len(recent) * 1000
+            for i in range(len(PHASES))
+        ]
+
+    def dump_csv(self, path):
+        """Writes the buffered frames, one row per frame, in ms."""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "total_ms"] + list(PHASES))
+            for n, frame in enumerate(self.frames):
+                writer.writerow(
+                    [n] + [f"{seconds * 1000:.3f}" for seconds in frame]
+                )
+
+
+class ProfilerOverlay:
+    """Draws the profiler stats into a screen rectangle."""
+
+    TEXT_COLOR = (200, 255, 200)
+    BACKGROUND_COLOR = (0, 0, 0)
+    SPARK_FRAMES = 120
+    REFRESH_FRAMES = 15  # Redraw a few times a second, not every frame
+
+    def __init__(self, profiler, rect):
+        self.profiler = profiler
+        self.rect = pygame.Rect(rect)
+        self.visible = False
+        self.font = None
+        self.countdown = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.countdown = 0
+
+    def draw(self, surface, renderer):
+        """Refreshes the overlay every few frames and marks its rect."""
+        if not self.visible:
+            return
+        self.countdown -= 1
+        if self.countdown > 0:
+            return
+        self.countdown = self.REFRESH_FRAMES
+        if self.font is None:
+            self.font = get_font("Courier", 12)
+        rect = self.rect
+        surface.fill(self.BACKGROUND_COLOR, rect)
+        p50, p95, p99 = self.profiler.percentiles()
+        lines = [f"frame p50 {p50:.1f} p95 {p95:.1f} p99 {p99:.1f} ms"]
+        means = self.profiler.phase_means()
+        for i in range(0, len(PHASES), 2):
+            lines.append("  ".join(
+                f"{PHASES[j]:<7}{means[j]:5.2f}"
+                for j in range(i, min(i + 2, len(PHASES)))
+            ))
+        y = rect.y + 2
+        for line in lines:
+            # Uncached on purpose: these strings change every refresh
+            text = self.font.render(line, True, self.TEXT_COLOR)
+            surface.blit(text, (rect.x + 4, y))
+            y += text.get_height()
+        self.draw_sparkline(surface, pygame.Rect(
+            rect.x + 4, y + 4, rect.width - 8, rect.bottom - y - 8
+        ))
+        renderer.mark(rect)
+
+    def draw_sparkline(self, surface, rect):
+        """Plots recent frame totals, scaled to the slowest one."""
+        totals = [frame[0] for frame in self.profiler.frames]
+        totals = totals[-self.SPARK_FRAMES:]
+        if len(totals) < 2 or rect.height <= 0:
+            return
+        peak = max(totals) or 1.0
+        step = rect.width / (self.SPARK_FRAMES - 1)
+        points = [
+            (rect.x + i * step, rect.bottom - value / peak * rect.height)
+            for i, value in enumerate(totals)
+        ]
+        pygame.draw.lines(surface, self.TEXT_COLOR, False, points)
@@ -0,0 +1,311 @@
+"""
+Bitso Tetris - playfield rendering.
+
+Every cell is one blit from a pre-rendered sprite atlas. The plain
+helpers draw the board and pieces in full. The Renderer remembers what
+every cell and HUD region looked like on the previous frame, redraws
+only what changed and pushes just those rectangles with
+pygame.display.update().
+
+Boards taller than the window are drawn through a viewport: only the
+visible rows are keyed, compared and blitted, and the view scrolls to
+keep the falling piece (and, when it fits, its landing spot) in sight.
+"""
+
+from functools import lru_cache
+
+import pygame
+
+from config import CONFIG
+from engine import PALETTE
+from pieces import GEOMETRY
+
+
+BOARD_TOP = 60  # Pixel offset of the board below the title
+BORDER_COLOR = (80, 80, 80)
+GHOST_COLOR = (50, 50, 50)
+GHOST_BORDER_COLOR = (100, 100, 100)
+FLASH_COLOR = (255, 255, 255)
+HINT_COLOR = (30, 30, 60)
+HINT_BORDER_COLOR = (110, 110, 200)
+
+# Cell keys tracked by the Renderer after the PALETTE color indices
+GHOST = len(PALETTE)
+FLASH = GHOST + 1
+HINT = FLASH + 1
+
+SCROLL_MARGIN = 2  # Rows kept above a piece the view jumps to
+
+
+def cell_rect(row, col, pixel_offset=0):
+    """Returns the screen rectangle of a board cell."""
+    size = CONFIG["CELL_SIZE"]
+    return pygame.Rect(
+        col * size, row * size + BOARD_TOP + pixel_offset, size, size
+    )
+
+
+def board_rect(board, rows=None):
+    """Returns the screen rectangle covered by the board's visible rows."""
+    size = CONFIG["CELL_SIZE"]
+    rows = board.height if rows is None else rows
+    return pygame.Rect(0, BOARD_TOP, board.width * size, rows * size)
+
+
+def visible_rows(height):
+    """Returns how many board rows fit in a window of the given height."""
+    return max(1, (height - BOARD_TOP - 20) // CONFIG["CELL_SIZE"])
+
+
+@lru_cache(maxsize=None)
+def get_atlas(size):
+    """Returns one pre-rendered cell surface per Renderer key.
+
+    Entries 0 to len(PALETTE) - 1 are the board colors (0 is the empty
+    cell), followed by the GHOST, FLASH and HINT variants.
+    """
+    atlas = []
+    styles = [(color, BORDER_COLOR) for color in PALETTE]
+    styles.append((GHOST_COLOR, GHOST_BORDER_COLOR))
+    styles.append((FLASH_COLOR, None))
+    styles.append((HINT_COLOR, HINT_BORDER_COLOR))
+    for color, border in styles:
+        sprite = pygame.Surface((size, size))
+        sprite.fill(color)
+        if border is not None:
+            pygame.draw.rect(sprite, border, sprite.get_rect(), 1)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()
+        atlas.append(sprite)
+    return atlas
+
+
+def draw_cell(surface, pos, key):
+    """Blits the atlas sprite for a cell key at a screen position."""
+    surface.blit(get_atlas(CONFIG["CELL_SIZE"])[key], pos)
+
+
+def draw_board(surface, board, top=0, rows=None):
+    """Draws the Tetris board and cell grid, or ``rows`` rows of it."""
+    atlas = get_atlas(CONFIG["CELL_SIZE"])
+    width = board.width
+    rows = board.height if rows is None else rows
+    surface.blits(
+        [
+            (atlas[key], cell_rect(index // width, index % width))
+            for index, key in enumerate(
+                board.colors[top * width:(top + rows) * width]
+            )
+        ],
+        doreturn=False
+    )
+
+
+def draw_piece(
+    surface, piece, rotation, piece_x, piece_y, pixel_offset=0
+):
+    """Draws a piece at its board position."""
+    sprite = get_atlas(CONFIG["CELL_SIZE"])[piece + 1]
+    surface.blits(
+        [
+            (sprite, cell_rect(piece_y + i, piece_x + j, pixel_offset))
+            for i, j in GEOMETRY[piece][rotation].cells
+        ],
+        doreturn=False
+    )
+
+
+def draw_ghost_piece(surface, game):
+    """Draws a shadow showing where the current piece will land."""
+    distance = game.drop_distance()
+    if distance == 0:
+        return
+    ghost_y = game.piece_y + distance
+    geometry = GEOMETRY[game.current_piece][game.current_rotation]
+    for i, j in geometry.cells:
+        draw_cell(surface, cell_rect(ghost_y + i, game.piece_x + j), GHOST)
+
+
+# === Dirty Rectangle Renderer ===
+class Renderer:
+    """Redraws only what changed since the last presented frame."""
+
+    def __init__(self, surface, background=None, view_rows=None):
+        self.surface = surface
+        self.background = background  # Paints the static layer
+        self.view_rows = view_rows  # Rows shown at once, None for all
+        self.top = 0  # First board row in view
+        self.stale = True
+        self.rects = []
+        self.full = True
+        self.cells = None  # Keys drawn last frame, None redraws all
+        self.overdrawn = set()  # Cells covered by an offset piece
+        self.values = {}
+        self.profiler = None  # Optional FrameProfiler for phase timings
+
+    def lap(self, phase):
+        """Reports a finished drawing phase to the attached profiler."""
+        if self.profiler is not None:
+            self.profiler.lap(phase)
+
+    def invalidate(self):
+        """Marks the window as overwritten by another screen."""
+        self.stale = True
+
+    def begin_frame(self):
+        """Repaints the static layer if the window was invalidated."""
+        if not self.stale:
+            return
+        if self.background:
+            self.background(self.surface)
+        self.stale = False
+        self.full = True
+        self.cells = None
+        self.overdrawn = set()
+        self.values.clear()
+
+    def mark(self, rect):
+        """Adds a screen rectangle to the next display update."""
+        if not self.full:
+            self.rects.append(rect)
+
+    def changed(self, key, value):
+        """Returns True if a HUD value differs from the last drawn one."""
+        if self.values.get(key, self) == value:
+            return False
+        self.values[key] = value
+        return True
+
+    def scroll(self, game):
+        """Returns the first row in view, scrolling as little as possible.
+
+        The view keeps the rows from the falling piece to where it will
+        land on screen when they fit. Otherwise it follows the piece a
+        page at a time, since every scroll redraws the whole view.
+        """
+        board = game.board
+        rows = board.height if self.view_rows is None else self.view_rows
+        if rows >= board.height:
+            return 0
+        geometry = GEOMETRY[game.current_piece][game.current_rotation]
+        piece_top = game.piece_y + geometry.top
+        piece_bottom = game.piece_y + geometry.height
+        landing = piece_bottom + game.drop_distance()
+        top = self.top
+        if landing - piece_top < rows:
+            top = min(max(top, landing + 1 - rows), piece_top)
+        elif not top <= piece_top <= piece_bottom <= top + rows:
+            top = piece_top - SCROLL_MARGIN
+        return min(max(top, 0), board.height - rows)
+
+    def frame_keys(self, game, with_piece=True, flash_rows=(), hint=None):
+        """Returns the key of every board cell in view for the game."""
+        board = game.board
+        width = board.width
+        top = self.top
+        rows = board.height if self.view_rows is None else self.view_rows
+        rows = min(rows, board.height - top)
+        base = top * width
+        keys = list(board.colors[base:base + rows * width])
+        size = len(keys)
+        self.lap("board")
+        if hint is not None:
+            # Suggested resting place; the ghost and piece draw over it
+            start = hint.y * width + hint.x - base
+            for i, j in GEOMETRY[game.current_piece][hint.rotation].cells:
+                index = start + i * width + j
+                if 0 <= index < size:
+                    keys[index] = HINT
+        cells = GEOMETRY[game.current_piece][game.current_rotation].cells
+        start = game.piece_y * width + game.piece_x - base
+        distance = game.drop_distance()
+        if distance:
+            ghost = start + distance * width
+            for i, j in cells:
+                index = ghost + i * width + j
+                if 0 <= index < size:
+                    keys[index] = GHOST
+        self.lap("ghost")
+        if with_piece:
+            color = game.current_piece + 1
+            for i, j in cells:
+                index = start + i * width + j
+                if 0 <= index < size:
+                    keys[index] = color
+        self.lap("piece")
+        for row in flash_rows:
+            row -= top
+            if 0 <= row < rows:
+                keys[row * width:(row + 1) * width] = [FLASH] * width
+        return keys
+
+    def draw_playfield(self, game, pixel_offset=0, flash_rows=(),
+                       hint=None):
+        """Draws the changed board cells, ghost and active piece.
+
+        ``pixel_offset`` draws the active piece between rows and
+        ``flash_rows`` paints whole rows white, for the entry and
+        line-clear effects. ``hint`` outlines a suggested Placement.
+        """
+        self.begin_frame()
+        board = game.board
+        width = board.width
+        top = self.scroll(game)
+        if top != self.top:
+            self.top = top
+            self.cells = None
+            self.overdrawn = set()
+        keys = self.frame_keys(
+            game, with_piece=pixel_offset == 0, flash_rows=flash_rows,
+            hint=hint
+        )
+        last = self.cells
+        overdrawn = self.overdrawn
+        atlas = get_atlas(CONFIG["CELL_SIZE"])
+        sprites = []
+        redraw = last is None
+        if redraw:
+            # After a scroll every cell changes; update the view at once
+            self.mark(board_rect(board, len(keys) // width))
+        for index, key in enumerate(keys):
+            if redraw or last[index] != key or index in overdrawn:
+                rect = cell_rect(index // width, index % width)
+                sprites.append((atlas[key], rect))
+                if not redraw:
+                    self.mark(rect)
+        self.surface.blits(sprites, doreturn=False)
+        self.lap("board")
+        self.overdrawn = set()
+        self.cells = keys
+        if pixel_offset:
+            self.draw_offset_piece(game, pixel_offset)
+            self.lap("piece")
+
+    def draw_offset_piece(self, game, pixel_offset):
+        """Draws the active piece between rows, clipped to the view."""
+        board = game.board
+        top = self.top
+        rows = len(self.cells) // board.width
+        clip = board_rect(board, rows)
+        self.surface.set_clip(clip)
+        geometry = GEOMETRY[game.current_piece][game.current_rotation]
+        for i, j in geometry.cells:
+            row = game.piece_y + i - top
+            col = game.piece_x + j
+            rect = cell_rect(row, col, pixel_offset)
+            draw_cell(self.surface, rect, game.current_piece + 1)
+            self.mark(rect.clip(clip))
+            # The piece straddles this cell and the one above it
+            for covered in (row, row - 1):
+                if 0 <= covered < rows:
+                    self.overdrawn.add(covered * board.width + col)
+        self.surface.set_clip(None)
+
+    def present(self):
+        """Pushes the frame to the display, flipping only when needed."""
+        if self.full:
+            pygame.display.flip()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects = []
+        self.full = False
@@ -0,0 +1,416 @@
+"""
+Bitso Tetris - game recording and replay.
+
+A replay is the game's seed plus every GameState.step() call as a
+(tick, action) pair, so the game can be rebuilt exactly. Board keyframes
+are written every few seconds, which lets a Player jump to any tick by
+restoring the nearest keyframe and re-simulating only the last stretch.
+
+File layout (all integers are LEB128 varints):
+    header:   MAGIC, version, tick rate, rows, columns, seed,
+              keyframe interval
+    records:  (tick delta << 3 | code), then a payload for codes 6 and 7
+              0-5  an action, by its index in engine.ACTIONS
+              6    keyframe: event count, game fields, row masks and one
+                   color byte per filled cell
+              7    end: final score, lines and game-over flag
+"""
+
+import argparse
+import os
+import random
+import time
+from bisect import bisect_right
+
+from board import Board
+from config import CONFIG
+from engine import ACTIONS, GameState
+from pieces import new_piece
+
+
+MAGIC = b"BTRP"
+VERSION = 1
+KEYFRAME = 6
+END = 7
+KEYFRAME_TICKS = 600  # 10 seconds at 60 ticks per second
+REPLAY_DIR = "replays"
+
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+# GameState fields stored in a keyframe, in file order
+KEYFRAME_FIELDS = (
+    "score", "level", "total_lines", "fall_delay", "pieces_placed",
+    "current_piece", "next_piece", "current_rotation", "piece_x",
+    "piece_y", "game_over",
+)
+
+
+# === Varint Encoding ===
+def write_varint(out, value):
+    """Appends an unsigned integer to a bytearray as a LEB128 varint."""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """Returns (value, new position) of the varint at data[pos]."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(value):
+    """Maps a signed integer to an unsigned one (0, -1, 1, -2 ...)."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+# === Keyframes ===
+def encode_state(out, game):
+    """Appends the game's fields and board to a bytearray."""
+    for field in KEYFRAME_FIELDS:
+        write_varint(out, zigzag(int(getattr(game, field))))
+    board = game.board
+    for mask in board.rows:
+        write_varint(out, mask)
+    for row, mask in enumerate(board.rows):
+        for col in range(board.width):
+            if mask >> col & 1:
+                out.append(board.color_index(row, col))
+
+
+def decode_state(data, pos, rows, columns):
+    """Returns (fields dict, Board, new position) of an encoded state."""
+    fields = {}
+    for field in KEYFRAME_FIELDS:
+        value, pos = read_varint(data, pos)
+        fields[field] = unzigzag(value)
+    fields["game_over"] = bool(fields["game_over"])
+    masks = []
+    for _ in range(rows):
+        mask, pos = read_varint(data, pos)
+        masks.append(mask)
+    board = Board(rows, columns)
+    for row, mask in enumerate(masks):
+        for col in range(columns):
+            if mask >> col & 1:
+                board.fill(row, col, data[pos])
+                pos += 1
+    return fields, board, pos
+
+
+def restore_state(game, fields, board):
+    """Puts a decoded keyframe into a game created with the same seed.
+
+    The piece generator is rebuilt by re-seeding it and drawing the
+    pieces the game has drawn so far (two per reset, one per lock).
+    """
+    for field, value in fields.items():
+        setattr(game, field, value)
+    game.board = board.copy()
+    game.rng = random.Random(game.seed)
+    for _ in range(game.pieces_placed + 2):
+        new_piece(game.rng)
+
+
+# === Recording ===
+class Recorder:
+    """Records a GameState's steps, restarting on every reset.
+
+    ``ticks`` is a callable returning the current logic tick, such as
+    ``lambda: scheduler.ticks`` for a FixedStep.
+    """
+
+    def __init__(self, game, ticks, tick_rate=None,
+                 keyframe_ticks=KEYFRAME_TICKS):
+        self.game = game
+        self.ticks = ticks
+        if tick_rate is None:
+            tick_rate = CONFIG["TICK_RATE"]
+        self.tick_rate = tick_rate
+        self.keyframe_ticks = keyframe_ticks
+        game.recorder = self
+        self.start()
+
+    def start(self):
+        """Begins a new recording from the game's current (fresh) state."""
+        if self.game.seed is None:
+            raise ValueError("Recording needs a seeded game (no custom rng)")
+        self.start_tick = self.ticks()
+        self.last_tick = 0
+        self.last_keyframe = 0
+        self.events = 0
+        self.data = bytearray()
+
+    def record(self, action):
+        """Logs one step() call; called by GameState before it applies."""
+        code = ACTION_CODES.get(action)
+        if code is None:
+            return  # GameState.step raises for it
+        tick = self.ticks() - self.start_tick
+        if tick - self.last_keyframe >= self.keyframe_ticks:
+            self.write_record(tick, KEYFRAME)
+            write_varint(self.data, self.events)
+            encode_state(self.data, self.game)
+            self.last_keyframe = tick
+        self.write_record(tick, code)
+        self.events += 1
+
+    def mark(self):
+        """Returns the current end of the recording, for rewind()."""
+        return (
+            self.start_tick, len(self.data), self.events, self.last_tick,
+            self.last_keyframe,
+        )
+
+    def owns(self, mark):
+        """Returns True if a mark() was taken during this recording."""
+        return mark[0] == self.start_tick and mark[1] <= len(self.data)
+
+    def rewind(self, mark):
+        """Drops everything recorded after a mark() of this recording."""
+        if not self.owns(mark):
+            raise ValueError("Mark is from another recording")
+        _, size, events, last_tick, last_keyframe = mark
+        del self.data[size:]
+        self.events = events
+        self.last_tick = last_tick
+        self.last_keyframe = last_keyframe
+
+    def write_record(self, tick, code):
+        write_varint(self.data, (tick - self.last_tick) << 3 | code)
+        self.last_tick = tick
+
+    def to_bytes(self):
+        """Returns the replay file contents recorded so far."""
+        game = self.game
+        out = bytearray(MAGIC)
+        for value in (
+            VERSION,
+            self.tick_rate,
+            game.board.height,
+            game.board.width,
+            game.seed,
+            self.keyframe_ticks,
+        ):
+            write_varint(out, value)
+        out += self.data
+        tick = max(self.ticks() - self.start_tick, self.last_tick)
+        write_varint(out, (tick - self.last_tick) << 3 | END)
+        write_varint(out, game.score)
+        write_varint(out, game.total_lines)
+        write_varint(out, int(game.game_over))
+        return bytes(out)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+def replay_path(score, directory=REPLAY_DIR):
+    """Returns a new timestamped replay file path, creating the folder."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"{stamp}_{score}.rpl")
+
+
+# === Playback ===
+def read_header(data):
+    """Returns (tick rate, rows, columns, seed, keyframe interval, pos).
+
+    ``data`` can be any bytes-like object, such as an mmap of the file.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a replay file")
+    pos = len(MAGIC)
+    header = []
+    for _ in range(6):
+        value, pos = read_varint(data, pos)
+        header.append(value)
+    version = header.pop(0)
+    if version != VERSION:
+        raise ValueError(f"Unsupported replay version {version}")
+    return (*header, pos)
+
+
+def iter_records(data, pos, rows, columns):
+    """Yields (tick, code, payload) for each record from ``pos`` on.
+
+    The payload is the action name for codes 0-5, (event index, fields,
+    Board) for a keyframe and (score, lines, game_over) for the end.
+    """
+    tick = 0
+    while pos < len(data):
+        value, pos = read_varint(data, pos)
+        tick += value >> 3
+        code = value & 7
+        if code == KEYFRAME:
+            index, pos = read_varint(data, pos)
+            fields, board, pos = decode_state(data, pos, rows, columns)
+            yield tick, code, (index, fields, board)
+        elif code == END:
+            score, pos = read_varint(data, pos)
+            lines, pos = read_varint(data, pos)
+            over, pos = read_varint(data, pos)
+            yield tick, code, (score, lines, bool(over))
+            return
+        else:
+            yield tick, code, ACTIONS[code]
+
+
+class Replay:
+    """A decoded replay file: header, events and keyframes."""
+
+    def __init__(self, data):
+        (
+            self.tick_rate,
+            self.rows,
+            self.columns,
+            self.seed,
+            self.keyframe_ticks,
+            pos,
+        ) = read_header(data)
+        self.events = []  # (tick, action)
+        self.keyframes = []  # (tick, event index, fields, board)
+        self.final = None  # (score, lines, game_over)
+        tick = 0
+        for tick, code, payload in iter_records(
+            data, pos, self.rows, self.columns
+        ):
+            if code == KEYFRAME:
+                self.keyframes.append((tick, *payload))
+            elif code == END:
+                self.final = payload
+            else:
+                self.events.append((tick, payload))
+        self.length = tick
+        self.keyframe_times = [kf[0] for kf in self.keyframes]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+
+class Player:
+    """Re-simulates a Replay, forwards at any speed or by seeking."""
+
+    def __init__(self, replay, config=None):
+        self.replay = replay
+        config = dict(CONFIG if config is None else config)
+        config["ROWS"] = replay.rows
+        config["COLUMNS"] = replay.columns
+        self.tick = 0
+        self.position = 0.0  # Fractional tick for speed multiples
+        self.index = 0  # Next event to apply
+        self.game = GameState(config, clock=self.time, seed=replay.seed)
+
+    def time(self):
+        """Returns the replay's logic time in milliseconds."""
+        return int(self.tick * 1000 / self.replay.tick_rate)
+
+    @property
+    def finished(self):
+        return self.index >= len(self.replay.events)
+
+    def advance_to(self, tick):
+        """Applies every event up to and including ``tick``.
+
+        Returns the StepResults of the pieces that locked on the way.
+        """
+        events = self.replay.events
+        game = self.game
+        locked = []
+        while self.index < len(events) and events[self.index][0] <= tick:
+            self.tick, action = events[self.index]
+            result = game.step(action)
+            if result.locked:
+                locked.append(result)
+            self.index += 1
+        self.tick = max(self.tick, tick)
+        self.position = float(self.tick)
+        return locked
+
+    def play(self, elapsed_ms, speed=1.0):
+        """Advances by elapsed wall time times ``speed``."""
+        ticks = elapsed_ms * speed * self.replay.tick_rate / 1000
+        position = self.position + ticks
+        locked = self.advance_to(int(position))
+        self.position = position
+        return locked
+
+    def seek(self, tick):
+        """Jumps to ``tick`` via the nearest keyframe at or before it."""
+        replay = self.replay
+        k = bisect_right(replay.keyframe_times, tick) - 1
+        if k >= 0:
+            kf_tick, index, fields, board = replay.keyframes[k]
+            if tick < self.tick or index > self.index:
+                restore_state(self.game, fields, board)
+                self.tick = kf_tick
+                self.index = index
+        elif tick < self.tick:
+            self.game.reset(replay.seed)
+            self.tick = 0
+            self.index = 0
+        self.advance_to(tick)
+
+
+# === Command Line ===
+def board_text(board):
+    return "\n".join(
+        "".join("#" if mask >> col & 1 else "." for col in range(board.width))
+        for mask in board.rows
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Inspect or verify a Bitso Tetris replay file."
+    )
+    parser.add_argument("path")
+    parser.add_argument("--tick", type=int, help="show the game at a tick")
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="replay to the end and check the recorded final score"
+    )
+    args = parser.parse_args(argv)
+    replay = Replay.load(args.path)
+    print(
+        f"seed {replay.seed}, {len(replay.events)} events, "
+        f"{len(replay.keyframes)} keyframes, {replay.length} ticks"
+    )
+    player = Player(replay)
+    if args.tick is not None:
+        player.seek(args.tick)
+        game = player.game
+        print(
+            f"tick {player.tick}: score {game.score} lines "
+            f"{game.total_lines} level {game.level}"
+        )
+        print(board_text(game.board))
+    if args.verify:
+        player.seek(replay.length)
+        game = player.game
+        got = (game.score, game.total_lines, game.game_over)
+        if got == replay.final:
+            print(f"OK: score {game.score}, lines {game.total_lines}")
+        else:
+            print(f"MISMATCH: recorded {replay.final}, replayed {got}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
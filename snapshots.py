@@ -0,0 +1,120 @@
+"""
+Bitso Tetris - snapshot ring buffer and autosave.
+
+GameState.snapshot() returns an immutable Snapshot in a few
+microseconds. A SnapshotRing keeps the last N of them, each tagged with
+the tick it was taken at. Rollback netcode restores the newest snapshot
+at or before a late input's tick and re-simulates from there. Undo steps
+back one entry at a time.
+
+A snapshot can also be written to disk as an autosave. The file is
+replaced atomically, so a crash never leaves half a save behind.
+"""
+
+import json
+import os
+
+from engine import Snapshot
+
+
+AUTOSAVE_FILE = "autosave.json"
+
+
+class SnapshotRing:
+    """Fixed-size ring of (tick, Snapshot); the oldest is overwritten."""
+
+    def __init__(self, size=120):
+        self.slots = [None] * size
+        self.head = 0  # Slot the next push goes into
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yields (tick, Snapshot) pairs, oldest first."""
+        size = len(self.slots)
+        for i in range(self.count):
+            yield self.slots[(self.head - self.count + i) % size]
+
+    def push(self, tick, snapshot):
+        self.slots[self.head] = (tick, snapshot)
+        self.head = (self.head + 1) % len(self.slots)
+        self.count = min(self.count + 1, len(self.slots))
+
+    def latest(self):
+        """Returns the newest (tick, Snapshot), or None when empty."""
+        if not self.count:
+            return None
+        return self.slots[self.head - 1]
+
+    def pop(self):
+        """Removes and returns the newest (tick, Snapshot)."""
+        entry = self.latest()
+        if entry is not None:
+            self.head = (self.head - 1) % len(self.slots)
+            self.slots[self.head] = None
+            self.count -= 1
+        return entry
+
+    def at_or_before(self, tick):
+        """Returns the newest entry taken at or before ``tick``, or None.
+
+        Entries must have been pushed in tick order.
+        """
+        size = len(self.slots)
+        oldest = self.head - self.count
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.slots[(oldest + middle) % size][0] <= tick:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return None
+        return self.slots[(oldest + low - 1) % size]
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.head = 0
+        self.count = 0
+
+
+# === Autosave ===
+def save_snapshot(snapshot, path=AUTOSAVE_FILE):
+    """Writes a snapshot as JSON, replacing the file atomically."""
+    data = snapshot._asdict()
+    rows, colors, tops = snapshot.board
+    data["board"] = {"rows": rows, "colors": colors.hex(), "tops": tops}
+    data["recording"] = None  # Only meaningful in the running process
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(data, f)
+    os.replace(temp, path)
+
+
+def load_snapshot(path=AUTOSAVE_FILE):
+    """Returns the saved Snapshot, or None if it is missing or broken."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        board = data["board"]
+        data["board"] = (
+            tuple(board["rows"]), bytes.fromhex(board["colors"]),
+            tuple(board["tops"]),
+        )
+        state = data["rng_state"]
+        if state is not None:
+            # random.Random.setstate() only accepts tuples
+            data["rng_state"] = (state[0], tuple(state[1]), state[2])
+        return Snapshot(**data)
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+
+def remove_autosave(path=AUTOSAVE_FILE):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,477 @@
+"""
+Bitso Tetris - live spectating through a broadcast relay.
+
+A game publishes its board and piece to a relay whenever they change,
+and the relay fans each frame out to every spectator of that channel.
+A frame is encoded once, by the player, and the relay sends the same
+bytes object to all subscribers.
+
+A slow spectator never makes the relay buffer without limit. Each
+subscriber has a single pending-frame slot: while its connection is
+backed up, newer frames replace the pending one, so it skips stale
+frames and catches up on the latest.
+
+Wire format (TCP): one line ``PUB <channel>`` or ``SUB <channel>``, then
+length-prefixed frames of a STATE header followed by the color plane.
+
+Usage:
+    python spectate.py relay --port 8766
+    python spectate.py watch --relay 127.0.0.1:8766 --channel main
+    python spectate.py bot --relay 127.0.0.1:8766 --channel main
+"""
+
+import argparse
+import asyncio
+import struct
+import sys
+import threading
+import time
+
+from board import Board
+from config import CONFIG
+from engine import PALETTE
+from pieces import PIECES
+
+
+GAME_OVER = 1
+# flags, piece, rotation, x, y, next piece, score, lines, level, rows,
+# columns; followed by rows * columns color indices
+STATE = struct.Struct("<BBBhhBIHHHH")
+LENGTH = struct.Struct("<I")
+MAX_FRAME = 1024 * 1024
+HIGH_WATER = 16 * 1024  # Bytes a subscriber may have queued in the kernel
+PANEL_X = 330  # Spectator window: the board is scaled to fit left of this
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# === Frames ===
+def encode_frame(game):
+    """Returns the length-prefixed frame for the game's current state."""
+    board = game.board
+    body = STATE.pack(
+        GAME_OVER if game.game_over else 0,
+        game.current_piece, game.current_rotation,
+        game.piece_x, game.piece_y, game.next_piece,
+        game.score, game.total_lines & 0xFFFF, game.level,
+        board.height, board.width
+    ) + bytes(board.colors)
+    return LENGTH.pack(len(body)) + body
+
+
+def decode_frame(body):
+    """Returns (state dict, Board) from a frame body.
+
+    Raises ValueError for a truncated frame or out-of-range values.
+    """
+    (
+        flags, piece, rotation, piece_x, piece_y, next_piece,
+        score, lines, level, rows, columns
+    ) = STATE.unpack_from(body)
+    colors = body[STATE.size:STATE.size + rows * columns]
+    if len(colors) != rows * columns:
+        raise ValueError("Truncated frame")
+    if (
+        piece >= len(PIECES) or rotation >= len(PIECES[piece])
+        or next_piece >= len(PIECES) or not rows or not columns
+        or max(colors) >= len(PALETTE)
+    ):
+        raise ValueError("Invalid frame")
+    board = Board(rows, columns)
+    for index, color in enumerate(colors):
+        if color:
+            board.fill(index // columns, index % columns, color)
+    state = {
+        "game_over": bool(flags & GAME_OVER), "piece": piece,
+        "rotation": rotation, "x": piece_x, "y": piece_y,
+        "next": next_piece, "score": score, "lines": lines,
+        "level": level,
+    }
+    return state, board
+
+
+async def read_frame(reader):
+    """Returns the next (length-prefixed) frame, prefix included."""
+    prefix = await reader.readexactly(LENGTH.size)
+    (length,) = LENGTH.unpack(prefix)
+    if length > MAX_FRAME:
+        raise ValueError("Frame too large")
+    return prefix + await reader.readexactly(length)
+
+
+# === Broadcaster ===
+class Broadcaster:
+    """Publishes a game to a relay without ever blocking the game.
+
+    publish() only encodes the frame and compares it with the previous
+    one. Sending happens on the broadcaster's own event loop thread,
+    which reconnects when the relay goes away. If the connection backs
+    up, frames that were not sent yet are replaced by newer ones.
+    """
+
+    def __init__(self, relay, channel="main"):
+        self.address = parse_address(relay)
+        self.channel = channel
+        self.last = None
+        self.latest = None  # Next frame to send, owned by the loop
+        self.loop = asyncio.new_event_loop()
+        self.wake = None
+        self.sender_task = None
+        ready = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run_loop, args=(ready,), daemon=True
+        )
+        self.thread.start()
+        ready.wait()
+
+    def publish(self, game):
+        """Queues the game's state if it changed since the last call."""
+        frame = encode_frame(game)
+        if frame == self.last:
+            return
+        self.last = frame
+        self.loop.call_soon_threadsafe(self.offer, frame)
+
+    def close(self, timeout=1.0):
+        future = asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop)
+        try:
+            future.result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+    # --- Event loop side ---
+    def run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.wake = asyncio.Event()
+        self.sender_task = self.loop.create_task(self.sender())
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    def offer(self, frame):
+        self.latest = frame
+        self.wake.set()
+
+    async def shutdown(self):
+        self.sender_task.cancel()
+        await asyncio.gather(self.sender_task, return_exceptions=True)
+
+    async def sender(self):
+        """Keeps a relay connection open and sends the latest frame."""
+        delay = 0.5
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(*self.address)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10.0)
+                continue
+            delay = 0.5
+            try:
+                writer.write(f"PUB {self.channel}\n".encode())
+                while True:
+                    if self.latest is None:
+                        await self.wake.wait()
+                        self.wake.clear()
+                        continue
+                    frame, self.latest = self.latest, None
+                    writer.write(frame)
+                    await writer.drain()
+            except (OSError, ConnectionError):
+                # Resend the current state once reconnected
+                self.latest = self.latest or self.last
+            finally:
+                writer.close()
+
+
+# === Relay ===
+class Subscriber:
+    """One spectator connection with a single pending-frame slot."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = None
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, frame):
+        """Sets the next frame to send, replacing one still waiting."""
+        if self.pending is not None:
+            self.dropped += 1
+        self.pending = frame
+        self.ready.set()
+
+    async def pump(self):
+        """Writes pending frames, waiting while the socket is backed up."""
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            frame, self.pending = self.pending, None
+            self.writer.write(frame)
+            self.sent += 1
+            await self.writer.drain()
+
+
+class Channel:
+    """The latest frame of one game and who is watching it."""
+
+    def __init__(self):
+        self.latest = None
+        self.subscribers = set()
+        self.frames = 0
+        self.publishers = 0
+
+
+class Relay:
+    """Fans frames out from publishers to the subscribers of a channel."""
+
+    def __init__(self, high_water=HIGH_WATER):
+        self.high_water = high_water
+        self.channels = {}
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Starts listening and returns the bound port (0 picks one)."""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        name = None
+        try:
+            line = await reader.readline()
+            role, _, name = line.decode().strip().partition(" ")
+            if not name:
+                return
+            channel = self.channels.setdefault(name, Channel())
+            if role == "PUB":
+                await self.publish(channel, reader)
+            elif role == "SUB":
+                await self.subscribe(channel, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError,
+                UnicodeDecodeError, ValueError):
+            pass
+        finally:
+            writer.close()
+            # Forget channels nobody publishes to or watches any more
+            channel = self.channels.get(name)
+            if (
+                channel is not None and not channel.publishers
+                and not channel.subscribers
+            ):
+                del self.channels[name]
+
+    async def publish(self, channel, reader):
+        channel.publishers += 1
+        try:
+            while True:
+                frame = await read_frame(reader)
+                channel.latest = frame
+                channel.frames += 1
+                for subscriber in channel.subscribers:
+                    subscriber.offer(frame)
+        finally:
+            channel.publishers -= 1
+
+    async def subscribe(self, channel, reader, writer):
+        writer.transport.set_write_buffer_limits(high=self.high_water)
+        subscriber = Subscriber(writer)
+        if channel.latest is not None:
+            subscriber.offer(channel.latest)
+        channel.subscribers.add(subscriber)
+        pump = asyncio.ensure_future(subscriber.pump())
+        hangup = asyncio.ensure_future(wait_for_hangup(reader))
+        try:
+            await asyncio.wait(
+                (pump, hangup), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            channel.subscribers.discard(subscriber)
+            pump.cancel()
+            hangup.cancel()
+            await asyncio.gather(pump, hangup, return_exceptions=True)
+
+    def stats(self):
+        """Returns {channel: (subscribers, frames, dropped)}."""
+        return {
+            name: (
+                len(channel.subscribers), channel.frames,
+                sum(s.dropped for s in channel.subscribers),
+            )
+            for name, channel in self.channels.items()
+        }
+
+
+async def wait_for_hangup(reader):
+    """Returns at end of stream, discarding anything the peer sends.
+
+    Spectators send nothing after their SUB line, so this normally just
+    waits; the bounded reads keep a chatty client from filling memory.
+    """
+    while await reader.read(4096):
+        pass
+
+
+# === Spectator Client ===
+async def watch(relay, channel):
+    """Shows a channel's game in a window until it is closed."""
+    import pygame
+    from hud import get_font, render_text
+    from render import (
+        board_rect, draw_board, draw_piece, get_atlas, visible_rows
+    )
+
+    pygame.display.init()
+    pygame.font.init()
+    window = pygame.display.set_mode(
+        (CONFIG["WINDOW_WIDTH"], CONFIG["WINDOW_HEIGHT"])
+    )
+    pygame.display.set_caption(f"Tetris - watching {channel}")
+    window.fill((15, 15, 15))
+    pygame.display.flip()
+    font = get_font("Verdana", 20)
+    text_rect = pygame.Rect(PANEL_X, 120, 220, 120)
+    cell_size = CONFIG["CELL_SIZE"]
+    shape = None
+    latest = []
+
+    async def receive():
+        reader, writer = await asyncio.open_connection(*relay)
+        writer.write(f"SUB {channel}\n".encode())
+        try:
+            while True:
+                frame = await read_frame(reader)
+                latest[:] = [frame]
+        finally:
+            writer.close()
+
+    receiver = asyncio.ensure_future(receive())
+    try:
+        while not receiver.done():
+            if any(e.type == pygame.QUIT for e in pygame.event.get()):
+                break
+            if latest:
+                try:
+                    state, board = decode_frame(latest.pop()[LENGTH.size:])
+                except (ValueError, struct.error):
+                    continue  # Skipped; the next frame is a full state
+                if (board.height, board.width) != shape:
+                    # Wide boards get smaller cells so they fit the window
+                    shape = (board.height, board.width)
+                    CONFIG["CELL_SIZE"] = max(
+                        1, min(cell_size, PANEL_X // board.width)
+                    )
+                    get_atlas(CONFIG["CELL_SIZE"])
+                    view_rows = visible_rows(CONFIG["WINDOW_HEIGHT"])
+                    window.fill((15, 15, 15))
+                    pygame.display.flip()
+                # Tall boards show the rows around the falling piece
+                rows = min(board.height, view_rows)
+                top = min(max(state["y"] - 2, 0), board.height - rows)
+                draw_board(window, board, top, rows)
+                if not state["game_over"]:
+                    draw_piece(
+                        window, state["piece"], state["rotation"],
+                        state["x"], state["y"] - top
+                    )
+                window.fill((15, 15, 15), text_rect)
+                lines = [
+                    f"Score {state['score']}", f"Level {state['level']}",
+                    f"Lines {state['lines']}",
+                    "GAME OVER" if state["game_over"] else "",
+                ]
+                for i, line in enumerate(lines):
+                    window.blit(
+                        render_text(font, line),
+                        (text_rect.x, text_rect.y + i * 30)
+                    )
+                pygame.display.update([board_rect(board, rows), text_rect])
+            await asyncio.sleep(1 / CONFIG["FPS"])
+        if receiver.done() and receiver.exception() is not None:
+            print(f"Disconnected: {receiver.exception()}")
+    finally:
+        receiver.cancel()
+        await asyncio.gather(receiver, return_exceptions=True)
+        CONFIG["CELL_SIZE"] = cell_size
+        pygame.quit()
+
+
+# === Command Line ===
+async def serve(host, port, stats_interval):
+    relay = Relay()
+    port = await relay.start(host, port)
+    print(f"Spectator relay on {host}:{port}")
+    while True:
+        await asyncio.sleep(stats_interval or 3600)
+        if stats_interval:
+            for name, (watchers, frames, dropped) in relay.stats().items():
+                print(f"{name}: {watchers} watching, {frames} frames, "
+                      f"{dropped} dropped")
+
+
+def broadcast_bot(relay, channel, seed, delay):
+    """Plays bot games forever, publishing every placement."""
+    from bot import best_placement, play_placement
+    from engine import GameState
+
+    broadcaster = Broadcaster(relay, channel)
+    game = GameState(seed=seed, clock=lambda: 0)
+    try:
+        while True:
+            placement = best_placement(game)
+            if placement is None:
+                game.step("hard_drop")
+            else:
+                play_placement(game, placement)
+            broadcaster.publish(game)
+            time.sleep(delay)
+            if game.game_over:
+                time.sleep(2)
+                game.reset()
+    finally:
+        broadcaster.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    relay_parser = commands.add_parser("relay", help="run a relay")
+    relay_parser.add_argument("--host", default="127.0.0.1")
+    relay_parser.add_argument("--port", type=int, default=8766)
+    relay_parser.add_argument(
+        "--stats", type=float, default=0,
+        help="print channel stats every this many seconds"
+    )
+    for name, text in (("watch", "watch a channel"),
+                       ("bot", "broadcast bot games")):
+        sub = commands.add_parser(name, help=text)
+        sub.add_argument("--relay", default="127.0.0.1:8766",
+                         help="relay host:port")
+        sub.add_argument("--channel", default="main")
+    commands.choices["bot"].add_argument("--seed", type=int)
+    commands.choices["bot"].add_argument(
+        "--delay", type=float, default=0.25,
+        help="seconds between placements"
+    )
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "relay":
+            asyncio.run(serve(args.host, args.port, args.stats))
+        elif args.command == "watch":
+            asyncio.run(watch(parse_address(args.relay), args.channel))
+        else:
+            broadcast_bot(args.relay, args.channel, args.seed, args.delay)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Replay archive analytics."""
+
+import os
+import statistics
+
+import pytest
+
+from analytics import (
+    analyze, analyze_all, find_replays, game_metrics, Running, Totals
+)
+from bot import best_placement, play_placement
+from engine import GameState
+from replay import Recorder
+
+
+def bot_replay(seed, pieces=30):
+    ticks = [0]
+    game = GameState(clock=lambda: ticks[0] * 1000 // 60, seed=seed)
+    recorder = Recorder(game, lambda: ticks[0], tick_rate=60)
+    while game.pieces_placed < pieces and not game.game_over:
+        ticks[0] += 30
+        play_placement(game, best_placement(game))
+    return recorder.to_bytes(), game
+
+
+@pytest.fixture
+def archive(tmp_path):
+    games = {}
+    for seed in range(3):
+        folder = tmp_path / f"day{seed % 2}"
+        folder.mkdir(exist_ok=True)
+        data, game = bot_replay(seed)
+        (folder / f"g{seed}.rpl").write_bytes(data)
+        games[seed] = game
+    (tmp_path / "notes.txt").write_text("not a replay")
+    (tmp_path / "day0" / "broken.rpl").write_bytes(b"BTRP\x01")
+    return tmp_path, games
+
+
+def test_game_metrics_re_simulates_the_game():
+    data, game = bot_replay(4)
+    metrics = game_metrics(data, hole_seconds=5)
+    assert metrics["verified"]
+    assert metrics["score"] == game.score
+    assert metrics["pieces"] == 30
+    assert metrics["seconds"] == 15.0  # 30 pieces, half a second each
+    assert metrics["pieces_per_second"] == 2.0
+    assert len(metrics["holes"]) == 4  # At 0, 5, 10 and 15 seconds
+    cleared = sum(
+        rows * count for rows, count in enumerate(metrics["clears"], 1)
+    )
+    assert cleared == metrics["lines"] == game.total_lines
+
+
+def test_find_replays_walks_folders_in_order(archive):
+    root, _ = archive
+    names = [os.path.basename(p) for p in find_replays([str(root)])]
+    assert names == ["broken.rpl", "g0.rpl", "g2.rpl", "g1.rpl"]
+
+
+def test_unreadable_files_become_error_records(archive):
+    root, _ = archive
+    record = analyze(str(root / "day0" / "broken.rpl"))
+    assert "error" in record
+    assert "error" in analyze(str(root / "missing.rpl"))
+
+
+def test_totals_over_an_archive(archive):
+    root, games = archive
+    totals = Totals()
+    for record in analyze_all(find_replays([str(root)]), workers=2):
+        totals.add(record)
+    assert (totals.games, totals.errors, totals.unverified) == (3, 1, 0)
+    assert totals.pieces == 90
+    scores = [game.score for game in games.values()]
+    assert totals.stats["score"].mean == pytest.approx(
+        statistics.mean(scores)
+    )
+    report = totals.report()
+    assert report[0].startswith("3 games, 90 pieces")
+    assert "1 unreadable" in report[1]
+
+
+def test_running_matches_statistics():
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    running = Running()
+    for value in values:
+        running.add(value)
+    assert running.mean == pytest.approx(statistics.mean(values))
+    assert running.stdev == pytest.approx(statistics.stdev(values))
@@ -0,0 +1,39 @@
+"""Non-blocking effect timeline."""
+
+from animation import scaled_duration, Timeline
+
+
+def test_effects_run_for_their_duration():
+    timeline = Timeline()
+    timeline.start("clear", 1000, 150, data=(18, 19))
+    assert timeline.progress("clear", 1000) == 0.0
+    assert timeline.progress("clear", 1075) == 0.5
+    assert timeline.get("clear", 1149).data == (18, 19)
+    assert timeline.get("clear", 1150) is None
+    assert "clear" not in timeline.effects  # Finished effects are dropped
+
+
+def test_starting_an_effect_replaces_it():
+    timeline = Timeline()
+    timeline.start("entry", 0, 100)
+    timeline.start("entry", 80, 100)
+    assert timeline.progress("entry", 130) == 0.5
+    timeline.start("entry", 200, 0)  # Zero length: nothing to play
+    assert timeline.get("entry", 200) is None
+
+
+def test_skip_ends_effects_at_once():
+    timeline = Timeline()
+    timeline.start("entry", 0, 100)
+    timeline.start("clear", 0, 100)
+    timeline.skip("entry")
+    assert timeline.get("entry", 10) is None
+    assert timeline.get("clear", 10) is not None
+    timeline.skip()
+    assert timeline.effects == {}
+
+
+def test_effects_shorten_with_level():
+    assert scaled_duration(150, 1, 10) == 150
+    assert scaled_duration(150, 4, 10) == 100
+    assert scaled_duration(150, 10, 10) == 0
@@ -0,0 +1,139 @@
+"""Arena sessions on the shared tick wheels."""
+
+import random
+
+from arena import Arena, MAX_INPUTS_PER_TICK, MAX_QUEUED_INPUTS
+from config import CONFIG
+from engine import GameState
+from timing import FixedStep
+
+
+MESSAGES = (
+    "left", "right", "rotate", "down", "hard_drop", "+left", "-left",
+    "+right", "-right", "+down", "-down",
+)
+
+
+class FakeClient:
+    def __init__(self):
+        self.frames = []
+        self.accepting = True
+        self.closed = False
+
+    def send(self, frame):
+        if self.accepting:
+            self.frames.append(frame)
+        return self.accepting
+
+    def close(self):
+        self.closed = True
+
+
+def advance(arena, ticks=1):
+    for _ in range(ticks):
+        arena.scheduler.ticks += 1
+        arena.run_tick(arena.scheduler.time())
+
+
+def game_state(game):
+    return (
+        game.piece_x, game.piece_y, game.current_rotation,
+        game.pieces_placed, game.score, game.game_over,
+        tuple(game.board.rows),
+    )
+
+
+def test_sessions_play_like_a_game_updated_every_tick():
+    for trial in range(20):
+        rng = random.Random(trial)
+        arena = Arena(idle_seconds=10 ** 6)
+        session = arena.open(seed=trial)
+        # The reference visits its game on every tick, as Tetris.py does
+        scheduler = FixedStep(CONFIG["TICK_RATE"])
+        game = GameState(clock=scheduler.time, seed=trial)
+        held = set()
+        queue = []
+        last_left = last_right = 0
+        for _ in range(1500):
+            if rng.random() < 0.15:
+                message = rng.choice(MESSAGES)
+                arena.push(session, message)
+                if message[0] == "+":
+                    held.add(message[1:])
+                elif message[0] == "-":
+                    held.discard(message[1:])
+                else:
+                    queue.append(message)
+            advance(arena)
+            scheduler.ticks += 1
+            now = scheduler.time()
+            for action in queue[:MAX_INPUTS_PER_TICK]:
+                game.step(action)
+            del queue[:MAX_INPUTS_PER_TICK]
+            game.update(fast_drop="down" in held, now=now)
+            speed = CONFIG["LATERAL_SPEED"]
+            if "left" in held and now - last_left > speed:
+                x = game.piece_x
+                game.step("left")
+                if game.piece_x != x:
+                    last_left = now
+            if "right" in held and now - last_right > speed:
+                x = game.piece_x
+                game.step("right")
+                if game.piece_x != x:
+                    last_right = now
+            assert game_state(session.game) == game_state(game), trial
+            if game.game_over:
+                break
+
+
+def test_a_full_arena_turns_sessions_away():
+    arena = Arena(max_sessions=2)
+    assert arena.open() and arena.open()
+    assert arena.open() is None
+
+
+def test_idle_and_finished_sessions_are_evicted():
+    arena = Arena(idle_seconds=1, tick_rate=60)
+    evicted = []
+    arena.on_evict = evicted.append
+    idle = arena.open(seed=1, client=FakeClient())
+    active = arena.open(seed=2)
+    for _ in range(90):
+        arena.push(active, "rotate")
+        advance(arena)
+    assert evicted == [idle] and idle.client.closed
+    assert active.id in arena.sessions
+    while not active.game.game_over:
+        arena.push(active, "hard_drop")
+        advance(arena)
+    advance(arena, 5 * 60)
+    assert evicted == [idle, active]
+    assert arena.sessions == {}
+
+
+def test_inputs_are_capped_per_tick_and_queue():
+    arena = Arena()
+    session = arena.open(seed=3)
+    for _ in range(MAX_QUEUED_INPUTS + 5):
+        arena.push(session, "rotate")
+    assert arena.stats.dropped_inputs == 5
+    advance(arena)
+    assert len(session.inputs) == MAX_QUEUED_INPUTS - MAX_INPUTS_PER_TICK
+
+
+def test_frames_only_for_changes_and_skipped_while_backed_up():
+    arena = Arena()
+    client = FakeClient()
+    session = arena.open(seed=4, client=client)
+    advance(arena)
+    assert len(client.frames) == 1  # The opening frame
+    advance(arena)
+    assert len(client.frames) == 1
+    client.accepting = False
+    arena.push(session, "left")
+    advance(arena, 3)
+    assert arena.stats.skipped_frames == 3
+    client.accepting = True
+    advance(arena)
+    assert len(client.frames) == 2  # Only the latest state is sent
@@ -0,0 +1,54 @@
+"""BatchEnv piece streams and resets."""
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_env import BatchEnv  # noqa: E402
+from engine import GameState  # noqa: E402
+
+
+def test_fast_stream_reset_draws_two_pieces():
+    env = BatchEnv(500, fast_stream=True)
+    # Independent draws match about 1 time in 7, never every time
+    assert (env.current != env.next).any()
+    assert (env.drawn == 2).all()
+
+
+def play_until_some_finish(env):
+    rng = np.random.default_rng(1)
+    while not env.done.any():
+        env.step(np.stack([
+            rng.integers(0, 4, env.n), rng.integers(0, 10, env.n)
+        ], axis=1))
+
+
+@pytest.mark.parametrize("fast_stream", [False, True])
+def test_reset_restarts_only_the_given_envs(fast_stream):
+    env = BatchEnv(64, seeds=range(10, 74), fast_stream=fast_stream)
+    fresh = BatchEnv(64, seeds=range(10, 74), fast_stream=fast_stream)
+    play_until_some_finish(env)
+    finished = np.nonzero(env.done)[0]
+    playing = env.pieces_placed.copy()
+    env.reset(np.concatenate([finished, finished]))  # Repeats are fine
+    assert not env.done.any()
+    for name in ("current", "next", "score", "lines", "level", "tops"):
+        assert (getattr(env, name)[finished] ==
+                getattr(fresh, name)[finished]).all(), name
+    assert not env.boards[finished].any()
+    assert (env.pieces_placed[finished] == 0).all()
+    others = np.setdiff1d(np.arange(64), finished)
+    assert (env.pieces_placed[others] == playing[others]).all()
+
+
+def test_reset_envs_replay_their_seed_like_game_state():
+    env = BatchEnv(8, seeds=range(8))
+    play_until_some_finish(env)
+    env.reset(np.nonzero(env.done)[0])
+    for i in np.nonzero(env.pieces_placed == 0)[0].tolist():
+        game = GameState(rng=random.Random(i), clock=lambda: 0)
+        assert (env.current[i], env.next[i]) == (
+            game.current_piece, game.next_piece
+        )
@@ -0,0 +1,97 @@
+"""Bitboard rows, colors and line clears."""
+
+import random
+
+from board import Board
+
+
+def filled(width, *cols):
+    mask = 0
+    for col in cols:
+        mask |= 1 << col
+    return mask
+
+
+def make_board(height, width, rows):
+    """Returns a board whose bottom rows hold the given masks."""
+    board = Board(height, width)
+    start = height - len(rows)
+    for i, mask in enumerate(rows):
+        for col in range(width):
+            if mask >> col & 1:
+                board.fill(start + i, col, start + i)
+    return board
+
+
+def test_fill_sets_rows_and_colors():
+    board = Board(4, 5)
+    board.fill(2, 3, 7)
+    assert board.rows == [0, 0, filled(5, 3), 0]
+    assert board.is_filled(2, 3) and not board.is_filled(2, 2)
+    assert board.color_index(2, 3) == 7
+    assert board.color_index(3, 3) == 0
+
+
+def test_clear_full_rows_shifts_rows_and_colors_down():
+    full = filled(4, 0, 1, 2, 3)
+    board = make_board(5, 4, [filled(4, 0), full, filled(4, 1), full])
+    assert board.clear_full_rows() == [2, 4]
+    assert board.rows == [0, 0, 0, filled(4, 0), filled(4, 1)]
+    # Each surviving cell keeps the color it was filled with
+    assert board.color_index(3, 0) == 1
+    assert board.color_index(4, 1) == 3
+    assert bytes(board.colors[:12]) == bytes(12)
+
+
+def test_clear_full_rows_checks_only_the_candidates():
+    full = filled(3, 0, 1, 2)
+    board = make_board(4, 3, [full, filled(3, 2), full])
+    assert board.clear_full_rows(range(3, 10)) == [3]
+    assert board.rows == [0, 0, full, filled(3, 2)]
+    assert board.clear_full_rows([-1, 0]) == []
+    assert board.clear_full_rows() == [2]
+
+
+def test_copy_and_freeze_are_independent():
+    board = make_board(3, 3, [filled(3, 1)])
+    copy = board.copy()
+    frozen = board.freeze()
+    board.fill(0, 0, 2)
+    assert copy.rows == [0, 0, filled(3, 1)]
+    thawed = Board.thaw(frozen)
+    assert thawed.rows == copy.rows
+    assert thawed.colors == copy.colors
+    assert thawed.tops == copy.tops == [3, 2, 3]
+
+
+def brute_tops(board):
+    return [
+        next(
+            (row for row in range(board.height) if board.is_filled(row, col)),
+            board.height
+        )
+        for col in range(board.width)
+    ]
+
+
+def test_tops_follow_fills_and_clears():
+    rng = random.Random(5)
+    for _ in range(200):
+        board = Board(8, 5)
+        for _ in range(rng.randrange(30)):
+            board.fill(rng.randrange(8), rng.randrange(5), 1)
+        for row in rng.sample(range(8), 3):
+            for col in range(5):
+                board.fill(row, col, 1)
+        assert board.tops == brute_tops(board)
+        board.clear_full_rows()
+        assert board.tops == brute_tops(board)
+
+
+def test_update_tops_finds_cells_under_a_cleared_top():
+    full = filled(3, 0, 1, 2)
+    # Column 0's top is in the full row; the next cell is two rows down
+    board = make_board(4, 3, [full, filled(3, 1), filled(3, 0)])
+    assert board.tops == [1, 1, 1]
+    board.clear_full_rows()
+    assert board.tops == [3, 2, 4]
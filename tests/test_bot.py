@@ -0,0 +1,23 @@
+"""Bot moves played through the engine."""
+
+from analytics import game_metrics
+from bot import best_placement, play_placement
+from engine import GameState
+from replay import Recorder
+
+
+def test_bot_games_replay_and_score_hard_drops():
+    ticks = [0]
+    game = GameState(clock=lambda: ticks[0] * 16, seed=3)
+    recorder = Recorder(game, lambda: ticks[0])
+    for _ in range(20):
+        placement = best_placement(game)
+        ticks[0] += 1
+        before = game.score
+        result = play_placement(game, placement)
+        assert result.locked
+        if not result.cleared_rows:
+            assert game.score > before  # Hard-drop points
+    metrics = game_metrics(recorder.to_bytes())
+    assert metrics["verified"]
+    assert metrics["pieces"] == 20
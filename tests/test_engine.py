@@ -0,0 +1,148 @@
+"""GameState rules: locking, clears, scoring and levels."""
+
+import random
+
+import pytest
+
+from engine import calculate_score, GameState
+
+
+I_PIECE, O_PIECE = 0, 1  # Piece indices in PIECES
+
+
+class SequenceRng:
+    """Deals the given piece indices, then repeats the last one."""
+
+    def __init__(self, *pieces):
+        self.pieces = list(pieces)
+
+    def randint(self, low, high):
+        if len(self.pieces) > 1:
+            return self.pieces.pop(0)
+        return self.pieces[0]
+
+
+def make_game(*pieces):
+    return GameState(rng=SequenceRng(*pieces), clock=lambda: 0)
+
+
+def fill_rows(board, rows, skip=()):
+    for row in rows:
+        for col in range(board.width):
+            if col not in skip:
+                board.fill(row, col, 1)
+
+
+def test_hard_drop_locks_and_scores_the_drop():
+    game = make_game(I_PIECE, O_PIECE)
+    result = game.step("hard_drop")
+    assert result == (True, ())
+    # The flat I falls 19 rows from the top at 2 points a row
+    assert game.score == 38
+    assert game.board.rows[19] == 0b1111 << 3
+    assert game.pieces_placed == 1
+    assert (game.current_piece, game.piece_y) == (O_PIECE, 0)
+
+
+def test_gravity_moves_down_then_locks():
+    game = make_game(O_PIECE)
+    for _ in range(18):
+        assert game.step("gravity") == (False, ())
+    assert game.piece_y == 18
+    assert game.step("gravity").locked
+    assert game.score == 0
+    assert game.board.rows[18] == game.board.rows[19] == 0b11 << 3
+
+
+@pytest.mark.parametrize("lines, points", [
+    (0, 0), (1, 100), (2, 300), (3, 500), (4, 800),
+])
+def test_line_clears_score_like_the_original_game(lines, points):
+    assert calculate_score(lines) == points
+    game = make_game(I_PIECE)
+    board = game.board
+    # A well in column 0, full to the height of the clear
+    fill_rows(board, range(20 - lines, 20), skip=(0,))
+    fill_rows(board, range(16, 20 - lines), skip=(0, 1))
+    game.current_rotation = 1
+    game.piece_x = 0
+    result = game.step("hard_drop")
+    assert result.cleared_rows == tuple(range(20 - lines, 20))
+    assert game.score == 16 * 2 + points
+    assert game.total_lines == lines
+    assert board is game.board
+    assert all(row != board.full_mask for row in board.rows)
+
+
+def test_level_rises_every_ten_lines():
+    game = make_game(I_PIECE)
+    game.total_lines = 9
+    game.update_score_and_level(1)
+    assert (game.level, game.fall_delay) == (2, 450)
+    game.update_score_and_level(2)
+    assert game.level == 2
+    game.level = 20
+    game.total_lines = 199
+    game.fall_delay = 260
+    game.update_score_and_level(1)
+    assert (game.level, game.fall_delay) == (21, 250)
+
+
+def test_game_over_is_checked_after_clearing():
+    game = make_game(I_PIECE, O_PIECE)
+    # Rows 1-19 are full but for the well, so the spawn area is blocked
+    fill_rows(game.board, range(1, 20), skip=(0,))
+    game.current_rotation = 1
+    game.piece_x = 0
+    assert game.step("hard_drop").cleared_rows == (16, 17, 18, 19)
+    # The tetris lowered the stack out of the way of the next piece
+    assert not game.game_over
+    assert game.board.rows[:5] == [0] * 5
+
+
+def test_game_over_when_the_next_piece_cannot_spawn():
+    game = make_game(I_PIECE, O_PIECE)
+    fill_rows(game.board, range(1, 20), skip=(0, 1))
+    game.current_rotation = 1
+    game.piece_x = 0
+    assert game.step("hard_drop").cleared_rows == ()
+    assert game.game_over
+    assert game.step("left") == (False, ())
+
+
+def test_unknown_action_raises():
+    with pytest.raises(ValueError):
+        make_game(I_PIECE).step("jump")
+
+
+def walked_distance(game):
+    distance = 0
+    while game.fits(game.current_rotation, game.piece_x,
+                    game.piece_y + distance + 1):
+        distance += 1
+    return distance
+
+
+def test_drop_distance_under_an_overhang():
+    game = make_game(O_PIECE)
+    game.board.fill(10, 4, 1)  # A roof over the piece's right column
+    game.piece_y = 12
+    assert game.drop_distance() == 6
+    game.piece_y = 0
+    assert game.drop_distance() == 8
+
+
+def test_drop_distance_matches_a_row_by_row_walk():
+    rng = random.Random(11)
+    for _ in range(300):
+        game = make_game(rng.randrange(7))
+        board = game.board
+        for _ in range(rng.randrange(60)):
+            board.fill(rng.randrange(4, 20), rng.randrange(10), 1)
+        rotations = game.geometry[game.current_piece]
+        game.current_rotation = rng.randrange(len(rotations))
+        geometry = rotations[game.current_rotation]
+        game.piece_x = rng.choice(list(geometry.masks))
+        game.piece_y = rng.randrange(-geometry.top, 18)
+        if game.fits(game.current_rotation, game.piece_x, game.piece_y):
+            assert game.drop_distance() == walked_distance(game)
@@ -0,0 +1,49 @@
+"""SQLite leaderboard store."""
+
+import time
+
+import pytest
+
+from leaderboard import Leaderboard
+
+
+def test_pages_ranks_and_high_score():
+    board = Leaderboard(":memory:", legacy=False)
+    ranks = [
+        board.add(f"p{i}", score)
+        for i, score in enumerate([300, 100, 500, 200, 400])
+    ]
+    assert ranks == [1, 2, 1, 3, 2]
+    assert board.top(2) == [("p2", 500), ("p4", 400)]
+    assert board.top(2, 4) == [("p1", 100)]
+    assert board.count() == 5
+    assert board.rank(350) == 3
+    assert board.high_score() == 500
+
+
+def test_legacy_files_are_imported_once(tmp_path):
+    (tmp_path / "leaderboard.txt").write_text("Ana,120\nNada,0\nbad line\n")
+    (tmp_path / "record.txt").write_text("900")
+    path = str(tmp_path / "scores.db")
+    board = Leaderboard(path)
+    assert board.top() == [("Ana", 120), ("Nada", 0)]
+    assert board.high_score() == 900
+    board.close()
+    board = Leaderboard(path)
+    assert board.count() == 2
+
+
+def test_warm_up_survives_a_corrupt_database(tmp_path, monkeypatch):
+    pytest.importorskip("pygame")
+    import Tetris
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "leaderboard.db").write_bytes(b"not a database" * 100)
+    monkeypatch.setattr(Tetris, "get_font", lambda *a, **k: None,
+                        raising=False)
+    monkeypatch.setattr(Tetris, "scores", None)
+    monkeypatch.setattr(Tetris, "high_score", 0)
+    monkeypatch.setattr(Tetris, "startup_times", [])
+    Tetris.warm_up(time.perf_counter())
+    assert Tetris.scores.count() == 0
+    assert Tetris.scores.add("me", 10) == 1
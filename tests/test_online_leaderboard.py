@@ -0,0 +1,195 @@
+"""Leaderboard server request handling and the game's client."""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from leaderboard import Leaderboard
+from online_leaderboard import (
+    LeaderboardClient, LeaderboardServer, MAX_HEADERS
+)
+
+
+def make_server():
+    return LeaderboardServer(Leaderboard(":memory:", legacy=False))
+
+
+def post(server, entries):
+    return server.route("POST", "/scores", json.dumps({"scores": entries}))
+
+
+def test_get_clamps_limit_and_offset():
+    server = make_server()
+    for i in range(3):
+        server.board.add(f"p{i}", i)
+    status, payload = server.route("GET", "/scores?limit=-1&offset=-5", b"")
+    assert status == 200
+    assert payload["scores"] == [("p2", 2)]
+    status, _ = server.route("GET", f"/scores?offset={10 ** 30}", b"")
+    assert status == 400
+
+
+def test_bad_entry_rejects_the_whole_batch():
+    server = make_server()
+    status, _ = post(server, [
+        {"id": "a", "name": "ok", "score": 10},
+        {"id": "b", "name": "bad"},
+    ])
+    assert status == 400
+    assert server.board.count() == 0
+    status, _ = post(server, [{"id": "c", "name": "big", "score": 2 ** 70}])
+    assert status == 400
+    status, payload = post(server, [{"id": "a", "name": "ok", "score": 10}])
+    assert (status, payload) == (200, {"ranks": [1]})
+
+
+def test_malformed_request_line_gets_400():
+    async def exchange(request):
+        server = make_server()
+        port = await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        reply = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        await server.stop()
+        return reply
+
+    reply = asyncio.run(exchange(b"GARBAGE\r\n\r\n"))
+    assert reply.startswith(b"HTTP/1.1 400 Bad Request")
+    headers = b"".join(
+        b"X-%d: 1\r\n" % i for i in range(MAX_HEADERS + 1)
+    )
+    reply = asyncio.run(
+        exchange(b"GET /scores HTTP/1.1\r\n" + headers + b"\r\n")
+    )
+    assert reply.startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_malformed_queue_entries_are_dropped(tmp_path):
+    queue = tmp_path / "queue.json"
+    queue.write_text(json.dumps([
+        {"id": "a", "name": "ok", "score": 5},
+        {"name": "no id", "score": 1},
+        7,
+        {"id": "b", "name": "bad score", "score": "x"},
+    ]))
+    # Nothing listens on port 1, so the queue is only loaded
+    client = LeaderboardClient("http://127.0.0.1:1", queue_path=str(queue))
+    try:
+        assert client.pending == [{"id": "a", "name": "ok", "score": 5}]
+    finally:
+        client.close()
+
+
+# === Client against an in-process server ===
+class ServerThread:
+    """Runs a LeaderboardServer on its own event loop thread."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.posts = []  # Batch sizes, in the order they arrived
+        self.server = self.call(make_server)
+        route = self.server.route
+
+        def counting_route(method, target, body):
+            if method == "POST":
+                self.posts.append(len(json.loads(body)["scores"]))
+            return route(method, target, body)
+
+        self.server.route = counting_route
+        self.port = self.run(self.server.start())
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def call(self, function, *args):
+        """Calls a function on the server thread, which owns the board."""
+        async def call():
+            return function(*args)
+        return self.run(call())
+
+    def stop(self):
+        self.run(self.server.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def server():
+    server = ServerThread()
+    yield server
+    server.stop()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_saved_scores_are_sent_in_batches(server, tmp_path):
+    queue = tmp_path / "queue.json"
+    queue.write_text(json.dumps([
+        {"id": str(i), "name": f"p{i}", "score": i} for i in range(45)
+    ]))
+    client = LeaderboardClient(
+        f"http://127.0.0.1:{server.port}", queue_path=str(queue),
+        flush_interval=0.05, batch_size=20
+    )
+    try:
+        wait_until(lambda: not queue.exists())
+        assert server.posts == [20, 20, 5]
+        assert server.call(server.server.board.count) == 45
+        assert client.online
+    finally:
+        client.close()
+
+
+def test_offline_scores_wait_in_the_queue_file(server, tmp_path):
+    queue = str(tmp_path / "queue.json")
+    offline = LeaderboardClient(
+        "http://127.0.0.1:1", queue_path=queue, flush_interval=0.05
+    )
+    for i in range(3):
+        offline.submit(f"p{i}", i * 100)
+    wait_until(lambda: offline.online is False)
+    offline.close()
+    with open(queue) as f:
+        assert [entry["score"] for entry in json.load(f)] == [0, 100, 200]
+    # The next run sends them, once
+    client = LeaderboardClient(
+        f"http://127.0.0.1:{server.port}", queue_path=queue,
+        flush_interval=0.05
+    )
+    try:
+        wait_until(lambda: server.call(server.server.board.count) == 3)
+        wait_until(lambda: not client.pending)
+    finally:
+        client.close()
+    assert server.call(server.server.board.top) == [
+        ("p2", 200), ("p1", 100), ("p0", 0)
+    ]
+    assert len(server.posts) == 1
+
+
+def test_top_is_cached_until_its_ttl(server, tmp_path):
+    server.call(server.server.board.add, "ana", 50)
+    client = LeaderboardClient(
+        f"http://127.0.0.1:{server.port}",
+        queue_path=str(tmp_path / "queue.json"), ttl=0.3
+    )
+    try:
+        assert client.top(5) == (None, 0)  # Not fetched yet
+        wait_until(lambda: client.top(5)[0] is not None)
+        server.call(server.server.board.add, "bo", 80)
+        assert client.top(5) == ([("ana", 50)], 1)  # Still cached
+        time.sleep(0.3)
+        client.top(5)  # Stale: served, and refreshed in the background
+        wait_until(lambda: client.top(5)[1] == 2)
+        assert client.top(5) == ([("bo", 80), ("ana", 50)], 2)
+    finally:
+        client.close()
@@ -0,0 +1,54 @@
+"""Compiled piece geometry tables."""
+
+import pytest
+
+from pieces import compile_pieces, PIECES
+
+
+I_PIECE, T_PIECE = 0, 2
+
+
+@pytest.mark.parametrize("columns", [4, 10, 64])
+def test_masks_cover_every_legal_column(columns):
+    for piece, rotations in enumerate(compile_pieces(columns)):
+        for rotation, geometry in enumerate(rotations):
+            shape = PIECES[piece][rotation]
+            assert len(geometry.cells) == 4
+            legal = range(-geometry.left, columns - geometry.width + 1)
+            assert sorted(geometry.masks) == list(legal)
+            for x, masks in geometry.masks.items():
+                assert len(masks) == geometry.height - geometry.top
+                for i, mask in enumerate(masks):
+                    row = shape[geometry.top + i]
+                    cols = {x + j for j, cell in enumerate(row) if cell}
+                    assert mask == sum(1 << col for col in cols)
+                    assert 0 < mask < 1 << columns
+
+
+def test_i_piece_masks():
+    flat, upright = compile_pieces(10)[I_PIECE]
+    assert flat.masks[0] == (0b1111,)
+    assert flat.masks[6] == (0b1111 << 6,)
+    assert 7 not in flat.masks
+    assert upright.masks[9] == (1 << 9,) * 4
+
+
+def test_offset_rotations_allow_negative_x():
+    # The upright T is drawn in the middle column of its 3x3 matrix
+    geometry = compile_pieces(10)[T_PIECE][1]
+    assert (geometry.left, geometry.width) == (1, 3)
+    assert geometry.masks[-1] == (0b01, 0b11, 0b01)
+    assert 8 not in geometry.masks
+
+
+def test_bottom_profile_is_the_lowest_cell_of_each_column():
+    rotations = compile_pieces(10)[T_PIECE]
+    assert rotations[0].bottom == ((0, 1), (1, 1), (2, 1))
+    assert rotations[1].bottom == ((1, 2), (2, 1))
+    # A blank first row still counts toward the row offsets
+    assert rotations[2].top == 1
+    assert rotations[2].bottom == ((0, 1), (1, 2), (2, 1))
+    for geometry in compile_pieces(10)[I_PIECE]:
+        for col, row in geometry.bottom:
+            assert (row, col) in geometry.cells
+            assert (row + 1, col) not in geometry.cells
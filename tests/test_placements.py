@@ -0,0 +1,93 @@
+"""Breadth-first search for reachable placements."""
+
+import pytest
+
+from board import Board
+from engine import GameState, landing_distance
+from pieces import compile_pieces, PIECES
+from placements import game_placements, reachable_placements
+
+
+I_PIECE, T_PIECE = 0, 2
+SPAWN_X = 3  # (10 - 4) // 2
+
+
+class FixedRng:
+    def __init__(self, piece):
+        self.piece = piece
+
+    def randint(self, low, high):
+        return self.piece
+
+
+def game_with(piece, cells=()):
+    game = GameState(rng=FixedRng(piece), clock=lambda: 0)
+    for row, col in cells:
+        game.board.fill(row, col, 1)
+    return game
+
+
+def play(game, path):
+    """Plays a path and returns where the piece ended up."""
+    for move in path:
+        game.step(move)
+    return game.current_rotation, game.piece_x, game.piece_y
+
+
+def drop_spot(board, piece, rotation, x):
+    """Returns the resting row of a piece dropped straight from row 0."""
+    geometry = compile_pieces(board.width)[piece][rotation]
+    return landing_distance(geometry, x, 0, board)
+
+
+@pytest.mark.parametrize("piece", range(len(PIECES)))
+def test_paths_on_an_empty_board_are_shortest(piece):
+    placements = reachable_placements(Board(20, 10), piece)
+    assert placements
+    for rotation, x, y, path in placements:
+        # Each rotation, column and row costs exactly one move
+        assert len(path) == rotation + abs(x - SPAWN_X) + y
+
+
+def test_every_path_plays_to_its_placement():
+    cells = [(19, c) for c in range(10) if c != 6] + [(15, 2), (16, 7)]
+    for piece in range(len(PIECES)):
+        for placement in game_placements(game_with(piece, cells)):
+            game = game_with(piece, cells)
+            assert play(game, placement.path) == placement[:3]
+            assert not game.fits(*placement[:2], placement.y + 1)
+
+
+def test_tucks_under_an_overhang():
+    # A roof over columns 0-5; columns 6-9 are open to the floor
+    roof = [(15, c) for c in range(6)]
+    game = game_with(I_PIECE, roof)
+    found = {placement[:3]: placement.path
+             for placement in game_placements(game)}
+    assert drop_spot(game.board, I_PIECE, 0, 0) == 14
+    path = found[(0, 0, 19)]
+    assert path.index("left") > path.index("down")
+    assert (1, 0, 16) in found  # Upright, all the way under the roof
+
+
+def test_spins_into_a_slot():
+    # A T slot at columns 3-5 whose left arm is covered by a roof cell
+    cells = [(19, c) for c in range(10) if c != 4]
+    cells += [(18, c) for c in range(10) if c not in (3, 4, 5)]
+    cells.append((17, 3))
+    game = game_with(T_PIECE, cells)
+    found = {placement[:3]: placement.path
+             for placement in game_placements(game)}
+    path = found[(2, 3, 17)]
+    # Dropped straight down, the pointing-down T catches on the roof
+    assert drop_spot(game.board, T_PIECE, 2, 3) == 15
+    assert path[-1] == "rotate"
+    assert "down" in path[:-1]
+    assert play(game, path) == (2, 3, 17)
+
+
+def test_blocked_spawn_has_no_placements():
+    board = Board(20, 10)
+    for col in range(10):
+        board.fill(0, col, 1)
+    assert reachable_placements(board, T_PIECE) == ()
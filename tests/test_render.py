@@ -0,0 +1,105 @@
+"""Dirty-rectangle rendering of the playfield."""
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from config import CONFIG  # noqa: E402
+from engine import GameState  # noqa: E402
+from render import Renderer  # noqa: E402
+
+
+@pytest.fixture
+def presented(monkeypatch):
+    """Records what Renderer.present() sends to the display."""
+    calls = []
+    monkeypatch.setattr(pygame.display, "flip", lambda: calls.append(None))
+    monkeypatch.setattr(pygame.display, "update", calls.append)
+    return calls
+
+
+def make_renderer(game):
+    size = CONFIG["CELL_SIZE"]
+    surface = pygame.Surface(
+        (game.board.width * size, 100 + game.board.height * size)
+    )
+    return Renderer(surface)
+
+
+def test_only_changed_cells_are_pushed(presented):
+    game = GameState(clock=lambda: 0, seed=1)
+    renderer = make_renderer(game)
+    renderer.draw_playfield(game)
+    renderer.present()
+    assert presented == [None]  # The first frame flips the whole window
+    renderer.draw_playfield(game)
+    renderer.present()
+    assert presented == [None]  # Nothing changed, nothing pushed
+    game.step("left")
+    renderer.draw_playfield(game)
+    renderer.present()
+    rects = presented[-1]
+    size = CONFIG["CELL_SIZE"]
+    # At most the piece and its ghost, before and after the move
+    assert 0 < len(rects) <= 16
+    assert all(rect.size == (size, size) for rect in rects)
+
+
+def test_invalidate_redraws_everything(presented):
+    game = GameState(clock=lambda: 0, seed=1)
+    renderer = make_renderer(game)
+    renderer.draw_playfield(game)
+    renderer.present()
+    renderer.invalidate()
+    renderer.draw_playfield(game)
+    renderer.present()
+    assert presented == [None, None]
+
+
+def test_hud_values_redraw_only_when_changed():
+    renderer = Renderer(None)
+    assert renderer.changed("score", 0)
+    assert not renderer.changed("score", 0)
+    assert renderer.changed("score", 100)
+
+
+def tall_game(rows=100):
+    return GameState(dict(CONFIG, ROWS=rows), clock=lambda: 0, seed=2)
+
+
+def test_view_is_clamped_to_the_board():
+    game = tall_game()
+    renderer = Renderer(None, view_rows=20)
+    assert renderer.scroll(game) == 0
+    renderer.top = 95  # Past the bottom edge
+    game.piece_y = 96
+    assert renderer.scroll(game) == 80
+    renderer.top = 60
+    game.piece_y = 0
+    assert renderer.scroll(game) == 0  # Not above the top edge
+    assert Renderer(None, view_rows=200).scroll(game) == 0
+
+
+def test_view_follows_the_piece_and_its_landing_spot():
+    game = tall_game()
+    renderer = Renderer(None, view_rows=20)
+    game.piece_y = 85
+    # Piece and landing spot fit in view: both are shown
+    top = renderer.scroll(game)
+    assert top <= game.piece_y and top + 20 >= 100
+    # A long fall: the view jumps to the piece with a small margin
+    renderer.top = 80
+    game.piece_y = 30
+    assert renderer.scroll(game) == 28
+
+
+def test_tall_boards_only_draw_the_rows_in_view(presented):
+    game = tall_game()
+    size = CONFIG["CELL_SIZE"]
+    renderer = Renderer(pygame.Surface((10 * size, 800)), view_rows=20)
+    renderer.draw_playfield(game)
+    assert len(renderer.cells) == 20 * game.board.width
+    game.piece_y = 70
+    renderer.draw_playfield(game)
+    assert renderer.top == 68
+    assert len(renderer.cells) == 20 * game.board.width
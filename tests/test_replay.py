@@ -0,0 +1,76 @@
+"""Replay recording, decoding and seeking."""
+
+import random
+
+import pytest
+
+from engine import GameState
+from replay import (
+    Player, read_varint, Recorder, Replay, unzigzag, write_varint, zigzag
+)
+
+
+MOVES = ("left", "right", "rotate", "down", "gravity", "gravity")
+
+
+def state(game):
+    return (
+        tuple(game.board.rows), bytes(game.board.colors), game.score,
+        game.current_piece, game.current_rotation, game.piece_x,
+        game.piece_y, game.game_over,
+    )
+
+
+def record_game(ticks=600, keyframe_ticks=50, seed=21):
+    """Returns a replay's bytes and the game state after every tick."""
+    rng = random.Random(seed)
+    tick = [0]
+    game = GameState(clock=lambda: tick[0] * 1000 // 60, seed=seed)
+    recorder = Recorder(
+        game, lambda: tick[0], tick_rate=60, keyframe_ticks=keyframe_ticks
+    )
+    states = [state(game)]
+    for tick[0] in range(1, ticks + 1):
+        for _ in range(rng.choice((0, 0, 1, 2))):
+            game.step(rng.choice(MOVES))
+        states.append(state(game))
+    return recorder.to_bytes(), states, game
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 40])
+def test_varints_round_trip(value):
+    out = bytearray(b"x")
+    write_varint(out, value)
+    assert read_varint(out, 1) == (value, len(out))
+    assert unzigzag(zigzag(-value)) == -value
+
+
+def test_replay_keeps_every_event_and_the_result():
+    data, states, game = record_game()
+    replay = Replay(data)
+    assert replay.seed == 21
+    assert (replay.rows, replay.columns) == (20, 10)
+    assert len(replay.keyframes) > 5
+    assert replay.final == (game.score, game.total_lines, game.game_over)
+    player = Player(replay)
+    player.advance_to(replay.length)
+    assert player.finished
+    assert state(player.game) == states[replay.length]
+
+
+def test_seek_matches_the_recorded_game():
+    data, states, _ = record_game()
+    replay = Replay(data)
+    player = Player(replay)
+    # Forward past keyframes, backward before and after them
+    targets = [0, 49, 50, 51, 333, 120, 599, 10, 0, 250, 251, 45]
+    targets += random.Random(4).sample(range(600), 30)
+    for tick in targets:
+        player.seek(tick)
+        assert player.tick == tick
+        assert state(player.game) == states[tick], tick
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        Replay(b"PK\x03\x04")
@@ -0,0 +1,98 @@
+"""Snapshot restore and undo across game resets."""
+
+import os
+import time
+
+import pytest
+
+from engine import GameState
+from replay import Recorder
+from snapshots import AUTOSAVE_FILE, load_snapshot, SnapshotRing
+from timing import FixedStep
+
+
+def recorded_game(seed=7):
+    ticks = [0]
+    game = GameState(clock=lambda: ticks[0] * 16, seed=seed)
+    recorder = Recorder(game, lambda: ticks[0])
+    return game, recorder, ticks
+
+
+def test_restore_rewinds_the_current_recording():
+    game, recorder, ticks = recorded_game()
+    snapshot = game.snapshot()
+    size = len(recorder.data)
+    for _ in range(3):
+        ticks[0] += 5
+        game.step("hard_drop")
+    game.restore(snapshot)
+    assert len(recorder.data) == size
+    assert game.pieces_placed == 0
+
+
+def test_restore_after_reset_ignores_the_old_recording():
+    game, recorder, ticks = recorded_game()
+    ticks[0] += 5
+    game.step("hard_drop")
+    snapshot = game.snapshot()
+    ticks[0] += 5
+    game.reset(game.seed)
+    game.step("left")
+    data = bytes(recorder.data)
+    game.restore(snapshot)  # Must not raise
+    assert bytes(recorder.data) == data
+    assert game.pieces_placed == 1
+
+
+def test_undo_after_reset(tmp_path, monkeypatch):
+    pygame = pytest.importorskip("pygame")
+    import Tetris
+    from animation import Timeline
+
+    monkeypatch.chdir(tmp_path)  # Autosaves land here
+    scheduler = FixedStep(60)
+    game = GameState(clock=scheduler.time, seed=3)
+    monkeypatch.setattr(Tetris, "pygame", pygame, raising=False)
+    monkeypatch.setattr(Tetris, "scheduler", scheduler)
+    monkeypatch.setattr(Tetris, "game", game)
+    monkeypatch.setattr(
+        Tetris, "recorder", Recorder(game, lambda: scheduler.ticks)
+    )
+    monkeypatch.setattr(Tetris, "undo_ring", SnapshotRing(30))
+    monkeypatch.setattr(Tetris, "timeline", Timeline())
+    monkeypatch.setattr(Tetris, "pending_save", None)
+
+    # Play, pause, then pick "Continue": the same seed, but a new recording
+    for choice in ("New Game", "Continue"):
+        Tetris.start_game(choice)
+        Tetris.track_placement()
+        for _ in range(3):
+            scheduler.ticks += 10
+            game.step("hard_drop")
+            Tetris.track_placement()
+        Tetris.autosave(force=True)
+    for _ in range(3):
+        Tetris.undo_placement()
+    assert game.pieces_placed == 3
+
+
+def test_autosave_is_throttled_until_forced(tmp_path, monkeypatch):
+    import Tetris
+
+    monkeypatch.chdir(tmp_path)
+    game = GameState(clock=lambda: 0, seed=3)
+    monkeypatch.setattr(Tetris, "game", game)
+    monkeypatch.setattr(Tetris, "scheduler", FixedStep(60))
+    monkeypatch.setattr(Tetris, "undo_ring", SnapshotRing(5))
+    monkeypatch.setattr(Tetris, "pending_save", None)
+    monkeypatch.setattr(Tetris, "last_save_time", time.monotonic())
+    Tetris.track_placement()
+    game.step("hard_drop")
+    Tetris.track_placement()
+    assert not os.path.exists(AUTOSAVE_FILE)
+    Tetris.autosave(force=True)
+    assert load_snapshot().pieces_placed == 1
+    game.step("hard_drop")
+    monkeypatch.setattr(Tetris, "last_save_time", 0.0)
+    Tetris.track_placement()  # The interval has passed
+    assert load_snapshot().pieces_placed == 2
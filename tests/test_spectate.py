@@ -0,0 +1,118 @@
+"""Spectator frames and the broadcast relay."""
+
+import asyncio
+
+import pytest
+
+from engine import GameState
+from spectate import (
+    decode_frame, encode_frame, LENGTH, read_frame, Relay, STATE,
+    Subscriber
+)
+
+
+def played_game(pieces=6):
+    game = GameState(clock=lambda: 0, seed=5)
+    for _ in range(pieces):
+        game.step("rotate")
+        game.step("hard_drop")
+    game.step("left")
+    return game
+
+
+def test_frames_round_trip():
+    game = played_game()
+    frame = encode_frame(game)
+    (length,) = LENGTH.unpack_from(frame)
+    assert length == len(frame) - LENGTH.size
+    state, board = decode_frame(frame[LENGTH.size:])
+    assert state == {
+        "game_over": False, "piece": game.current_piece,
+        "rotation": game.current_rotation, "x": game.piece_x,
+        "y": game.piece_y, "next": game.next_piece, "score": game.score,
+        "lines": game.total_lines, "level": game.level,
+    }
+    assert board.rows == game.board.rows
+    assert board.colors == game.board.colors
+    assert board.tops == game.board.tops
+
+
+def test_truncated_frames_are_rejected():
+    frame = encode_frame(played_game())
+    with pytest.raises(ValueError):
+        decode_frame(frame[LENGTH.size:-1])
+
+
+def test_out_of_range_frames_are_rejected():
+    body = encode_frame(played_game())[LENGTH.size:]
+    colors = body[STATE.size:]
+    for state in (
+        (0, 7, 0, 3, 0, 0, 0, 0, 1, 20, 10),
+        (0, 1, 1, 3, 0, 0, 0, 0, 1, 20, 10),  # The O has one rotation
+        (0, 0, 0, 3, 0, 9, 0, 0, 1, 20, 10),
+        (0, 0, 0, 3, 0, 0, 0, 0, 1, 0, 10),
+    ):
+        with pytest.raises(ValueError):
+            decode_frame(STATE.pack(*state) + colors)
+    with pytest.raises(ValueError):
+        decode_frame(body[:STATE.size] + b"\xff" + colors[1:])
+
+
+def test_a_backed_up_subscriber_keeps_only_the_latest_frame():
+    subscriber = Subscriber(writer=None)
+    for frame in (b"1", b"2", b"3"):
+        subscriber.offer(frame)
+    assert subscriber.pending == b"3"
+    assert subscriber.dropped == 2
+
+
+def test_relay_fans_frames_out_to_spectators():
+    async def session():
+        relay = Relay()
+        port = await relay.start()
+        _, publisher = await asyncio.open_connection("127.0.0.1", port)
+        publisher.write(b"PUB main\n")
+        game = GameState(clock=lambda: 0, seed=5)
+        publisher.write(encode_frame(game))
+        await publisher.drain()
+        while not relay.stats().get("main", (0, 0, 0))[1]:
+            await asyncio.sleep(0.01)
+        # A late spectator starts from the channel's latest frame
+        readers = []
+        for _ in range(2):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"SUB main\n")
+            readers.append((reader, writer))
+        first = [await read_frame(reader) for reader, _ in readers]
+        game.step("hard_drop")
+        publisher.write(encode_frame(game))
+        second = [await read_frame(reader) for reader, _ in readers]
+        for _, writer in readers:
+            writer.close()
+        publisher.close()
+        await relay.stop()
+        return first, second, encode_frame(game)
+
+    first, second, frame = asyncio.run(asyncio.wait_for(session(), 10))
+    assert first[0] == first[1] != frame
+    assert second == [frame, frame]
+
+
+def test_relay_forgets_channels_when_everyone_leaves():
+    async def session():
+        relay = Relay()
+        port = await relay.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"SUB quiet\n")
+        await writer.drain()
+        while "quiet" not in relay.channels:
+            await asyncio.sleep(0.01)
+        # Anything a spectator sends is read and thrown away
+        writer.write(b"x" * 100000)
+        await writer.drain()
+        writer.close()
+        while relay.channels:
+            await asyncio.sleep(0.01)
+        await relay.stop()
+
+    asyncio.run(asyncio.wait_for(session(), 10))
@@ -0,0 +1,39 @@
+"""Fixed-timestep accumulator."""
+
+from timing import FixedStep
+
+
+def test_ticks_accumulate_partial_frames():
+    step = FixedStep(rate=100)  # 10 ms ticks
+    assert step.advance(1000) == 0  # The first call only sets the start
+    assert step.advance(1025) == 2
+    assert step.accumulator == 5
+    assert step.advance(1030) == 1
+    assert step.advance(1039) == 0
+    assert step.advance(1040) == 1
+
+
+def test_run_moves_the_logic_clock():
+    step = FixedStep(rate=100)
+    assert list(step.run(0)) == []
+    assert list(step.run(35)) == [10, 20, 30]
+    assert step.time() == 30
+    assert list(step.run(36)) == []
+    assert step.time() == 30
+
+
+def test_long_stalls_are_capped():
+    step = FixedStep(rate=100, max_ticks=4)
+    step.advance(0)
+    assert step.advance(5000) == 4
+    assert step.accumulator == 0
+    assert step.advance(5010) == 1
+
+
+def test_resync_drops_the_time_in_between():
+    step = FixedStep(rate=100)
+    step.advance(0)
+    step.advance(5)
+    step.resync(60000)  # Back from a menu
+    assert step.advance(60005) == 0
+    assert step.advance(60010) == 1
@@ -0,0 +1,141 @@
+"""Versus datagrams and garbage rows."""
+
+from board import Board
+from engine import GameState, GARBAGE
+from versus import (
+    HEADER, MAGIC, OpponentView, ROW, StateEncoder, VersusLink
+)
+
+
+def same_state(view, game):
+    return (
+        view.rows == game.board.rows
+        and (view.piece, view.rotation) == (
+            game.current_piece, game.current_rotation
+        )
+        and (view.piece_x, view.piece_y) == (game.piece_x, game.piece_y)
+        and view.next_piece == game.next_piece
+        and (view.score, view.lines) == (game.score, game.total_lines)
+        and view.game_over == game.game_over
+    )
+
+
+def test_datagrams_rebuild_the_opponent():
+    game = GameState(clock=lambda: 0, seed=8)
+    encoder = StateEncoder()
+    view = OpponentView()
+    assert not view.connected
+    assert view.apply(encoder.encode(game, 0))
+    assert view.connected
+    for _ in range(12):
+        game.step("rotate")
+        game.step("hard_drop")
+        assert view.apply(encoder.encode(game, 3))
+        assert same_state(view, game)
+        assert view.garbage_sent == 3
+
+
+def test_only_changed_rows_are_sent():
+    game = GameState(clock=lambda: 0, seed=8)
+    encoder = StateEncoder()
+    first = encoder.encode(game, 0)
+    assert len(first) == HEADER.size + 20 * ROW.size  # Full board
+    assert len(encoder.encode(game, 0)) == HEADER.size
+    game.step("hard_drop")
+    assert len(encoder.encode(game, 0)) > HEADER.size
+
+
+def test_a_keyframe_repairs_lost_datagrams():
+    game = GameState(clock=lambda: 0, seed=8)
+    encoder = StateEncoder(keyframe_ticks=5)
+    view = OpponentView()
+    view.apply(encoder.encode(game, 0))
+    game.step("hard_drop")
+    encoder.encode(game, 0)  # Lost on the way
+    for _ in range(2):
+        view.apply(encoder.encode(game, 0))
+    assert view.rows != game.board.rows
+    view.apply(encoder.encode(game, 0))  # seq 5 is a keyframe
+    assert view.rows == game.board.rows
+
+
+def test_stale_and_foreign_datagrams_are_ignored():
+    game = GameState(clock=lambda: 0, seed=8)
+    encoder = StateEncoder()
+    view = OpponentView()
+    old = encoder.encode(game, 0)
+    assert view.apply(encoder.encode(game, 0))
+    assert not view.apply(old)
+    assert not view.apply(b"\x00" * HEADER.size)
+    assert not view.apply(b"\xb7\x01")
+
+
+def datagram(piece=0, rotation=0, next_piece=0, rows=(), seq=1):
+    header = HEADER.pack(
+        MAGIC, 1, seq, 0, piece, rotation, 3, 0, next_piece, 0, 0, 0,
+        len(rows)
+    )
+    return header + b"".join(ROW.pack(i, mask) for i, mask in rows)
+
+
+def test_out_of_range_datagrams_are_rejected():
+    view = OpponentView(rows=20, columns=10)
+    assert view.apply(datagram(piece=6, rotation=3, rows=[(19, 0x3FF)]))
+    for bad in (
+        datagram(piece=7, seq=2),
+        datagram(piece=1, rotation=1, seq=2),  # The O has one rotation
+        datagram(next_piece=200, seq=2),
+        datagram(rows=[(20, 1)], seq=2),
+        datagram(rows=[(0, 1 << 10)], seq=2),
+    ):
+        assert not view.apply(bad)
+    assert view.seq == 1 and view.piece == 6
+    assert view.rows[19] == 0x3FF
+
+
+def test_a_restarted_opponent_is_picked_up():
+    game = GameState(clock=lambda: 0, seed=8)
+    encoder = StateEncoder(session=1)
+    view = OpponentView()
+    for _ in range(5):
+        game.step("hard_drop")
+        view.apply(encoder.encode(game, 4))
+    game = GameState(clock=lambda: 0, seed=9)
+    encoder = StateEncoder(session=2)
+    assert view.apply(encoder.encode(game, 0))  # seq 1 again
+    assert same_state(view, game)
+    assert view.garbage_sent == 0
+
+
+def test_only_the_peer_is_heard():
+    view = OpponentView()
+    link = VersusLink(view, ("127.0.0.1", 9002))
+    data = StateEncoder().encode(GameState(clock=lambda: 0, seed=8), 0)
+    link.datagram_received(data, ("127.0.0.1", 9003))
+    link.datagram_received(data, ("10.0.0.5", 9002))
+    assert not view.connected
+    link.datagram_received(data, ("127.0.0.1", 9002))
+    assert view.connected
+
+
+def test_board_garbage_pushes_the_stack_up():
+    board = Board(4, 4)
+    board.fill(3, 1, 2)
+    assert not board.add_garbage(2, 0, GARBAGE)
+    assert board.rows == [0, 0b0010, 0b1110, 0b1110]
+    assert board.tops == [4, 1, 2, 2]
+    assert board.color_index(1, 1) == 2
+    assert board.color_index(3, 0) == 0
+    assert board.color_index(3, 3) == GARBAGE
+    assert board.add_garbage(2, 3, GARBAGE)  # Row 1 is pushed off the top
+
+
+def test_game_garbage_lifts_the_piece_or_ends_the_game():
+    game = GameState(clock=lambda: 0, seed=8)
+    game.piece_y = 17
+    game.add_garbage(3, 0)
+    assert not game.game_over
+    assert game.fits(game.current_rotation, game.piece_x, game.piece_y)
+    assert game.piece_y < 17
+    game.add_garbage(20, 0)
+    assert game.game_over
@@ -0,0 +1,51 @@
+"""
+Bitso Tetris - fixed-timestep scheduling.
+
+Game logic advances in fixed ticks driven by an accumulator, so gravity,
+fast drop and lateral repeat behave the same however fast the frames
+are drawn. Rendering is paced separately by pygame's Clock.
+"""
+
+
+class FixedStep:
+    """Turns wall-clock milliseconds into a count of fixed logic ticks.
+
+    ``time()`` is the logic clock in milliseconds. It only moves forward
+    when ticks are consumed, so it can be passed to GameState as its
+    clock to make every timer deterministic.
+    """
+
+    def __init__(self, rate=60, max_ticks=10):
+        self.step_ms = 1000 / rate
+        self.max_ticks = max_ticks  # Catch-up limit after a long stall
+        self.ticks = 0
+        self.accumulator = 0.0
+        self.last_wall = None
+
+    def time(self):
+        """Returns the logic time in whole milliseconds."""
+        return int(self.ticks * self.step_ms)
+
+    def resync(self, wall_ms):
+        """Drops any time accumulated up to wall_ms (pause, menus)."""
+        self.last_wall = wall_ms
+        self.accumulator = 0.0
+
+    def advance(self, wall_ms):
+        """Returns how many logic ticks are due at wall_ms."""
+        if self.last_wall is None:
+            self.last_wall = wall_ms
+        self.accumulator += wall_ms - self.last_wall
+        self.last_wall = wall_ms
+        due = int(self.accumulator // self.step_ms)
+        self.accumulator -= due * self.step_ms
+        if due > self.max_ticks:
+            due = self.max_ticks
+            self.accumulator = 0.0
+        return due
+
+    def run(self, wall_ms):
+        """Yields the logic time of every tick due at wall_ms."""
+        for _ in range(self.advance(wall_ms)):
+            self.ticks += 1
+            yield self.time()
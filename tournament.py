@@ -0,0 +1,157 @@
+"""
+Bitso Tetris - multiprocess tournament runner.
+
+Plays seeded headless games with the autoplay bot across all cores and
+streams one JSON line per finished game to a results file, so a run can
+be stopped and resumed. Prints the mean of each stat with a 95%
+confidence interval at the end.
+
+Usage:
+    python tournament.py --games 500 --weights holes=-0.4,lines=0.8
+    python tournament.py --games 500 --resume
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bot import WEIGHTS, play_game
+from engine import GameState
+
+
+RESULTS_FILE = "tournament.jsonl"
+STATS = ("score", "lines", "level", "pieces")
+Z_95 = 1.96
+
+
+def play_seed(seed, weights, max_pieces):
+    """Plays one seeded game and returns its result record."""
+    game = GameState(rng=random.Random(seed), clock=lambda: 0)
+    play_game(game, weights, max_pieces)
+    return {
+        "seed": seed,
+        "weights": weights,
+        "max_pieces": max_pieces,
+        "score": game.score,
+        "lines": game.total_lines,
+        "level": game.level,
+        "pieces": game.pieces_placed,
+        "topped_out": game.game_over,
+    }
+
+
+def confidence_interval(values, z=Z_95):
+    """Returns (mean, half-width) using the normal approximation."""
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, math.inf
+    return mean, z * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def parse_weights(text):
+    """Parses "name=value,..." over the defaults in bot.WEIGHTS."""
+    weights = dict(WEIGHTS)
+    if not text:
+        return weights
+    for item in text.split(","):
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if not sep or name not in WEIGHTS:
+            raise ValueError(f"Bad weight: {item!r}")
+        weights[name] = float(value)
+    return weights
+
+
+def load_results(path, weights, max_pieces):
+    """Returns earlier records from the file that match this run."""
+    results = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from an interrupted run
+                if (
+                    record.get("weights") == weights
+                    and record.get("max_pieces") == max_pieces
+                ):
+                    results[record["seed"]] = record
+    except OSError:
+        pass
+    return results
+
+
+def print_summary(results):
+    print(f"{len(results)} games")
+    for stat in STATS:
+        mean, half = confidence_interval([r[stat] for r in results])
+        print(f"  {stat:<7}{mean:12.1f} +/- {half:.1f}")
+
+
+def run(args):
+    weights = parse_weights(args.weights)
+    seeds = range(args.seed, args.seed + args.games)
+    done = {}
+    if args.resume:
+        done = load_results(args.results, weights, args.max_pieces)
+    elif os.path.exists(args.results):
+        sys.exit(f"{args.results} exists; pass --resume or a new --results")
+    pending = [seed for seed in seeds if seed not in done]
+    results = [done[seed] for seed in seeds if seed in done]
+    if results:
+        print(f"Resuming: {len(results)} games already played")
+
+    with open(args.results, "a") as out, ProcessPoolExecutor(
+        args.workers
+    ) as pool:
+        futures = [
+            pool.submit(play_seed, seed, weights, args.max_pieces)
+            for seed in pending
+        ]
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                results.append(record)
+                print(
+                    f"[{len(results)}/{args.games}] seed {record['seed']}: "
+                    f"score {record['score']} lines {record['lines']} "
+                    f"level {record['level']} pieces {record['pieces']}"
+                )
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            print("Interrupted; rerun with --resume to continue")
+    if results:
+        print_summary(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--max-pieces", type=int, default=1000,
+        help="stop a game after this many pieces (0 for no limit)"
+    )
+    parser.add_argument("--weights", help="e.g. holes=-0.4,lines=0.8")
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args(argv)
+    args.max_pieces = args.max_pieces or None
+    try:
+        parse_weights(args.weights)
+    except ValueError as e:
+        parser.error(str(e))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Bitso Tetris - two-player versus mode over UDP.
+
+Each player runs their own GameState and, once per logic tick, sends
+the opponent one small datagram. It carries the rows that changed since
+the previous datagram as bitmasks, the falling piece, the score and a
+running total of garbage rows sent. The whole board goes out every
+KEYFRAME_TICKS ticks, so a lost datagram is repaired soon after, and
+because garbage is a running total it is never lost or applied twice.
+Each run picks a random session id, so a restarted opponent is picked
+up even though their sequence numbers start over.
+
+Clearing 2, 3 or 4 rows sends 1, 2 or 4 garbage rows (GARBAGE_FOR_LINES).
+
+The network runs on asyncio: the pygame loop is a coroutine that yields
+to the event loop between frames, and datagrams are handled in between.
+
+Usage, one command per player:
+    python versus.py --port 9001 --peer 127.0.0.1:9002
+    python versus.py --port 9002 --peer 127.0.0.1:9001
+"""
+
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import sys
+import time
+
+from board import Board
+from config import CONFIG
+from engine import GameState, GARBAGE_FOR_LINES
+from pieces import PIECES
+from timing import FixedStep
+
+
+MAGIC = 0xB7
+KEYFRAME_TICKS = 30
+KEYFRAME = 1
+GAME_OVER = 2
+OPPONENT_COLOR = 1  # Color index the opponent's cells are drawn with
+PANEL_X = 330
+
+# magic, session, seq, flags, piece, rotation, x, y, next piece, score,
+# lines, garbage sent, changed row count; then (row, mask) per changed row
+HEADER = struct.Struct("<BHIBBBbbBIHHB")
+ROW = struct.Struct("<BH")
+
+
+# === Datagrams ===
+class StateEncoder:
+    """Builds a player's datagrams, sending only the rows that changed."""
+
+    def __init__(self, keyframe_ticks=KEYFRAME_TICKS, session=None):
+        self.keyframe_ticks = keyframe_ticks
+        if session is None:
+            session = random.getrandbits(16)
+        self.session = session
+        self.seq = 0
+        self.sent_rows = None
+
+    def encode(self, game, garbage_sent):
+        """Returns the datagram for the game's current state."""
+        if game.board.width > 16:
+            raise ValueError("Row masks are 16 bits wide")
+        self.seq += 1
+        rows = game.board.rows
+        flags = GAME_OVER if game.game_over else 0
+        if self.sent_rows is None or self.seq % self.keyframe_ticks == 0:
+            flags |= KEYFRAME
+            changed = list(enumerate(rows))
+        else:
+            changed = [
+                (i, mask)
+                for i, (mask, old) in enumerate(zip(rows, self.sent_rows))
+                if mask != old
+            ]
+        self.sent_rows = rows[:]
+        header = HEADER.pack(
+            MAGIC, self.session, self.seq, flags,
+            game.current_piece, game.current_rotation,
+            game.piece_x, game.piece_y, game.next_piece,
+            game.score, game.total_lines & 0xFFFF, garbage_sent & 0xFFFF,
+            len(changed)
+        )
+        return header + b"".join(ROW.pack(i, mask) for i, mask in changed)
+
+
+class OpponentView:
+    """The opponent's board and piece, rebuilt from their datagrams."""
+
+    def __init__(self, rows=None, columns=None):
+        self.height = CONFIG["ROWS"] if rows is None else rows
+        self.width = CONFIG["COLUMNS"] if columns is None else columns
+        self.rows = [0] * self.height
+        self.session = None
+        self.seq = 0
+        self.piece = self.rotation = self.piece_x = self.piece_y = 0
+        self.next_piece = 0
+        self.score = 0
+        self.lines = 0
+        self.garbage_sent = 0
+        self.game_over = False
+        self.changed = True  # Set on every update, cleared by the drawer
+
+    @property
+    def connected(self):
+        return self.seq > 0
+
+    def apply(self, data):
+        """Applies a datagram; returns False if it is stale or malformed.
+
+        A datagram from a new session starts the view over, so it is
+        accepted whatever its sequence number.
+        """
+        try:
+            (
+                magic, session, seq, flags, piece, rotation, piece_x,
+                piece_y, next_piece, score, lines, garbage_sent, count
+            ) = HEADER.unpack_from(data)
+            if magic != MAGIC:
+                return False
+            if session == self.session and seq <= self.seq:
+                return False
+            rows = [
+                ROW.unpack_from(data, HEADER.size + k * ROW.size)
+                for k in range(count)
+            ]
+        except struct.error:
+            return False
+        # Everything is checked before anything is applied
+        if (
+            piece >= len(PIECES) or rotation >= len(PIECES[piece])
+            or next_piece >= len(PIECES)
+            or any(
+                i >= self.height or mask >> self.width for i, mask in rows
+            )
+        ):
+            return False
+        if session != self.session:
+            self.session = session
+            self.rows = [0] * self.height
+        self.seq = seq
+        for i, mask in rows:
+            self.rows[i] = mask
+        self.piece, self.rotation = piece, rotation
+        self.piece_x, self.piece_y = piece_x, piece_y
+        self.next_piece = next_piece
+        self.score, self.lines = score, lines
+        self.garbage_sent = garbage_sent
+        self.game_over = bool(flags & GAME_OVER)
+        self.changed = True
+        return True
+
+    def board(self):
+        """Returns the opponent's cells as a Board in one color."""
+        board = Board(self.height, self.width)
+        for row, mask in enumerate(self.rows):
+            col = 0
+            while mask:
+                if mask & 1:
+                    board.fill(row, col, OPPONENT_COLOR)
+                mask >>= 1
+                col += 1
+        return board
+
+
+class VersusLink(asyncio.DatagramProtocol):
+    """UDP endpoint that feeds an OpponentView and sends to the peer."""
+
+    def __init__(self, view, peer):
+        self.view = view
+        self.peer = peer
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        # Anyone can reach the port; only the configured peer is heard
+        if addr[:2] == self.peer[:2]:
+            self.view.apply(data)
+
+    def error_received(self, exc):
+        pass  # The peer is not listening yet; keep sending
+
+    def send(self, data):
+        self.transport.sendto(data, self.peer)
+
+
+# === Game Loop ===
+async def play(args):
+    """Runs one versus game; returns when the window is closed."""
+    import pygame
+    from hud import get_font, render_text
+    from render import (
+        BOARD_TOP, Renderer, draw_board, draw_piece, get_atlas
+    )
+
+    pygame.display.init()
+    pygame.font.init()
+    window = pygame.display.set_mode(
+        (CONFIG["WINDOW_WIDTH"], CONFIG["WINDOW_HEIGHT"])
+    )
+    pygame.display.set_caption("Tetris - Versus")
+    size = CONFIG["CELL_SIZE"]
+    font = get_font("Verdana", 20)
+    font_bold = get_font("Verdana", 20, bold=True)
+    get_atlas(size)
+
+    loop = asyncio.get_running_loop()
+    view = OpponentView()
+    link = VersusLink(view, args.peer)
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: link, local_addr=(args.host, args.port)
+    )
+    # Datagrams arrive from a numeric address, not the name given
+    family = transport.get_extra_info("socket").family
+    infos = await loop.getaddrinfo(
+        *args.peer, family=family, type=socket.SOCK_DGRAM
+    )
+    link.peer = infos[0][4]
+    scheduler = FixedStep(CONFIG["TICK_RATE"])
+    game = GameState(clock=scheduler.time, seed=args.seed)
+    encoder = StateEncoder()
+    hole_rng = random.Random(game.seed)
+    garbage_sent = 0
+    garbage_taken = 0
+    opponent_session = None
+    bot_moves = []
+
+    def draw_background(surface):
+        surface.fill((15, 15, 15))
+        surface.blit(render_text(font_bold, "You"), (10, 20))
+        surface.blit(render_text(font_bold, "Opponent"), (PANEL_X, 20))
+
+    renderer = Renderer(window, draw_background)
+    # The opponent is drawn with draw_board/draw_piece off screen, then
+    # shrunk to half size into the panel
+    board_area = pygame.Rect(
+        0, BOARD_TOP, game.board.width * size, game.board.height * size
+    )
+    offscreen = pygame.Surface((board_area.right, board_area.bottom))
+    mini_rect = pygame.Rect(
+        PANEL_X, 120, board_area.width // 2, board_area.height // 2
+    )
+    text_rect = pygame.Rect(PANEL_X, 60, 220, 50)
+
+    def draw_opponent():
+        draw_board(offscreen, view.board())
+        if not view.game_over:
+            draw_piece(
+                offscreen, view.piece, view.rotation,
+                view.piece_x, view.piece_y
+            )
+        window.blit(
+            pygame.transform.scale(
+                offscreen.subsurface(board_area), mini_rect.size
+            ),
+            mini_rect
+        )
+        window.fill((15, 15, 15), text_rect)
+        window.blit(render_text(font, f"Score {view.score}"), text_rect)
+        window.blit(
+            render_text(font, f"Lines {view.lines}"),
+            (text_rect.x, text_rect.y + 25)
+        )
+        renderer.mark(mini_rect)
+        renderer.mark(text_rect)
+        view.changed = False
+
+    def show_message(text):
+        message = render_text(font_bold, text, (255, 255, 255))
+        rect = message.get_rect(center=(board_area.centerx, 640))
+        window.fill((15, 15, 15), (0, rect.y, PANEL_X, rect.height))
+        window.blit(message, rect)
+        renderer.mark(pygame.Rect(0, rect.y, PANEL_X, rect.height))
+
+    def tick(now, keys):
+        nonlocal garbage_sent, garbage_taken, opponent_session
+        if view.session != opponent_session:
+            # A restarted opponent counts their garbage from zero again
+            opponent_session = view.session
+            garbage_taken = 0
+        # Garbage the opponent sent since the last tick
+        incoming = (view.garbage_sent - garbage_taken) & 0xFFFF
+        if incoming:
+            game.add_garbage(incoming, hole_rng.randrange(game.board.width))
+            garbage_taken = view.garbage_sent
+        results = [game.update(fast_drop=keys[pygame.K_DOWN], now=now)]
+        if args.bot:
+            if not bot_moves:
+                from bot import best_placement
+                placement = best_placement(game)
+                bot_moves.extend(placement.path if placement else ())
+                bot_moves.append("hard_drop")
+            if scheduler.ticks % 4 == 0:
+                results.append(game.step(bot_moves.pop(0)))
+        for result in results:
+            garbage_sent += GARBAGE_FOR_LINES[len(result.cleared_rows)]
+            if result.locked:
+                bot_moves.clear()
+        link.send(encoder.encode(game, garbage_sent))
+
+    def wall_ms():
+        # pygame's own timer only starts with pygame.init() or a Clock
+        return int(time.perf_counter() * 1000)
+
+    frame_seconds = 1 / CONFIG["FPS"]
+    last_left = last_right = 0
+    started = False
+    finished_at = None
+    try:
+        while True:
+            frame_start = time.perf_counter()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type != pygame.KEYDOWN or not started:
+                    continue
+                if event.key == pygame.K_ESCAPE:
+                    return
+                if event.key == pygame.K_UP:
+                    game.step("rotate")
+                elif event.key == pygame.K_DOWN:
+                    game.step("down")
+                elif event.key == pygame.K_SPACE:
+                    result = game.step("hard_drop")
+                    garbage_sent += GARBAGE_FOR_LINES[
+                        len(result.cleared_rows)
+                    ]
+
+            if not started:
+                # Keep announcing ourselves until the opponent answers
+                link.send(encoder.encode(game, garbage_sent))
+                if view.connected:
+                    started = True
+                    scheduler.resync(wall_ms())
+                    renderer.invalidate()
+                else:
+                    renderer.draw_playfield(game)
+                    show_message(f"Waiting for {args.peer[0]}:"
+                                 f"{args.peer[1]}")
+            elif finished_at is None:
+                keys = pygame.key.get_pressed()
+                for now in scheduler.run(wall_ms()):
+                    tick(now, keys)
+                    if game.game_over or view.game_over:
+                        finished_at = time.perf_counter()
+                        break
+                    if (
+                        keys[pygame.K_LEFT]
+                        and now - last_left > CONFIG["LATERAL_SPEED"]
+                    ):
+                        game.step("left")
+                        last_left = now
+                    if (
+                        keys[pygame.K_RIGHT]
+                        and now - last_right > CONFIG["LATERAL_SPEED"]
+                    ):
+                        game.step("right")
+                        last_right = now
+                renderer.draw_playfield(game)
+            else:
+                # Keep sending the final state so the opponent sees it
+                link.send(encoder.encode(game, garbage_sent))
+                won = view.game_over and not game.game_over
+                show_message("You win!" if won else "You lose")
+                if args.exit_after and \
+                        time.perf_counter() - finished_at > args.exit_after:
+                    return
+            if view.changed:
+                draw_opponent()
+            renderer.present()
+            # Yield to the network until the next frame is due
+            elapsed = time.perf_counter() - frame_start
+            await asyncio.sleep(max(0.0, frame_seconds - elapsed))
+    finally:
+        transport.close()
+        print(
+            f"score {game.score} lines {game.total_lines} "
+            f"garbage sent {garbage_sent} received {garbage_taken} "
+            f"opponent score {view.score}"
+        )
+        pygame.quit()
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bitso Tetris versus mode")
+    parser.add_argument("--host", default="127.0.0.1", help="bind address")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument(
+        "--peer", type=parse_address, default=("127.0.0.1", 9002),
+        help="opponent's host:port"
+    )
+    parser.add_argument("--seed", type=int, help="piece sequence seed")
+    parser.add_argument("--bot", action="store_true", help="autoplay")
+    parser.add_argument(
+        "--exit-after", type=float, default=0,
+        help="close this many seconds after the game ends"
+    )
+    args = parser.parse_args(argv)
+    asyncio.run(play(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())